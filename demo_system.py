@@ -4,9 +4,11 @@ Assignment 4 - System Demonstration
 Shows that all components are working correctly
 """
 
-import mysql.connector
 from datetime import datetime
 
+from subscriber_db import get_pool
+from subscriber_db.stats import get_stats, table_counts
+
 def demo_system():
     print("=" * 60)
     print("ASSIGNMENT 4 - SYSTEM DEMONSTRATION")
@@ -14,13 +16,8 @@ def demo_system():
     
     # Connect to database
     print("🔌 Connecting to database...")
-    conn = mysql.connector.connect(
-        host='127.0.0.1',
-        port=3307,
-        user='subscriber_user',
-        password='SubscriberPass123',
-        database='subscriber_db'
-    )
+    pool = get_pool()
+    conn = pool.connection()
     cursor = conn.cursor(dictionary=True)
     print("✅ Database connection successful")
     
@@ -30,11 +27,10 @@ def demo_system():
     tables = [row['Tables_in_subscriber_db'] for row in cursor.fetchall()]
     print(f"Tables: {tables}")
     
+    counts = table_counts(get_stats(pool))
     for table in ['subscribers', 'subscription_preferences', 'subscription_history']:
         if table in tables:
-            cursor.execute(f"SELECT COUNT(*) as count FROM {table}")
-            count = cursor.fetchone()['count']
-            print(f"  - {table}: {count} records")
+            print(f"  - {table}: {counts[table]} records")
     
     # Demonstrate CRUD operations
     print("\n🔄 Demonstrating CRUD Operations:")
@@ -65,13 +61,17 @@ def demo_system():
     print("✅ DELETE: Removed test subscriber")
     
     # Show final state
-    cursor.execute("SELECT COUNT(*) as count FROM subscribers")
-    final_count = cursor.fetchone()['count']
+    final_count = get_stats(pool)['subscribers']['total']
     print(f"\n📈 Final subscriber count: {final_count}")
     
     cursor.close()
     conn.close()
     
+    metrics = pool.metrics()
+    print(f"🔁 Pool: {metrics['checkouts']} checkouts, "
+          f"avg wait {metrics['wait_time_avg'] * 1000:.2f} ms, "
+          f"{metrics['in_use']}/{metrics['size']} in use")
+    
     print("\n" + "=" * 60)
     print("🎉 SYSTEM DEMONSTRATION COMPLETE!")
     print("=" * 60)
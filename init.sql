@@ -4,5 +4,5 @@ USE subscriber_db;
 
 -- Create user with restricted privileges
 CREATE USER IF NOT EXISTS 'subscriber_user'@'%' IDENTIFIED BY 'SubscriberPass123';
-GRANT SELECT, INSERT, UPDATE, DELETE, CREATE, DROP, INDEX, ALTER ON subscriber_db.* TO 'subscriber_user'@'%';
+GRANT SELECT, INSERT, UPDATE, DELETE, CREATE, DROP, INDEX, ALTER, TRIGGER ON subscriber_db.* TO 'subscriber_user'@'%';
 FLUSH PRIVILEGES; 
\ No newline at end of file
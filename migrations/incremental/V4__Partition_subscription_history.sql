@@ -0,0 +1,91 @@
+-- Partition subscription_history by action_date month
+-- MySQL cannot partition a table that has foreign keys, so the subscriber
+-- reference is enforced by the triggers below instead of a FOREIGN KEY.
+-- Monthly partitions are created and retired by: python -m subscriber_db.partitions
+
+UPDATE subscription_history SET action_date = CURRENT_TIMESTAMP WHERE action_date IS NULL;
+
+-- The constraint name is generated (and toggled by online schema changes), so look it up
+SET @history_fk = (
+    SELECT constraint_name FROM information_schema.referential_constraints
+    WHERE constraint_schema = DATABASE()
+      AND table_name = 'subscription_history'
+      AND referenced_table_name = 'subscribers'
+    LIMIT 1);
+SET @drop_history_fk = IF(@history_fk IS NULL, 'DO 0',
+    CONCAT('ALTER TABLE subscription_history DROP FOREIGN KEY `', @history_fk, '`'));
+PREPARE drop_history_fk FROM @drop_history_fk;
+EXECUTE drop_history_fk;
+DEALLOCATE PREPARE drop_history_fk;
+
+-- One partition per month from 2025-01 through the current UTC month, so
+-- existing rows are spread out and p_future starts empty: the first
+-- rollover then splits an empty partition instead of rewriting every
+-- recent row. Bounds are UTC epoch seconds of each next month start,
+-- computed without the session time zone (as partitions.epoch() does).
+SET SESSION group_concat_max_len = 1048576;
+SET @history_months = (
+    WITH RECURSIVE months (month_start) AS (
+        SELECT CAST('2025-01-01' AS DATETIME)
+        UNION ALL
+        SELECT month_start + INTERVAL 1 MONTH FROM months
+        WHERE month_start < CAST(UTC_DATE() - INTERVAL (DAYOFMONTH(UTC_DATE()) - 1) DAY AS DATETIME)
+    )
+    SELECT GROUP_CONCAT(
+        CONCAT('PARTITION p', DATE_FORMAT(month_start, '%Y%m'), ' VALUES LESS THAN (',
+               TIMESTAMPDIFF(SECOND, '1970-01-01 00:00:00', month_start + INTERVAL 1 MONTH), ')')
+        ORDER BY month_start SEPARATOR ', ')
+    FROM months);
+
+-- Every unique key must include the partitioning column
+SET @partition_history = CONCAT(
+    'ALTER TABLE subscription_history ',
+    'MODIFY action_date TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP, ',
+    'DROP PRIMARY KEY, ',
+    'ADD PRIMARY KEY (id, action_date), ',
+    'ADD INDEX idx_subscriber_date (subscriber_id, action_date) ',
+    'PARTITION BY RANGE (UNIX_TIMESTAMP(action_date)) (',
+    'PARTITION p_history VALUES LESS THAN (1735689600), ', -- 2025-01-01 00:00:00 UTC
+    @history_months, ', ',
+    'PARTITION p_future VALUES LESS THAN MAXVALUE)');
+PREPARE partition_history FROM @partition_history;
+EXECUTE partition_history;
+DEALLOCATE PREPARE partition_history;
+
+DELIMITER $$
+
+CREATE TRIGGER subscription_history_fk_insert
+BEFORE INSERT ON subscription_history
+FOR EACH ROW
+BEGIN
+    DECLARE parent_count INT;
+    SELECT COUNT(*) INTO parent_count FROM subscribers WHERE id = NEW.subscriber_id LOCK IN SHARE MODE;
+    IF parent_count = 0 THEN
+        SIGNAL SQLSTATE '23000'
+            SET MESSAGE_TEXT = 'Cannot add or update a child row: subscription_history.subscriber_id references a missing subscriber';
+    END IF;
+END$$
+
+CREATE TRIGGER subscription_history_fk_update
+BEFORE UPDATE ON subscription_history
+FOR EACH ROW
+BEGIN
+    DECLARE parent_count INT;
+    IF NOT (NEW.subscriber_id <=> OLD.subscriber_id) THEN
+        SELECT COUNT(*) INTO parent_count FROM subscribers WHERE id = NEW.subscriber_id LOCK IN SHARE MODE;
+        IF parent_count = 0 THEN
+            SIGNAL SQLSTATE '23000'
+                SET MESSAGE_TEXT = 'Cannot add or update a child row: subscription_history.subscriber_id references a missing subscriber';
+        END IF;
+    END IF;
+END$$
+
+-- Replaces ON DELETE CASCADE
+CREATE TRIGGER subscribers_history_cascade
+AFTER DELETE ON subscribers
+FOR EACH ROW
+BEGIN
+    DELETE FROM subscription_history WHERE subscriber_id = OLD.id;
+END$$
+
+DELIMITER ;
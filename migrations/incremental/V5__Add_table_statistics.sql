@@ -0,0 +1,139 @@
+-- Exact row counters maintained by triggers, read by python -m subscriber_db.stats
+-- Each counter is split over 16 shard rows picked by CONNECTION_ID(), so
+-- concurrent writers rarely wait on the same row; a counter is SUM(value).
+
+CREATE TABLE table_stats (
+    name VARCHAR(64) NOT NULL,
+    shard TINYINT UNSIGNED NOT NULL,
+    value BIGINT NOT NULL DEFAULT 0,
+    PRIMARY KEY (name, shard)
+);
+
+-- Backfill before the triggers exist; rows written while this migration runs
+-- can be reconciled with: python -m subscriber_db.stats --rebuild
+INSERT INTO table_stats (name, shard, value)
+SELECT 'subscribers', 0, COUNT(*) FROM subscribers
+UNION ALL
+SELECT 'subscribers.active', 0, COUNT(*) FROM subscribers WHERE is_active
+UNION ALL
+SELECT 'subscription_preferences', 0, COUNT(*) FROM subscription_preferences
+UNION ALL
+SELECT CONCAT('subscription_preferences.frequency.', COALESCE(frequency, 'none')), 0, COUNT(*)
+FROM subscription_preferences GROUP BY frequency
+UNION ALL
+SELECT 'subscription_history', 0, COUNT(*) FROM subscription_history
+UNION ALL
+SELECT CONCAT('subscription_history.action.', action), 0, COUNT(*)
+FROM subscription_history GROUP BY action;
+
+DELIMITER $$
+
+CREATE TRIGGER subscribers_stats_insert
+AFTER INSERT ON subscribers
+FOR EACH ROW
+BEGIN
+    INSERT INTO table_stats (name, shard, value) VALUES
+        ('subscribers', CONNECTION_ID() % 16, 1),
+        ('subscribers.active', CONNECTION_ID() % 16, IF(NEW.is_active, 1, 0))
+    ON DUPLICATE KEY UPDATE value = value + VALUES(value);
+END$$
+
+CREATE TRIGGER subscribers_stats_update
+AFTER UPDATE ON subscribers
+FOR EACH ROW
+BEGIN
+    IF IF(NEW.is_active, 1, 0) <> IF(OLD.is_active, 1, 0) THEN
+        INSERT INTO table_stats (name, shard, value) VALUES
+            ('subscribers.active', CONNECTION_ID() % 16, IF(NEW.is_active, 1, -1))
+        ON DUPLICATE KEY UPDATE value = value + VALUES(value);
+    END IF;
+END$$
+
+-- Foreign key cascades do not fire triggers, so the preferences row that
+-- ON DELETE CASCADE is about to remove is counted out here
+CREATE TRIGGER subscribers_stats_delete
+BEFORE DELETE ON subscribers
+FOR EACH ROW
+BEGIN
+    DECLARE preference_rows INT;
+    DECLARE preference_frequency VARCHAR(16);
+    SELECT COUNT(*), MAX(COALESCE(frequency, 'none')) INTO preference_rows, preference_frequency
+    FROM subscription_preferences WHERE subscriber_id = OLD.id;
+    INSERT INTO table_stats (name, shard, value) VALUES
+        ('subscribers', CONNECTION_ID() % 16, -1),
+        ('subscribers.active', CONNECTION_ID() % 16, -IF(OLD.is_active, 1, 0))
+    ON DUPLICATE KEY UPDATE value = value + VALUES(value);
+    IF preference_rows > 0 THEN
+        INSERT INTO table_stats (name, shard, value) VALUES
+            ('subscription_preferences', CONNECTION_ID() % 16, -preference_rows),
+            (CONCAT('subscription_preferences.frequency.', preference_frequency), CONNECTION_ID() % 16, -preference_rows)
+        ON DUPLICATE KEY UPDATE value = value + VALUES(value);
+    END IF;
+END$$
+
+CREATE TRIGGER subscription_preferences_stats_insert
+AFTER INSERT ON subscription_preferences
+FOR EACH ROW
+BEGIN
+    INSERT INTO table_stats (name, shard, value) VALUES
+        ('subscription_preferences', CONNECTION_ID() % 16, 1),
+        (CONCAT('subscription_preferences.frequency.', COALESCE(NEW.frequency, 'none')), CONNECTION_ID() % 16, 1)
+    ON DUPLICATE KEY UPDATE value = value + VALUES(value);
+END$$
+
+CREATE TRIGGER subscription_preferences_stats_update
+AFTER UPDATE ON subscription_preferences
+FOR EACH ROW
+BEGIN
+    IF NOT (NEW.frequency <=> OLD.frequency) THEN
+        INSERT INTO table_stats (name, shard, value) VALUES
+            (CONCAT('subscription_preferences.frequency.', COALESCE(OLD.frequency, 'none')), CONNECTION_ID() % 16, -1),
+            (CONCAT('subscription_preferences.frequency.', COALESCE(NEW.frequency, 'none')), CONNECTION_ID() % 16, 1)
+        ON DUPLICATE KEY UPDATE value = value + VALUES(value);
+    END IF;
+END$$
+
+CREATE TRIGGER subscription_preferences_stats_delete
+AFTER DELETE ON subscription_preferences
+FOR EACH ROW
+BEGIN
+    INSERT INTO table_stats (name, shard, value) VALUES
+        ('subscription_preferences', CONNECTION_ID() % 16, -1),
+        (CONCAT('subscription_preferences.frequency.', COALESCE(OLD.frequency, 'none')), CONNECTION_ID() % 16, -1)
+    ON DUPLICATE KEY UPDATE value = value + VALUES(value);
+END$$
+
+-- History deletes cascade through the V4 trigger, which does fire these
+CREATE TRIGGER subscription_history_stats_insert
+AFTER INSERT ON subscription_history
+FOR EACH ROW
+BEGIN
+    INSERT INTO table_stats (name, shard, value) VALUES
+        ('subscription_history', CONNECTION_ID() % 16, 1),
+        (CONCAT('subscription_history.action.', NEW.action), CONNECTION_ID() % 16, 1)
+    ON DUPLICATE KEY UPDATE value = value + VALUES(value);
+END$$
+
+CREATE TRIGGER subscription_history_stats_update
+AFTER UPDATE ON subscription_history
+FOR EACH ROW
+BEGIN
+    IF NEW.action <> OLD.action THEN
+        INSERT INTO table_stats (name, shard, value) VALUES
+            (CONCAT('subscription_history.action.', OLD.action), CONNECTION_ID() % 16, -1),
+            (CONCAT('subscription_history.action.', NEW.action), CONNECTION_ID() % 16, 1)
+        ON DUPLICATE KEY UPDATE value = value + VALUES(value);
+    END IF;
+END$$
+
+CREATE TRIGGER subscription_history_stats_delete
+AFTER DELETE ON subscription_history
+FOR EACH ROW
+BEGIN
+    INSERT INTO table_stats (name, shard, value) VALUES
+        ('subscription_history', CONNECTION_ID() % 16, -1),
+        (CONCAT('subscription_history.action.', OLD.action), CONNECTION_ID() % 16, -1)
+    ON DUPLICATE KEY UPDATE value = value + VALUES(value);
+END$$
+
+DELIMITER ;
@@ -0,0 +1,20 @@
+-- Rework secondary indexes around the real read paths
+-- subscribers.email is already UNIQUE, so idx_email duplicates that index on
+-- every insert, and idx_active on a two-valued flag is never selective.
+-- History reads by subscriber ordered by date (and the timeline's action)
+-- are served by one covering index, replacing the two subscriber-leading ones.
+-- All in place: drops are metadata-only and the new index builds without locking writes.
+
+ALTER TABLE subscribers
+    DROP INDEX idx_email,
+    DROP INDEX idx_active,
+    ALGORITHM=INPLACE, LOCK=NONE;
+
+ALTER TABLE subscription_history
+    ADD INDEX idx_subscriber_date_action (subscriber_id, action_date, action),
+    ALGORITHM=INPLACE, LOCK=NONE;
+
+ALTER TABLE subscription_history
+    DROP INDEX idx_subscriber_date,
+    DROP INDEX idx_subscriber_action,
+    ALGORITHM=INPLACE, LOCK=NONE;
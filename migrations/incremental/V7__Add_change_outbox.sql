@@ -0,0 +1,22 @@
+-- Transactional outbox for subscriber change events, read by python -m subscriber_db.outbox
+-- The data-access layer inserts one row per change in the same transaction
+-- as the change itself; ids give consumers a total order that TIMESTAMP
+-- columns with one-second resolution cannot.
+
+CREATE TABLE subscriber_outbox (
+    id BIGINT UNSIGNED AUTO_INCREMENT PRIMARY KEY,
+    subscriber_id INT NOT NULL,
+    event_type VARCHAR(32) NOT NULL,
+    payload JSON NOT NULL,
+    created_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6),
+    INDEX idx_outbox_subscriber (subscriber_id, id)
+);
+
+-- One durable watermark per named consumer; rows at or below every
+-- consumer's last_id are delivered and may be pruned
+CREATE TABLE outbox_consumers (
+    name VARCHAR(64) NOT NULL PRIMARY KEY,
+    last_id BIGINT UNSIGNED NOT NULL DEFAULT 0,
+    delivered BIGINT UNSIGNED NOT NULL DEFAULT 0,
+    updated_at TIMESTAMP(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6)
+);
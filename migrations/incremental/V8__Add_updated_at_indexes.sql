@@ -0,0 +1,11 @@
+-- Index updated_at so incremental syncs read only the rows changed since their watermark
+-- (updated_at, id) orders same-second ties, which keyset pagination resumes through.
+-- Built in place without locking writes.
+
+ALTER TABLE subscribers
+    ADD INDEX idx_updated_at (updated_at, id),
+    ALGORITHM=INPLACE, LOCK=NONE;
+
+ALTER TABLE subscription_preferences
+    ADD INDEX idx_updated_at (updated_at, id),
+    ALGORITHM=INPLACE, LOCK=NONE;
@@ -3,11 +3,15 @@
 Quick System Test - Verify all Assignment 4 components
 """
 
+import argparse
 import subprocess
-import mysql.connector
 import os
 from datetime import datetime
 
+from subscriber_db import get_pool
+from subscriber_db.checks import Check, human_output, print_summary, run_checks, write_json
+from subscriber_db.migrations import MigrationRunner
+
 def test_component(name, test_func):
     """Run a test and report results"""
     print(f"\n🔍 Testing: {name}")
@@ -30,12 +34,7 @@ def test_docker():
 
 def test_database():
     """Test database connection"""
-    connection = mysql.connector.connect(
-        host='127.0.0.1',
-        port=3307,
-        user='root',
-        password='Secret5555'
-    )
+    connection = get_pool('admin', admin=True).connection()
     cursor = connection.cursor()
     cursor.execute("SHOW DATABASES")
     databases = [row[0] for row in cursor.fetchall()]
@@ -46,12 +45,7 @@ def test_database():
 def test_subscriber_setup():
     """Test subscriber database setup"""
     # Create database and user
-    connection = mysql.connector.connect(
-        host='127.0.0.1',
-        port=3307,
-        user='root',
-        password='Secret5555'
-    )
+    connection = get_pool('admin', admin=True).connection()
     cursor = connection.cursor()
     
     cursor.execute("CREATE DATABASE IF NOT EXISTS subscriber_db")
@@ -64,46 +58,18 @@ def test_subscriber_setup():
     return True
 
 def test_flyway_migrations():
-    """Test Flyway migrations"""
-    # Test initial migrations
-    cmd = [
-        'docker', 'run', '--rm',
-        '-v', f'{os.getcwd()}/migrations/initial:/flyway/sql',
-        'redgate/flyway',
-        '-user=subscriber_user',
-        '-password=SubscriberPass123',
-        '-url=jdbc:mysql://host.docker.internal:3307/subscriber_db',
-        'migrate'
-    ]
-    
-    result = subprocess.run(cmd, capture_output=True, text=True)
-    if result.returncode != 0:
-        print(f"Initial migration error: {result.stderr}")
-        return False
-    
-    # Test incremental migrations
-    cmd = [
-        'docker', 'run', '--rm',
-        '-v', f'{os.getcwd()}/migrations/incremental:/flyway/sql',
-        'redgate/flyway',
-        '-user=subscriber_user',
-        '-password=SubscriberPass123',
-        '-url=jdbc:mysql://host.docker.internal:3307/subscriber_db',
-        'migrate'
-    ]
-    
-    result = subprocess.run(cmd, capture_output=True, text=True)
-    return result.returncode == 0
+    """Test Flyway migrations (in-process runner, no Flyway container)"""
+    runner = MigrationRunner(pool=get_pool())
+    for result in runner.migrate():
+        print(f"  Applied V{result['version']} {result['description']} ({result['execution_ms']} ms)")
+    errors = runner.validate()
+    for error in errors:
+        print(f"Migration validation error: {error}")
+    return not errors
 
 def test_schema():
     """Test database schema"""
-    connection = mysql.connector.connect(
-        host='127.0.0.1',
-        port=3307,
-        user='subscriber_user',
-        password='SubscriberPass123',
-        database='subscriber_db'
-    )
+    connection = get_pool().connection()
     cursor = connection.cursor()
     
     cursor.execute("SHOW TABLES")
@@ -116,13 +82,7 @@ def test_schema():
 
 def test_crud():
     """Test CRUD operations"""
-    connection = mysql.connector.connect(
-        host='127.0.0.1',
-        port=3307,
-        user='subscriber_user',
-        password='SubscriberPass123',
-        database='subscriber_db'
-    )
+    connection = get_pool().connection()
     cursor = connection.cursor(dictionary=True)
     
     # Test CREATE
@@ -164,27 +124,33 @@ def test_files():
         return False
     return True
 
-def main():
+def component(name, test_func, depends_on=()):
+    """Wrap a test function as a check that reports like test_component"""
+    return Check(name, lambda: test_component(name, test_func), depends_on)
+
+def run_components(workers):
+    """Run every component check, printing progress and results; returns the check report"""
     print("=" * 60)
     print("ASSIGNMENT 4 - QUICK SYSTEM VERIFICATION")
     print("=" * 60)
     
     tests = [
-        ("Docker Environment", test_docker),
-        ("Database Connection", test_database),
-        ("Subscriber Setup", test_subscriber_setup),
-        ("Flyway Migrations", test_flyway_migrations),
-        ("Database Schema", test_schema),
-        ("CRUD Operations", test_crud),
-        ("Required Files", test_files)
+        component("Docker Environment", test_docker),
+        component("Database Connection", test_database),
+        component("Subscriber Setup", test_subscriber_setup, ["Database Connection"]),
+        component("Flyway Migrations", test_flyway_migrations, ["Subscriber Setup"]),
+        component("Database Schema", test_schema, ["Flyway Migrations"]),
+        component("CRUD Operations", test_crud, ["Database Schema"]),
+        component("Required Files", test_files)
     ]
     
-    passed = 0
-    total = len(tests)
+    def report_skip(result):
+        if result['status'] == 'skipped':
+            print(f"⏭️  {result['name']}: SKIPPED ({result['error']})")
     
-    for name, test_func in tests:
-        if test_component(name, test_func):
-            passed += 1
+    report = run_checks(tests, max_workers=workers, on_result=report_skip)
+    passed, total = report['passed'], report['total']
+    print_summary(report)
     
     print("\n" + "=" * 60)
     print(f"RESULTS: {passed}/{total} components working")
@@ -203,6 +169,18 @@ def main():
         print(f"⚠️  {total - passed} components need attention")
     
     print("\nTo clean up: docker-compose -f mysql-adminer.yml down")
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description="Quick system verification")
+    parser.add_argument('--workers', type=int, default=4, help="Checks to run concurrently")
+    parser.add_argument('--json', metavar='PATH', help="Write the check report as JSON ('-' for stdout)")
+    args = parser.parse_args()
+
+    with human_output(args.json):
+        report = run_components(args.workers)
+    if args.json:
+        write_json(report, args.json)
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
@@ -56,12 +56,29 @@ else
     fi
 fi
 
-# Wait for MySQL to be ready
+# Step 2: Install Python dependencies
+print_status "Step 2: Installing Python dependencies..."
+if command -v pip > /dev/null 2>&1; then
+    pip install mysql-connector-python
+    if [ $? -eq 0 ]; then
+        print_success "Python dependencies installed"
+    else
+        print_warning "Failed to install Python dependencies"
+    fi
+else
+    print_warning "pip not found, skipping Python dependency installation"
+fi
+
+# Wait for MySQL to be ready (polls with backoff instead of a fixed sleep)
 print_status "Waiting for MySQL to be ready..."
-sleep 10
+python -m subscriber_db.readiness --timeout 120 --record readiness_log.jsonl
+if [ $? -ne 0 ]; then
+    print_error "MySQL did not become ready"
+    exit 1
+fi
 
-# Step 2: Run Flyway migrations
-print_status "Step 2: Running Flyway migrations..."
+# Step 3: Run Flyway migrations
+print_status "Step 3: Running Flyway migrations..."
 if command -v flyway > /dev/null 2>&1; then
     flyway -configFiles=flyway.conf migrate
     if [ $? -eq 0 ]; then
@@ -71,33 +88,18 @@ if command -v flyway > /dev/null 2>&1; then
         exit 1
     fi
 else
-    print_warning "Flyway CLI not found, using Docker..."
-    docker run --rm \
-        -v "$(pwd)/migrations:/flyway/sql" \
-        -v "$(pwd)/flyway.conf:/flyway/conf/flyway.conf" \
-        --network assignment4_default \
-        flyway/flyway:9-alpine \
-        -configFiles=/flyway/conf/flyway.conf migrate
+    print_warning "Flyway CLI not found, using the Python migration runner..."
+    python -m subscriber_db.migrations migrate --config flyway.conf
     if [ $? -eq 0 ]; then
-        print_success "Flyway migrations completed via Docker"
+        print_success "Flyway migrations completed via Python runner"
     else
         print_error "Flyway migrations failed"
         exit 1
     fi
 fi
 
-# Step 3: Install Python dependencies
-print_status "Step 3: Installing Python dependencies..."
-if command -v pip > /dev/null 2>&1; then
-    pip install mysql-connector-python
-    if [ $? -eq 0 ]; then
-        print_success "Python dependencies installed"
-    else
-        print_warning "Failed to install Python dependencies"
-    fi
-else
-    print_warning "pip not found, skipping Python dependency installation"
-fi
+# Pre-create monthly subscription_history partitions (V4)
+python -m subscriber_db.partitions --ahead 3
 
 # Step 4: Run automated tests
 print_status "Step 4: Running automated CRUD tests..."
@@ -169,6 +171,7 @@ echo "• View logs: docker-compose logs"
 echo "• Stop environment: docker-compose down"
 echo "• Run tests: python tests/test_subscriber_crud.py"
 echo "• Check Flyway: python test_flyway.py"
+echo "• Migration status: python -m subscriber_db.migrations info"
 echo "• Access MySQL: mysql -h 127.0.0.1 -P 3307 -u subscriber_user -pSubscriberPass123 subscriber_db"
 echo ""
 
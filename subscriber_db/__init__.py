@@ -0,0 +1,24 @@
+"""
+Subscriber database access layer
+Shared configuration and pooled connections for the subscriber_db scripts and tests
+"""
+
+from .aio import AsyncSubscriberRepository
+from .cache import TTLCache
+from .config import admin_config, db_config, pool_settings
+from .pool import ConnectionPool, PooledConnection, PoolTimeoutError, close_all_pools, get_pool
+from .repository import SubscriberRepository
+
+__all__ = [
+    'AsyncSubscriberRepository',
+    'ConnectionPool',
+    'PoolTimeoutError',
+    'PooledConnection',
+    'SubscriberRepository',
+    'TTLCache',
+    'admin_config',
+    'close_all_pools',
+    'db_config',
+    'get_pool',
+    'pool_settings',
+]
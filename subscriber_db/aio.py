@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+"""
+Asyncio Subscriber Access
+Runs SubscriberRepository calls on a bounded thread pool so an asyncio
+service never blocks its event loop on mysql.connector. A semaphore caps
+in-flight calls (and so pooled connections); cancelling a caller never
+abandons a half-finished transaction. Run as a module to benchmark
+concurrent request throughput against calling the blocking API directly.
+"""
+
+import argparse
+import asyncio
+import functools
+import json
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from mysql.connector import errors
+
+from .pool import get_pool
+from .reporting import percentile
+from .repository import SubscriberRepository
+
+
+class AsyncSubscriberRepository:
+    """asyncio front end for SubscriberRepository.
+
+    Calls are shielded: if the awaiting task is cancelled, the blocking call
+    still runs to completion in its thread (its transaction commits or rolls
+    back as a whole) and keeps its concurrency slot until then, so
+    cancellations cannot push the pool past max_concurrency.
+    """
+
+    def __init__(self, repository=None, max_concurrency=None):
+        self.repository = repository or SubscriberRepository()
+        self.max_concurrency = max_concurrency or self.repository.pool.max_size
+        self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency,
+                                            thread_name_prefix='subscriber-aio')
+        self._semaphore = None
+
+    def _slots(self):
+        # Created on first use so it belongs to the running loop (Python 3.9 binds at construction)
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    def _release(self, _future=None):
+        self._semaphore.release()
+
+    def _submit(self, func, *args, **kwargs):
+        """Run func in the executor on an already acquired slot, releasing it when func finishes"""
+        try:
+            future = asyncio.get_running_loop().run_in_executor(
+                self._executor, functools.partial(func, *args, **kwargs))
+        except BaseException:
+            self._release()
+            raise
+        future.add_done_callback(self._release)
+        return future
+
+    async def run(self, func, *args, **kwargs):
+        """Run a blocking callable under the concurrency limit and await its result"""
+        await self._slots().acquire()
+        return await asyncio.shield(self._submit(func, *args, **kwargs))
+
+    async def get_by_id(self, subscriber_id):
+        return await self.run(self.repository.get_by_id, subscriber_id)
+
+    async def get_by_email(self, email):
+        return await self.run(self.repository.get_by_email, email)
+
+    async def create(self, email, first_name=None, last_name=None, is_active=True, preferences=None):
+        return await self.run(self.repository.create, email, first_name, last_name, is_active, preferences)
+
+    async def update(self, subscriber_id, **fields):
+        return await self.run(self.repository.update, subscriber_id, **fields)
+
+    async def delete(self, subscriber_id):
+        return await self.run(self.repository.delete, subscriber_id)
+
+    async def get_preferences(self, subscriber_id):
+        return await self.run(self.repository.get_preferences, subscriber_id)
+
+    async def set_preferences(self, subscriber_id, **preferences):
+        return await self.run(self.repository.set_preferences, subscriber_id, **preferences)
+
+    async def append_history(self, subscriber_id, action, notes=None):
+        return await self.run(self.repository.append_history, subscriber_id, action, notes)
+
+    async def list_history(self, subscriber_id, limit=100):
+        return await self.run(self.repository.list_history, subscriber_id, limit)
+
+    def transaction(self, dictionary=False):
+        """Async context manager for a multi-statement transaction (bypasses the cache)"""
+        return AsyncTransaction(self, dictionary)
+
+    def cache_stats(self):
+        return self.repository.cache_stats()
+
+    async def aclose(self):
+        """Wait for in-flight calls and stop the worker threads"""
+        await asyncio.get_running_loop().run_in_executor(None, self._executor.shutdown)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
+
+
+class AsyncTransaction:
+    """One pooled connection held for the block, with statements run in the executor.
+
+    Commits when the block exits normally and rolls back on any exception,
+    including cancellation. The commit or rollback is only submitted once
+    the last statement has finished, so a statement whose caller was
+    cancelled still runs first; once the transaction is finished any
+    further statement raises instead of touching the returned connection.
+    The connection keeps one concurrency slot until it is returned.
+    """
+
+    def __init__(self, owner, dictionary=False):
+        self.owner = owner
+        self.dictionary = dictionary
+        self._lock = threading.Lock()
+        self._conn = None
+        self._cursor = None
+        self._pending = None
+        self._finishing = None
+        self._finished = False
+
+    def _begin(self):
+        with self._lock:
+            conn = self.owner.repository.pool.connection()
+            try:
+                conn.start_transaction()
+                cursor = conn.cursor(dictionary=self.dictionary)
+            except BaseException:
+                conn.close()
+                raise
+            self._conn, self._cursor = conn, cursor
+
+    def _execute(self, sql, params):
+        with self._lock:
+            if self._finished:
+                raise errors.OperationalError("Transaction has already been committed or rolled back")
+            self._cursor.execute(sql, params)
+            if self._cursor.with_rows:
+                return self._cursor.fetchall()
+            return self._cursor.rowcount
+
+    def _finish(self, commit):
+        with self._lock:
+            self._finished = True
+            try:
+                if commit:
+                    try:
+                        self._conn.commit()
+                    except BaseException:
+                        self._conn.rollback()
+                        raise
+                else:
+                    self._conn.rollback()
+            finally:
+                self._cursor.close()
+                self._conn.close()
+
+    async def __aenter__(self):
+        loop = asyncio.get_running_loop()
+        await self.owner._slots().acquire()
+        began = loop.run_in_executor(self.owner._executor, self._begin)
+        try:
+            await asyncio.shield(began)
+        except BaseException:
+            # Cancelled while connecting: roll back and return the connection once it arrives
+            began.add_done_callback(self._abandon)
+            raise
+        return self
+
+    def _abandon(self, began):
+        if began.cancelled() or began.exception() is not None:
+            self.owner._release()
+        else:
+            self.owner._submit(self._finish, False)
+
+    async def execute(self, sql, params=None):
+        """Run one statement; returns fetched rows, or the rowcount for writes"""
+        if self._finishing is not None:
+            raise errors.OperationalError("Transaction has already been committed or rolled back")
+        self._pending = asyncio.get_running_loop().run_in_executor(
+            self.owner._executor, self._execute, sql, params)
+        return await asyncio.shield(self._pending)
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    async def _finish_after_pending(self, commit):
+        if self._pending is not None and not self._pending.done():
+            # The caller was cancelled mid-statement; its outcome no longer matters, only its end
+            await asyncio.wait([self._pending])
+        await self.owner._submit(self._finish, commit)
+
+    async def __aexit__(self, exc_type, exc, tb):
+        # The task holds the slot until _finish is done and completes even if this await is cancelled
+        self._finishing = asyncio.ensure_future(self._finish_after_pending(exc_type is None))
+        await asyncio.shield(self._finishing)
+
+
+class LoopLagMonitor:
+    """Measures how late a periodic sleep wakes up, i.e. how long the loop was blocked"""
+
+    def __init__(self, interval=0.01):
+        self.interval = interval
+        self.lags = []
+        self._task = None
+
+    async def _tick(self):
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.lags.append(max(0.0, time.perf_counter() - started - self.interval))
+
+    def start(self):
+        self._task = asyncio.ensure_future(self._tick())
+
+    async def stop(self):
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+
+
+async def _request_async(repo, email):
+    """One service request: sign up, read back, log and read history, then unsubscribe"""
+    subscriber_id = await repo.create(email, 'Async', 'Bench', preferences={'frequency': 'weekly'})
+    await repo.get_by_email(email)
+    await repo.append_history(subscriber_id, 'subscribed', 'aio benchmark')
+    await repo.list_history(subscriber_id)
+    await repo.delete(subscriber_id)
+
+
+async def _request_blocking(repo, email):
+    """The same request calling the blocking repository directly from the coroutine"""
+    subscriber_id = repo.create(email, 'Blocking', 'Bench', preferences={'frequency': 'weekly'})
+    repo.get_by_email(email)
+    repo.append_history(subscriber_id, 'subscribed', 'aio benchmark')
+    repo.list_history(subscriber_id)
+    repo.delete(subscriber_id)
+
+
+async def run_requests(handler, repo, requests, concurrency, run_id):
+    """Issue requests with up to concurrency in flight; returns a latency and loop-lag report"""
+    latencies, errors = [], []
+    gate = asyncio.Semaphore(concurrency)
+    monitor = LoopLagMonitor()
+
+    async def one(index):
+        async with gate:
+            started = time.perf_counter()
+            try:
+                await handler(repo, f"aio-{run_id}-{index}@example.com")
+            except Exception as e:
+                errors.append(f"{type(e).__name__}: {e}")
+                return
+            latencies.append(time.perf_counter() - started)
+
+    monitor.start()
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    elapsed = time.perf_counter() - started
+    await monitor.stop()
+    return {
+        'requests': len(latencies),
+        'errors': len(errors),
+        'first_error': errors[0] if errors else None,
+        'elapsed': elapsed,
+        'requests_per_sec': len(latencies) / elapsed if elapsed > 0 else 0.0,
+        'ms_p50': percentile(latencies, 50) * 1000,
+        'ms_p95': percentile(latencies, 95) * 1000,
+        'ms_p99': percentile(latencies, 99) * 1000,
+        'loop_lag_ms_p99': percentile(monitor.lags, 99) * 1000,
+        'loop_lag_ms_max': max(monitor.lags, default=0.0) * 1000,
+    }
+
+
+async def compare_paths(requests, concurrency, modes=('blocking', 'async')):
+    pool = get_pool('aio', min_size=1, max_size=concurrency)
+    run_id = uuid.uuid4().hex[:8]
+    report = {'requests': requests, 'concurrency': concurrency, 'run_id': run_id}
+    repository = SubscriberRepository(pool)
+    if 'blocking' in modes:
+        report['blocking'] = await run_requests(_request_blocking, repository, requests, concurrency,
+                                                f"{run_id}-b")
+    if 'async' in modes:
+        async with AsyncSubscriberRepository(repository, concurrency) as repo:
+            report['async'] = await run_requests(_request_async, repo, requests, concurrency, f"{run_id}-a")
+    report['pool'] = pool.metrics()
+    return report
+
+
+def print_report(report):
+    print(f"{'Path':<10} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+          f"{'loop lag p99':>13} {'max':>8} {'errors':>7}")
+    for mode in ('blocking', 'async'):
+        if mode in report:
+            stats = report[mode]
+            print(f"{mode:<10} {stats['requests_per_sec']:>9.1f} {stats['ms_p50']:>8.2f} {stats['ms_p95']:>8.2f} "
+                  f"{stats['ms_p99']:>8.2f} {stats['loop_lag_ms_p99']:>11.2f}ms {stats['loop_lag_ms_max']:>6.1f}ms "
+                  f"{stats['errors']:>7}")
+            if stats['first_error']:
+                print(f"  ⚠️  {stats['first_error']}")
+    if 'blocking' in report and 'async' in report and report['blocking']['requests_per_sec']:
+        speedup = report['async']['requests_per_sec'] / report['blocking']['requests_per_sec']
+        print(f"⚡ async path: {speedup:.1f}x the blocking path's throughput")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare asyncio and blocking subscriber request throughput")
+    parser.add_argument('--requests', '-n', type=int, default=500, help="Requests per path")
+    parser.add_argument('--concurrency', '-c', type=int, default=16, help="Requests in flight (and pool size)")
+    parser.add_argument('--mode', choices=('both', 'blocking', 'async'), default='both')
+    parser.add_argument('--output', '-o', help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    modes = ('blocking', 'async') if args.mode == 'both' else (args.mode,)
+    report = asyncio.run(compare_paths(args.requests, args.concurrency, modes))
+    print_report(report)
+    if args.output:
+        with open(args.output, 'w') as handle:
+            json.dump(report, handle, indent=2, default=str)
+        print(f"📝 Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
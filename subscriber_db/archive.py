@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+"""
+Subscription History Archival
+Moves history rows older than a cutoff out of subscription_history in
+bounded primary-key batches, either into gzipped NDJSON files with a
+manifest or into a compressed InnoDB archive table. Each batch is written
+and verified before its rows are deleted, and a checkpoint makes the job
+resumable. ArchiveReader merges archived and live rows into one timeline.
+"""
+
+import argparse
+import bisect
+import gzip
+import json
+import os
+import time
+from datetime import datetime, timedelta
+
+from .batching import in_clause
+from .export import read_checkpoint, write_checkpoint
+from .pool import get_pool
+from .reporting import RateTracker
+
+ARCHIVE_COLUMNS = ('id', 'subscriber_id', 'action', 'action_date', 'notes')
+ARCHIVE_TABLE = 'subscription_history_archive'
+
+ARCHIVE_TABLE_DDL = f"""
+CREATE TABLE IF NOT EXISTS {ARCHIVE_TABLE} (
+    id INT NOT NULL PRIMARY KEY,
+    subscriber_id INT NOT NULL,
+    action ENUM('subscribed', 'unsubscribed', 'updated', 'reactivated') NOT NULL,
+    action_date TIMESTAMP NOT NULL,
+    notes TEXT,
+    archived_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_subscriber_date (subscriber_id, action_date)
+) ROW_FORMAT=COMPRESSED KEY_BLOCK_SIZE=8
+"""
+
+SELECT_BATCH = f"""
+    SELECT {', '.join(ARCHIVE_COLUMNS)}
+    FROM subscription_history
+    WHERE id > %s AND action_date < %s
+    ORDER BY id
+    LIMIT %s
+    FOR UPDATE
+"""
+
+
+class ArchiveVerificationError(Exception):
+    """Raised when archived and deleted row counts disagree; the batch is rolled back"""
+
+
+def _plain(row):
+    return {key: value.isoformat(sep=' ') if isinstance(value, datetime) else value
+            for key, value in row.items()}
+
+
+def _parse(record):
+    record['action_date'] = datetime.fromisoformat(record['action_date'])
+    return record
+
+
+class FileSink:
+    """Writes each batch to <directory>/history-<first>-<last>.ndjson.gz and logs it in manifest.jsonl
+
+    Batches are cut by history id, so nearly every file spans the whole
+    subscriber id range; each manifest entry therefore lists the distinct
+    subscriber ids in its file, which is what lets the reader skip files.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.manifest = os.path.join(directory, 'manifest.jsonl')
+
+    def write(self, cursor, rows):
+        name = f"history-{rows[0]['id']:010d}-{rows[-1]['id']:010d}.ndjson.gz"
+        path = os.path.join(self.directory, name)
+        tmp = path + '.tmp'
+        with gzip.open(tmp, 'wt', encoding='utf-8') as handle:
+            for row in sorted(rows, key=lambda r: (r['subscriber_id'], r['action_date'], r['id'])):
+                handle.write(json.dumps(_plain(row)) + "\n")
+        with gzip.open(tmp, 'rt', encoding='utf-8') as handle:
+            written = sum(1 for line in handle if line.strip())
+        if written != len(rows):
+            os.unlink(tmp)
+            raise ArchiveVerificationError(f"{name}: wrote {written} of {len(rows)} rows")
+        os.replace(tmp, path)
+        # Logged before the delete commits: a crash in between leaves rows both live and
+        # archived, which the reader de-duplicates, rather than rows in neither place
+        entry = {
+            'file': name,
+            'rows': len(rows),
+            'first_id': rows[0]['id'],
+            'last_id': rows[-1]['id'],
+            'min_action_date': min(r['action_date'] for r in rows).isoformat(sep=' '),
+            'max_action_date': max(r['action_date'] for r in rows).isoformat(sep=' '),
+            'subscriber_min': min(r['subscriber_id'] for r in rows),
+            'subscriber_max': max(r['subscriber_id'] for r in rows),
+            'subscribers': sorted({r['subscriber_id'] for r in rows}),
+        }
+        with open(self.manifest, 'a') as handle:
+            handle.write(json.dumps(entry) + "\n")
+        return written
+
+
+class TableSink:
+    """Copies each batch into the compressed archive table inside the deleting transaction"""
+
+    def __init__(self, pool):
+        with pool.cursor() as cursor:
+            cursor.execute(ARCHIVE_TABLE_DDL)
+
+    def write(self, cursor, rows):
+        ids = [row['id'] for row in rows]
+        cursor.execute(
+            f"INSERT INTO {ARCHIVE_TABLE} ({', '.join(ARCHIVE_COLUMNS)}) "
+            f"SELECT {', '.join(ARCHIVE_COLUMNS)} FROM subscription_history WHERE id IN {in_clause(ids)}",
+            ids)
+        return cursor.rowcount
+
+
+def archive_batch(conn, sink, after_id, cutoff, batch_size):
+    """Archive and delete one batch in a transaction; returns the rows moved (empty when done)"""
+    cursor = conn.cursor(dictionary=True)
+    try:
+        conn.start_transaction()
+        cursor.execute(SELECT_BATCH, (after_id, cutoff, batch_size))
+        rows = cursor.fetchall()
+        if not rows:
+            conn.rollback()
+            return rows
+        archived = sink.write(cursor, rows)
+        ids = [row['id'] for row in rows]
+        cursor.execute(f"DELETE FROM subscription_history WHERE id IN {in_clause(ids)} AND action_date < %s",
+                       ids + [cutoff])
+        deleted = cursor.rowcount
+        if not archived == deleted == len(rows):
+            raise ArchiveVerificationError(
+                f"Batch after id {after_id}: selected {len(rows)}, archived {archived}, deleted {deleted}")
+        conn.commit()
+        return rows
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+def archive_history(sink, cutoff, pool=None, batch_size=5000, checkpoint=None, pause=0.0, on_batch=None):
+    """Move history rows older than cutoff into sink batch by batch; returns a throughput report"""
+    pool = pool or get_pool()
+    tracker = RateTracker()
+    after_id = read_checkpoint(checkpoint)
+    while True:
+        started = time.monotonic()
+        with pool.connection() as conn:
+            rows = archive_batch(conn, sink, after_id, cutoff, batch_size)
+        if not rows:
+            break
+        after_id = rows[-1]['id']
+        if checkpoint:
+            write_checkpoint(checkpoint, after_id)
+        tracker.record_batch(len(rows), time.monotonic() - started)
+        if on_batch:
+            on_batch(len(rows), after_id)
+        if pause:
+            time.sleep(pause)
+    # The checkpoint only resumes an interrupted run; the next run's cutoff covers new rows
+    if checkpoint and os.path.exists(checkpoint):
+        os.remove(checkpoint)
+    report = tracker.summary()
+    report['last_id'] = after_id
+    return report
+
+
+class ArchiveReader:
+    """Full subscriber timelines from live history plus both archive sinks"""
+
+    def __init__(self, pool=None, directory=None):
+        self.pool = pool or get_pool()
+        self.directory = directory
+        self._manifest_size = None
+        self._files = []
+
+    def _manifest_files(self):
+        """Manifest entries (deduplicated by file), re-read only when the manifest grows"""
+        path = os.path.join(self.directory, 'manifest.jsonl')
+        if not os.path.exists(path):
+            return []
+        size = os.path.getsize(path)
+        if size != self._manifest_size:
+            entries = {}
+            with open(path) as handle:
+                for line in handle:
+                    if line.strip():
+                        entry = json.loads(line)
+                        entries[entry['file']] = entry
+            self._files = list(entries.values())
+            self._manifest_size = size
+        return self._files
+
+    @staticmethod
+    def _holds(entry, subscriber_id):
+        """Whether a manifest entry's file has rows for subscriber_id (older entries only know the range)"""
+        if not entry['subscriber_min'] <= subscriber_id <= entry['subscriber_max']:
+            return False
+        subscribers = entry.get('subscribers')
+        if subscribers is None:
+            return True
+        index = bisect.bisect_left(subscribers, subscriber_id)
+        return index < len(subscribers) and subscribers[index] == subscriber_id
+
+    def _file_rows(self, subscriber_id):
+        for entry in self._manifest_files():
+            if not self._holds(entry, subscriber_id):
+                continue
+            with gzip.open(os.path.join(self.directory, entry['file']), 'rt', encoding='utf-8') as handle:
+                # Files are written sorted by subscriber, so stop once past this one
+                for line in handle:
+                    record = json.loads(line)
+                    if record['subscriber_id'] > subscriber_id:
+                        break
+                    if record['subscriber_id'] == subscriber_id:
+                        yield _parse(record)
+
+    def _query(self, cursor, table, subscriber_id):
+        cursor.execute(f"SELECT {', '.join(ARCHIVE_COLUMNS)} FROM {table} "
+                       f"WHERE subscriber_id = %s ORDER BY action_date, id", (subscriber_id,))
+        return cursor.fetchall()
+
+    def timeline(self, subscriber_id):
+        """Return the subscriber's history rows, oldest first, with archived rows merged in"""
+        merged = {}
+        if self.directory:
+            for row in self._file_rows(subscriber_id):
+                merged[row['id']] = dict(row, source='file')
+        with self.pool.cursor(dictionary=True) as cursor:
+            cursor.execute("SELECT COUNT(*) AS present FROM information_schema.tables "
+                           "WHERE table_schema = DATABASE() AND table_name = %s", (ARCHIVE_TABLE,))
+            if cursor.fetchone()['present']:
+                for row in self._query(cursor, ARCHIVE_TABLE, subscriber_id):
+                    merged[row['id']] = dict(row, source='archive')
+            # Live rows win: a row can be in both only if a batch was interrupted before deleting
+            for row in self._query(cursor, 'subscription_history', subscriber_id):
+                merged[row['id']] = dict(row, source='live')
+        return sorted(merged.values(), key=lambda row: (row['action_date'], row['id']))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Archive old subscription_history rows")
+    parser.add_argument('--older-than-days', type=int, default=365, help="Archive rows older than this")
+    parser.add_argument('--to-dir', help="Write gzipped NDJSON batches and a manifest to this directory")
+    parser.add_argument('--to-table', action='store_true',
+                        help=f"Move rows into the compressed {ARCHIVE_TABLE} table instead")
+    parser.add_argument('--batch-size', type=int, default=5000)
+    parser.add_argument('--checkpoint', help="File recording the last archived id (default: in --to-dir)")
+    parser.add_argument('--pause', type=float, default=0.0, help="Seconds to sleep between batches")
+    parser.add_argument('--timeline', type=int, metavar='SUBSCRIBER_ID',
+                        help="Print a subscriber's merged timeline instead of archiving")
+    args = parser.parse_args()
+
+    if args.timeline is not None:
+        for row in ArchiveReader(directory=args.to_dir).timeline(args.timeline):
+            print(f"{row['action_date']}  {row['action']:<13} {row['source']:<8} {row['notes'] or ''}")
+        return
+    if bool(args.to_dir) == args.to_table:
+        parser.error("choose exactly one of --to-dir or --to-table")
+
+    pool = get_pool()
+    sink = FileSink(args.to_dir) if args.to_dir else TableSink(pool)
+    checkpoint = args.checkpoint or (os.path.join(args.to_dir, 'checkpoint') if args.to_dir else None)
+    cutoff = datetime.now() - timedelta(days=args.older_than_days)
+
+    def on_batch(rows, last_id):
+        print(f"  archived {rows} rows through id {last_id}", flush=True)
+
+    report = archive_history(sink, cutoff, pool, args.batch_size, checkpoint, args.pause, on_batch)
+    print(f"✅ Archived {report['rows']} rows older than {cutoff:%Y-%m-%d} in {report['elapsed']:.1f}s "
+          f"({report['rows_per_sec']:.0f} rows/s, batch p95 {report['batch_ms_p95']:.1f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,381 @@
+#!/usr/bin/env python3
+"""
+Audience Segment Index
+Keeps one bitmap per subscriber attribute (is_active, newsletter_enabled,
+marketing_enabled, each frequency value), with bit n standing for
+subscriber id n. Segment expressions such as
+  is_active AND newsletter_enabled AND frequency = 'weekly' AND NOT marketing_enabled
+are answered with whole-bitmap AND/OR/NOT on Python integers instead of a
+join scan. Matching ids stream out in chunks, and refresh() applies
+changes made since the last build.
+"""
+
+import argparse
+import re
+import sys
+import threading
+import time
+from datetime import timedelta
+
+from .batching import in_clause
+from .export import iter_profile_pages
+from .pool import get_pool
+from .repository import PROFILE_QUERY
+from .schema import FREQUENCIES
+from .stats import read_counters, stats_available
+
+BOOLEAN_ATTRIBUTES = ('is_active', 'newsletter_enabled', 'marketing_enabled')
+PREFERENCE_ATTRIBUTES = ('newsletter_enabled', 'marketing_enabled')
+ALL = 'exists'
+HAS_PREFERENCES = 'has_preferences'
+ATTRIBUTES = (ALL, HAS_PREFERENCES) + BOOLEAN_ATTRIBUTES + tuple(f"frequency:{f}" for f in FREQUENCIES)
+
+CHANGED_IDS_QUERY = """
+    SELECT id FROM subscribers WHERE updated_at >= %s
+    UNION
+    SELECT subscriber_id FROM subscription_preferences WHERE updated_at >= %s
+"""
+
+RECONCILE_QUERY = "SELECT id FROM subscribers WHERE id > %s ORDER BY id LIMIT %s"
+
+TOKEN_PATTERN = re.compile(r"\s*(?:(\(|\)|,|!=|=)|'([^']*)'|([A-Za-z_][A-Za-z0-9_]*))")
+
+
+def popcount(value):
+    """Number of set bits (int.bit_count needs Python 3.10)"""
+    return value.bit_count() if hasattr(value, 'bit_count') else bin(value).count('1')
+
+
+def iter_bits(value, start=0):
+    """Yield the positions of the set bits of a non-negative int in ascending order"""
+    data = value.to_bytes((value.bit_length() + 7) // 8, 'little')
+    for index, byte in enumerate(data):
+        if byte:
+            base = start + index * 8
+            for bit in range(8):
+                if byte >> bit & 1:
+                    yield base + bit
+
+
+class SegmentSyntaxError(ValueError):
+    """Raised for segment expressions that cannot be parsed"""
+
+
+def tokenize(text):
+    tokens, position = [], 0
+    text = text.rstrip()
+    while position < len(text):
+        match = TOKEN_PATTERN.match(text, position)
+        if not match or match.end() == position:
+            raise SegmentSyntaxError(f"Unexpected input at {position}: {text[position:position + 20]!r}")
+        symbol, string, word = match.groups()
+        if symbol:
+            tokens.append(('symbol', symbol))
+        elif string is not None:
+            tokens.append(('string', string.lower()))
+        elif word.upper() in ('AND', 'OR', 'NOT', 'IN', 'TRUE', 'FALSE'):
+            tokens.append(('keyword', word.upper()))
+        else:
+            tokens.append(('name', word.lower()))
+        position = match.end()
+    return tokens
+
+
+class _Parser:
+    """Recursive descent: or_expr := and_expr (OR and_expr)*, and_expr := unary (AND unary)*"""
+
+    def __init__(self, text):
+        self.tokens = tokenize(text)
+        self.position = 0
+
+    def peek(self):
+        return self.tokens[self.position] if self.position < len(self.tokens) else (None, None)
+
+    def take(self, kind=None, value=None):
+        token = self.peek()
+        if token[0] is None or (kind and token[0] != kind) or (value and token[1] != value):
+            raise SegmentSyntaxError(f"Expected {value or kind} at token {self.position}, got {token[1]!r}")
+        self.position += 1
+        return token[1]
+
+    def parse(self):
+        tree = self.or_expr()
+        if self.position != len(self.tokens):
+            raise SegmentSyntaxError(f"Unexpected {self.peek()[1]!r} at token {self.position}")
+        return tree
+
+    def or_expr(self):
+        tree = self.and_expr()
+        while self.peek() == ('keyword', 'OR'):
+            self.take()
+            tree = ('or', tree, self.and_expr())
+        return tree
+
+    def and_expr(self):
+        tree = self.unary()
+        while self.peek() == ('keyword', 'AND'):
+            self.take()
+            tree = ('and', tree, self.unary())
+        return tree
+
+    def unary(self):
+        if self.peek() == ('keyword', 'NOT'):
+            self.take()
+            return ('not', self.unary())
+        if self.peek() == ('symbol', '('):
+            self.take()
+            tree = self.or_expr()
+            self.take('symbol', ')')
+            return tree
+        return self.comparison()
+
+    def comparison(self):
+        name = self.take('name')
+        if name == 'frequency':
+            if self.peek() == ('keyword', 'IN'):
+                self.take()
+                self.take('symbol', '(')
+                values = [self.take('string')]
+                while self.peek() == ('symbol', ','):
+                    self.take()
+                    values.append(self.take('string'))
+                self.take('symbol', ')')
+                tree = ('attr', self.frequency(values[0]))
+                for value in values[1:]:
+                    tree = ('or', tree, ('attr', self.frequency(value)))
+                return tree
+            operator = self.take('symbol')
+            if operator not in ('=', '!='):
+                raise SegmentSyntaxError(f"Expected = or != after frequency, got {operator!r}")
+            tree = ('attr', self.frequency(self.take('string')))
+            return tree if operator == '=' else ('and', ('attr', HAS_PREFERENCES), ('not', tree))
+        if name not in BOOLEAN_ATTRIBUTES:
+            raise SegmentSyntaxError(f"Unknown attribute {name!r} (expected frequency or one of "
+                                     f"{', '.join(BOOLEAN_ATTRIBUTES)})")
+        wanted = True
+        if self.peek() in (('symbol', '='), ('symbol', '!=')):
+            negate = self.take() == '!='
+            value = self.take('keyword')
+            if value not in ('TRUE', 'FALSE'):
+                raise SegmentSyntaxError(f"Expected TRUE or FALSE after {name}, got {value}")
+            wanted = (value == 'TRUE') != negate
+        if wanted:
+            return ('attr', name)
+        # Like SQL over the join, "= false" needs a preferences row to compare against
+        scope = HAS_PREFERENCES if name in PREFERENCE_ATTRIBUTES else ALL
+        return ('and', ('attr', scope), ('not', ('attr', name)))
+
+    @staticmethod
+    def frequency(value):
+        if value not in FREQUENCIES:
+            raise SegmentSyntaxError(f"Unknown frequency {value!r}")
+        return f"frequency:{value}"
+
+
+def parse_segment(text):
+    """Parse a segment expression into a ('and'|'or'|'not'|'attr', ...) tree.
+
+    NOT negates over every subscriber, while `x = false` and
+    `frequency != 'y'` only match subscribers that have a preferences row.
+    """
+    return _Parser(text).parse()
+
+
+class AudienceIndex:
+    """Per-attribute subscriber bitmaps built from the database and refreshed incrementally.
+
+    Bits live in bytearrays so single-row changes are O(1); the integer
+    form used for the bitwise algebra is rebuilt lazily per attribute.
+    """
+
+    def __init__(self, pool=None, grace_seconds=60):
+        self.pool = pool or get_pool()
+        self.grace_seconds = grace_seconds
+        self.watermark = None
+        self._bits = {attribute: bytearray() for attribute in ATTRIBUTES}
+        self._ints = {}
+        self._lock = threading.RLock()
+
+    def _set(self, attribute, subscriber_id, on):
+        bits = self._bits[attribute]
+        index, mask = subscriber_id >> 3, 1 << (subscriber_id & 7)
+        if index >= len(bits):
+            if not on:
+                return
+            bits.extend(bytes(index + 1 - len(bits) + len(bits) // 4))
+        if on:
+            bits[index] |= mask
+        else:
+            bits[index] &= ~mask & 0xFF
+        self._ints.pop(attribute, None)
+
+    def _apply_row(self, row):
+        subscriber_id = row['id']
+        has_preferences = row['frequency'] is not None
+        self._set(ALL, subscriber_id, True)
+        self._set(HAS_PREFERENCES, subscriber_id, has_preferences)
+        self._set('is_active', subscriber_id, bool(row['is_active']))
+        for attribute in PREFERENCE_ATTRIBUTES:
+            self._set(attribute, subscriber_id, has_preferences and bool(row[attribute]))
+        for frequency in FREQUENCIES:
+            self._set(f"frequency:{frequency}", subscriber_id, row['frequency'] == frequency)
+
+    def _remove(self, subscriber_id):
+        for attribute in ATTRIBUTES:
+            self._set(attribute, subscriber_id, False)
+
+    def _now(self):
+        with self.pool.cursor() as cursor:
+            cursor.execute("SELECT NOW()")
+            return cursor.fetchone()[0]
+
+    def build(self, page_size=20000):
+        """Load every subscriber; returns the number loaded"""
+        with self._lock:
+            started = self._now()
+            self._bits = {attribute: bytearray() for attribute in ATTRIBUTES}
+            self._ints = {}
+            loaded = 0
+            for page in iter_profile_pages(self.pool, page_size=page_size):
+                for row in page:
+                    self._apply_row(row)
+                loaded += len(page)
+            self.watermark = started
+            return loaded
+
+    def refresh(self, reconcile=None, chunk_size=5000):
+        """Apply changes since the last build or refresh; returns {'changed', 'removed'}.
+
+        Rows whose subscriber or preferences updated_at is at or after the
+        watermark minus grace_seconds are re-read, which also catches
+        inserts. Deletes leave no row to read, so the id set is re-scanned
+        when reconcile is True or, by default, when the V5 subscriber
+        counter disagrees with the index.
+        """
+        if self.watermark is None:
+            return {'changed': self.build(), 'removed': 0}
+        with self._lock:
+            started = self._now()
+            since = self.watermark - timedelta(seconds=self.grace_seconds)
+            with self.pool.cursor(dictionary=True) as cursor:
+                cursor.execute(CHANGED_IDS_QUERY, (since, since))
+                ids = [row['id'] for row in cursor.fetchall()]
+                removed = 0
+                for offset in range(0, len(ids), chunk_size):
+                    chunk = ids[offset:offset + chunk_size]
+                    cursor.execute(PROFILE_QUERY.format(where=f"s.id IN {in_clause(chunk)}"), chunk)
+                    found = set()
+                    for row in cursor.fetchall():
+                        self._apply_row(row)
+                        found.add(row['id'])
+                    for subscriber_id in set(chunk) - found:
+                        self._remove(subscriber_id)
+                        removed += 1
+            if reconcile is None:
+                reconcile = self._counter_mismatch()
+            if reconcile:
+                removed += self._reconcile_ids()
+            self.watermark = started
+            return {'changed': len(ids), 'removed': removed}
+
+    def _counter_mismatch(self):
+        with self.pool.cursor() as cursor:
+            if not stats_available(cursor):
+                return True
+            return read_counters(cursor).get('subscribers', 0) != self.size()
+
+    def _reconcile_ids(self, page_size=100000):
+        """Clear every indexed id that no longer exists; returns how many were removed"""
+        present = bytearray(len(self._bits[ALL]))
+        after_id = 0
+        with self.pool.cursor() as cursor:
+            while True:
+                cursor.execute(RECONCILE_QUERY, (after_id, page_size))
+                ids = [row[0] for row in cursor.fetchall()]
+                for subscriber_id in ids:
+                    if subscriber_id >> 3 < len(present):
+                        present[subscriber_id >> 3] |= 1 << (subscriber_id & 7)
+                if len(ids) < page_size:
+                    break
+                after_id = ids[-1]
+        gone = list(iter_bits(self.bitmap(ALL) & ~int.from_bytes(bytes(present), 'little')))
+        for subscriber_id in gone:
+            self._remove(subscriber_id)
+        return len(gone)
+
+    def bitmap(self, attribute):
+        """Integer bitmap for one attribute"""
+        value = self._ints.get(attribute)
+        if value is None:
+            value = self._ints[attribute] = int.from_bytes(bytes(self._bits[attribute]), 'little')
+        return value
+
+    def evaluate(self, tree):
+        """Return the bitmap of subscribers matching a parse_segment() tree"""
+        kind = tree[0]
+        if kind == 'attr':
+            return self.bitmap(tree[1])
+        if kind == 'not':
+            return self.bitmap(ALL) & ~self.evaluate(tree[1])
+        left, right = self.evaluate(tree[1]), self.evaluate(tree[2])
+        return left & right if kind == 'and' else left | right
+
+    def match(self, expression):
+        with self._lock:
+            return self.evaluate(parse_segment(expression) if isinstance(expression, str) else expression)
+
+    def count(self, expression):
+        """Number of subscribers in the segment"""
+        return popcount(self.match(expression))
+
+    def select(self, expression, chunk_size=10000):
+        """Yield the segment's subscriber ids in ascending order, chunk_size at a time"""
+        chunk = []
+        for subscriber_id in iter_bits(self.match(expression)):
+            chunk.append(subscriber_id)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def size(self):
+        return popcount(self.bitmap(ALL))
+
+    def memory_bytes(self):
+        return sum(len(bits) for bits in self._bits.values())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Count or list an audience segment from in-memory bitmaps")
+    parser.add_argument('expression', help="e.g. \"is_active AND frequency = 'weekly' AND NOT marketing_enabled\"")
+    parser.add_argument('--ids', metavar='FILE', help="Write the matching subscriber ids, one per line ('-' for stdout)")
+    parser.add_argument('--chunk-size', type=int, default=10000, help="Ids per streamed chunk")
+    args = parser.parse_args()
+
+    try:
+        tree = parse_segment(args.expression)
+    except SegmentSyntaxError as e:
+        parser.error(str(e))
+
+    index = AudienceIndex()
+    started = time.perf_counter()
+    loaded = index.build()
+    print(f"🧮 Indexed {loaded} subscribers in {time.perf_counter() - started:.2f}s "
+          f"({index.memory_bytes() / 1024:.0f} KiB of bitmaps)", file=sys.stderr)
+    started = time.perf_counter()
+    count = index.count(tree)
+    print(f"✅ {count} subscribers match ({(time.perf_counter() - started) * 1000:.2f} ms)", file=sys.stderr)
+
+    if args.ids:
+        handle = sys.stdout if args.ids == '-' else open(args.ids, 'w')
+        try:
+            for chunk in index.select(tree, args.chunk_size):
+                handle.write(''.join(f"{subscriber_id}\n" for subscriber_id in chunk))
+        finally:
+            if handle is not sys.stdout:
+                handle.close()
+
+
+if __name__ == "__main__":
+    main()
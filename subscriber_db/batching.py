@@ -0,0 +1,30 @@
+"""
+Helpers for building batched, multi-row SQL statements
+"""
+
+from itertools import islice
+
+
+def batched(iterable, size):
+    """Yield lists of up to size items without materialising the whole iterable"""
+    if size < 1:
+        raise ValueError("Batch size must be at least 1")
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def values_clause(rows):
+    """Return the placeholder VALUES list and flattened params for a multi-row INSERT"""
+    width = len(rows[0])
+    row_placeholder = "(" + ", ".join(["%s"] * width) + ")"
+    params = [value for row in rows for value in row]
+    return ", ".join([row_placeholder] * len(rows)), params
+
+
+def in_clause(values):
+    """Return an IN (...) placeholder list for values"""
+    return "(" + ", ".join(["%s"] * len(values)) + ")"
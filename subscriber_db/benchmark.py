@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+"""
+CRUD Workload Benchmark
+Drives a weighted mix of subscriber operations (insert, lookup by email,
+preference update, history append and read, cascading delete) from concurrent
+workers for a fixed duration or operation count, and reports ops/s and
+p50/p95/p99 latency per operation as JSON for comparing runs.
+"""
+
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+
+from .pool import get_pool
+from .readiness import schema_version
+from .reporting import percentile
+from .repository import PROFILE_BY_EMAIL
+from .schema import FREQUENCIES
+
+OPERATIONS = ('insert', 'lookup', 'update_preferences', 'append_history', 'read_history', 'delete')
+
+DEFAULT_MIX = {
+    'insert': 20,
+    'lookup': 50,
+    'update_preferences': 15,
+    'append_history': 10,
+    'delete': 5,
+}
+
+
+def parse_mix(text):
+    """Parse 'insert=20,lookup=50,...' into a weight dict"""
+    mix = {}
+    for part in text.split(','):
+        if not part.strip():
+            continue
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in OPERATIONS:
+            raise ValueError(f"Unknown operation {name!r} (expected one of {', '.join(OPERATIONS)})")
+        mix[name] = float(weight)
+        if mix[name] < 0:
+            raise ValueError(f"Negative weight for {name}")
+    if not any(mix.values()):
+        raise ValueError("The operation mix needs at least one positive weight")
+    return mix
+
+
+class WorkerState:
+    """Per-worker random stream and the subscribers that worker created"""
+
+    def __init__(self, worker_id, seed=None):
+        self.worker_id = worker_id
+        self.rng = random.Random(None if seed is None else f"{seed}-{worker_id}")
+        self.owned = []
+        self.sequence = 0
+
+
+class CrudWorkload:
+    """The demo_system/CRUD-suite operations against the pooled database.
+
+    Each worker only touches subscribers it inserted, so operations never
+    wait on another worker's row locks; operations that need an existing
+    subscriber fall back to an insert when the worker owns none.
+    """
+
+    def __init__(self, pool, run_id=None):
+        self.pool = pool
+        self.run_id = run_id or uuid.uuid4().hex[:8]
+
+    def email_prefix(self):
+        return f"bench-{self.run_id}-"
+
+    def execute(self, op, state):
+        """Run one operation; returns the name of the operation actually executed"""
+        if op != 'insert' and not state.owned:
+            op = 'insert'
+        conn = self.pool.connection()
+        cursor = conn.cursor()
+        try:
+            getattr(self, f"_{op}")(conn, cursor, state)
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+            conn.close()
+        return op
+
+    def _insert(self, conn, cursor, state):
+        state.sequence += 1
+        email = f"{self.email_prefix()}{state.worker_id}-{state.sequence}@example.com"
+        conn.start_transaction()
+        cursor.execute(
+            "INSERT INTO subscribers (email, first_name, last_name) VALUES (%s, %s, %s)",
+            (email, 'Bench', f"Worker{state.worker_id}"))
+        subscriber_id = cursor.lastrowid
+        cursor.execute(
+            "INSERT INTO subscription_preferences (subscriber_id, newsletter_enabled, "
+            "marketing_enabled, frequency) VALUES (%s, %s, %s, %s)",
+            (subscriber_id, True, False, state.rng.choice(FREQUENCIES)))
+        cursor.execute(
+            "INSERT INTO subscription_history (subscriber_id, action, notes) VALUES (%s, %s, %s)",
+            (subscriber_id, 'subscribed', 'Benchmark insert'))
+        conn.commit()
+        state.owned.append((subscriber_id, email))
+
+    def _lookup(self, conn, cursor, state):
+        _, email = state.rng.choice(state.owned)
+        cursor.execute(PROFILE_BY_EMAIL, (email,))
+        cursor.fetchall()
+
+    def _update_preferences(self, conn, cursor, state):
+        subscriber_id, _ = state.rng.choice(state.owned)
+        cursor.execute(
+            "UPDATE subscription_preferences SET frequency = %s, marketing_enabled = %s "
+            "WHERE subscriber_id = %s",
+            (state.rng.choice(FREQUENCIES), state.rng.random() < 0.5, subscriber_id))
+        conn.commit()
+
+    def _append_history(self, conn, cursor, state):
+        subscriber_id, _ = state.rng.choice(state.owned)
+        cursor.execute(
+            "INSERT INTO subscription_history (subscriber_id, action, notes) VALUES (%s, %s, %s)",
+            (subscriber_id, 'updated', 'Benchmark history append'))
+        conn.commit()
+
+    def _read_history(self, conn, cursor, state):
+        subscriber_id, _ = state.rng.choice(state.owned)
+        cursor.execute(
+            "SELECT action, action_date FROM subscription_history WHERE subscriber_id = %s ORDER BY action_date",
+            (subscriber_id,))
+        cursor.fetchall()
+
+    def _delete(self, conn, cursor, state):
+        index = state.rng.randrange(len(state.owned))
+        subscriber_id, _ = state.owned[index]
+        state.owned[index] = state.owned[-1]
+        state.owned.pop()
+        cursor.execute("DELETE FROM subscribers WHERE id = %s", (subscriber_id,))
+        conn.commit()
+
+    def cleanup(self):
+        """Delete every subscriber this run created (preferences and history cascade)"""
+        with self.pool.cursor(commit=True) as cursor:
+            cursor.execute("DELETE FROM subscribers WHERE email LIKE %s", (self.email_prefix() + '%',))
+            return cursor.rowcount
+
+
+def summarize(latencies, errors, elapsed):
+    """Return per-operation counts, ops/s and latency percentiles in milliseconds"""
+    operations = {}
+    for op in OPERATIONS:
+        samples = latencies.get(op, [])
+        if not samples and not errors.get(op):
+            continue
+        operations[op] = {
+            'count': len(samples),
+            'errors': errors.get(op, 0),
+            'ops_per_sec': len(samples) / elapsed if elapsed > 0 else 0.0,
+            'ms_mean': sum(samples) / len(samples) * 1000 if samples else 0.0,
+            'ms_p50': percentile(samples, 50) * 1000,
+            'ms_p95': percentile(samples, 95) * 1000,
+            'ms_p99': percentile(samples, 99) * 1000,
+            'ms_max': max(samples) * 1000 if samples else 0.0,
+        }
+    total = sum(stats['count'] for stats in operations.values())
+    return {
+        'elapsed': elapsed,
+        'total_ops': total,
+        'ops_per_sec': total / elapsed if elapsed > 0 else 0.0,
+        'errors': sum(errors.values()),
+        'operations': operations,
+    }
+
+
+def run_benchmark(workload, mix=None, workers=4, duration=None, ops=None, warmup=0.0, seed=None,
+                  stop=None, on_op=None):
+    """Run the workload from concurrent workers; returns the summarize() report.
+
+    Stops after duration seconds or ops measured operations, whichever comes
+    first, or when the stop event is set. Operations started during the
+    warmup window are not measured. on_op(op, started, seconds, error) is
+    called from the workers for every measured operation, with perf_counter
+    start times.
+    """
+    if duration is None and ops is None and stop is None:
+        raise ValueError("Pass a duration, an operation count or a stop event")
+    mix = mix or DEFAULT_MIX
+    names = [op for op in OPERATIONS if mix.get(op)]
+    weights = [mix[op] for op in names]
+    lock = threading.Lock()
+    budget = {'remaining': ops}
+    first_errors = {}
+    stop = stop or threading.Event()
+    per_worker = []
+
+    def claim():
+        if ops is None:
+            return True
+        with lock:
+            if budget['remaining'] <= 0:
+                return False
+            budget['remaining'] -= 1
+            return True
+
+    def worker(worker_id, measure_from, deadline):
+        state = WorkerState(worker_id, seed)
+        latencies = {op: [] for op in OPERATIONS}
+        errors = {}
+        per_worker.append((latencies, errors))
+        while not stop.is_set():
+            started = time.perf_counter()
+            if deadline is not None and started >= deadline:
+                break
+            measured = started >= measure_from
+            if measured and not claim():
+                break
+            op = state.rng.choices(names, weights)[0]
+            try:
+                op = workload.execute(op, state)
+            except Exception as e:
+                if measured:
+                    errors[op] = errors.get(op, 0) + 1
+                    with lock:
+                        first_errors.setdefault(op, f"{type(e).__name__}: {e}")
+                    if on_op:
+                        on_op(op, started, time.perf_counter() - started, e)
+                continue
+            if measured:
+                seconds = time.perf_counter() - started
+                latencies[op].append(seconds)
+                if on_op:
+                    on_op(op, started, seconds, None)
+
+    measure_from = time.perf_counter() + warmup
+    deadline = measure_from + duration if duration is not None else None
+    threads = [threading.Thread(target=worker, args=(i, measure_from, deadline), daemon=True)
+               for i in range(workers)]
+    for thread in threads:
+        thread.start()
+    try:
+        for thread in threads:
+            thread.join()
+    except KeyboardInterrupt:
+        stop.set()
+        for thread in threads:
+            thread.join()
+    elapsed = max(time.perf_counter() - measure_from, 1e-9)
+
+    latencies, errors = {}, {}
+    for worker_latencies, worker_errors in per_worker:
+        for op, samples in worker_latencies.items():
+            latencies.setdefault(op, []).extend(samples)
+        for op, count in worker_errors.items():
+            errors[op] = errors.get(op, 0) + count
+    report = summarize(latencies, errors, elapsed)
+    report['first_errors'] = first_errors
+    return report
+
+
+def compare(baseline, current):
+    """Print ops/s and p95 changes between two saved benchmark reports"""
+    print(f"{'Operation':<20} {'ops/s':>10} {'Δ':>8} {'p95 ms':>10} {'Δ':>8}")
+    rows = [('total', baseline, current)] + [
+        (op, baseline['operations'].get(op), current['operations'].get(op)) for op in OPERATIONS]
+    for op, before, after in rows:
+        if not before or not after:
+            continue
+        rate_change = (after['ops_per_sec'] / before['ops_per_sec'] - 1) * 100 if before['ops_per_sec'] else 0.0
+        line = f"{op:<20} {after['ops_per_sec']:>10.1f} {rate_change:>+7.1f}%"
+        if 'ms_p95' in after:
+            p95_change = (after['ms_p95'] / before['ms_p95'] - 1) * 100 if before['ms_p95'] else 0.0
+            line += f" {after['ms_p95']:>10.2f} {p95_change:>+7.1f}%"
+        print(line)
+
+
+def print_report(report):
+    print(f"{'Operation':<20} {'count':>8} {'ops/s':>10} {'p50 ms':>8} {'p95 ms':>8} "
+          f"{'p99 ms':>8} {'errors':>7}")
+    for op, stats in report['operations'].items():
+        print(f"{op:<20} {stats['count']:>8} {stats['ops_per_sec']:>10.1f} {stats['ms_p50']:>8.2f} "
+              f"{stats['ms_p95']:>8.2f} {stats['ms_p99']:>8.2f} {stats['errors']:>7}")
+    print(f"{'total':<20} {report['total_ops']:>8} {report['ops_per_sec']:>10.1f}")
+    for op, message in report['first_errors'].items():
+        print(f"⚠️  {op}: {message}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark subscriber CRUD throughput and latency")
+    parser.add_argument('--workers', type=int, default=4, help="Concurrent workers")
+    parser.add_argument('--duration', type=float, help="Measured seconds (default 30 without --ops)")
+    parser.add_argument('--ops', type=int, help="Stop after this many measured operations")
+    parser.add_argument('--warmup', type=float, default=2.0, help="Unmeasured seconds before timing")
+    parser.add_argument('--mix', default=','.join(f"{op}={w}" for op, w in DEFAULT_MIX.items()),
+                        help="Operation weights, e.g. insert=20,lookup=50,delete=5")
+    parser.add_argument('--seed', type=int, help="Seed the per-worker operation streams")
+    parser.add_argument('--label', help="Free-form label stored in the report")
+    parser.add_argument('--output', '-o', help="Write the JSON report to this file")
+    parser.add_argument('--compare', help="Compare against a previously saved JSON report")
+    parser.add_argument('--keep', action='store_true', help="Keep the rows created by the run")
+    args = parser.parse_args()
+
+    try:
+        mix = parse_mix(args.mix)
+    except ValueError as e:
+        parser.error(str(e))
+    duration = args.duration if args.duration is not None or args.ops else 30.0
+
+    pool = get_pool('benchmark', min_size=args.workers, max_size=args.workers)
+    with pool.cursor() as cursor:
+        version = schema_version(cursor)
+    workload = CrudWorkload(pool)
+    started_at = datetime.now(timezone.utc).isoformat()
+    print(f"🏁 {args.workers} workers, mix {mix}, "
+          f"{f'{duration:.0f}s' if duration else f'{args.ops} ops'} (run {workload.run_id})", file=sys.stderr)
+    try:
+        report = run_benchmark(workload, mix, args.workers, duration, args.ops, args.warmup, args.seed)
+    finally:
+        if not args.keep:
+            workload.cleanup()
+
+    report.update({
+        'label': args.label,
+        'run_id': workload.run_id,
+        'started_at': started_at,
+        'workers': args.workers,
+        'mix': mix,
+        'duration_target': duration,
+        'ops_target': args.ops,
+        'warmup': args.warmup,
+        'seed': args.seed,
+        'database': {
+            'host': f"{pool.connect_args['host']}:{pool.connect_args['port']}",
+            'database': pool.connect_args.get('database'),
+            'schema_version': version,
+        },
+        'pool': pool.metrics(),
+    })
+    print_report(report)
+    if args.output:
+        with open(args.output, 'w') as handle:
+            json.dump(report, handle, indent=2, default=str)
+        print(f"📝 Report written to {args.output}", file=sys.stderr)
+    if args.compare:
+        with open(args.compare) as handle:
+            baseline = json.load(handle)
+        print(f"\nCompared with {args.compare} ({baseline.get('label') or baseline.get('run_id')}):")
+        compare(baseline, report)
+
+
+if __name__ == "__main__":
+    main()
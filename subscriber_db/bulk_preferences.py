@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Bulk Preference Updates
+Applies a stream of (subscriber id or email, preference changes) records as
+batched INSERT ... ON DUPLICATE KEY UPDATE statements on the
+unique_subscriber_pref key, one transaction per batch so lock time stays
+bounded, optionally recording an 'updated' history row for every
+subscriber whose preferences actually changed. Each change is also recorded
+as an outbox event in its batch's transaction.
+"""
+
+import argparse
+import time
+
+from .batching import batched, in_clause, values_clause
+from .bulk_import import read_records
+from .outbox import record_events
+from .pool import get_pool
+from .reporting import RateTracker
+from .schema import FREQUENCIES, PREFERENCE_COLUMNS, parse_bool
+
+
+def normalize_change(record, defaults=None):
+    """Return (('id', int) or ('email', str), {column: value}) for one input record"""
+    changes = {}
+    for column in PREFERENCE_COLUMNS:
+        value = record.get(column)
+        if value is None or value == '':
+            value = (defaults or {}).get(column)
+        if value is None or value == '':
+            continue
+        if column == 'frequency':
+            value = str(value).strip().lower()
+            if value not in FREQUENCIES:
+                raise ValueError(f"Invalid frequency: {value!r}")
+        else:
+            value = parse_bool(value)
+        changes[column] = value
+    if not changes:
+        raise ValueError("No preference changes")
+
+    subscriber_id = record.get('subscriber_id')
+    if subscriber_id not in (None, ''):
+        try:
+            return ('id', int(subscriber_id)), changes
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid subscriber_id: {subscriber_id!r}") from None
+    email = (record.get('email') or '').strip().lower()
+    if not email or '@' not in email:
+        raise ValueError(f"Record needs a subscriber_id or email: {record!r}")
+    return ('email', email), changes
+
+
+def _resolve(cursor, keys):
+    """Map ('id'|'email', value) keys to subscriber ids, share-locking them against deletes"""
+    ids = [value for kind, value in keys if kind == 'id']
+    emails = [value for kind, value in keys if kind == 'email']
+    resolved = {}
+    if ids:
+        cursor.execute(f"SELECT id FROM subscribers WHERE id IN {in_clause(ids)} LOCK IN SHARE MODE", ids)
+        resolved.update((('id', subscriber_id), subscriber_id) for (subscriber_id,) in cursor.fetchall())
+    if emails:
+        cursor.execute(f"SELECT id, email FROM subscribers WHERE email IN {in_clause(emails)} "
+                       f"LOCK IN SHARE MODE", emails)
+        resolved.update((('email', email.lower()), subscriber_id) for subscriber_id, email in cursor.fetchall())
+    return resolved
+
+
+def _current(cursor, subscriber_ids):
+    """Existing preference rows for the batch, locked until the batch commits"""
+    cursor.execute(
+        f"SELECT subscriber_id, {', '.join(PREFERENCE_COLUMNS)} FROM subscription_preferences "
+        f"WHERE subscriber_id IN {in_clause(subscriber_ids)} FOR UPDATE", subscriber_ids)
+    current = {}
+    for row in cursor.fetchall():
+        values = dict(zip(PREFERENCE_COLUMNS, row[1:]))
+        for column in ('newsletter_enabled', 'marketing_enabled'):
+            values[column] = None if values[column] is None else bool(values[column])
+        current[row[0]] = values
+    return current
+
+
+def describe(changes):
+    return ", ".join(f"{column}={int(value) if isinstance(value, bool) else value}"
+                     for column, value in changes.items())
+
+
+def apply_batch(conn, changes, history_note=None):
+    """Apply one batch of (key, changes) in a transaction; returns a counts dict.
+
+    Changes for the same subscriber are merged in order. Rows are grouped
+    by the set of columns they change, so each group is one multi-row
+    upsert that leaves the other columns alone. Subscribers whose
+    preferences already match are skipped and get no history row.
+    """
+    counts = {'inserted': 0, 'updated': 0, 'unchanged': 0, 'missing': 0, 'history': 0}
+    cursor = conn.cursor()
+    try:
+        conn.start_transaction()
+        resolved = _resolve(cursor, list(dict.fromkeys(key for key, _ in changes)))
+        merged = {}
+        for key, change in changes:
+            subscriber_id = resolved.get(key)
+            if subscriber_id is None:
+                counts['missing'] += 1
+                continue
+            merged.setdefault(subscriber_id, {}).update(change)
+        if not merged:
+            conn.commit()
+            return counts
+
+        subscriber_ids = sorted(merged)
+        current = _current(cursor, subscriber_ids)
+        groups = {}
+        history_rows = []
+        events = []
+        for subscriber_id in subscriber_ids:
+            existing = current.get(subscriber_id)
+            change = merged[subscriber_id]
+            if existing is not None:
+                change = {column: value for column, value in change.items() if existing[column] != value}
+                if not change:
+                    counts['unchanged'] += 1
+                    continue
+                counts['updated'] += 1
+            else:
+                counts['inserted'] += 1
+            columns = tuple(column for column in PREFERENCE_COLUMNS if column in change)
+            groups.setdefault(columns, []).append((subscriber_id,) + tuple(change[c] for c in columns))
+            events.append((subscriber_id, 'preferences.updated', change))
+            if history_note is not None:
+                history_rows.append((subscriber_id, 'updated', f"{history_note}: {describe(change)}"))
+                events.append((subscriber_id, 'history.appended',
+                               {'action': 'updated', 'notes': history_rows[-1][2]}))
+
+        for columns, rows in groups.items():
+            placeholders, params = values_clause(rows)
+            updates = ", ".join(f"{column} = VALUES({column})" for column in columns)
+            cursor.execute(
+                f"INSERT INTO subscription_preferences (subscriber_id, {', '.join(columns)}) "
+                f"VALUES {placeholders} ON DUPLICATE KEY UPDATE {updates}", params)
+        if history_rows:
+            placeholders, params = values_clause(history_rows)
+            cursor.execute(f"INSERT INTO subscription_history (subscriber_id, action, notes) VALUES {placeholders}",
+                           params)
+            counts['history'] = len(history_rows)
+        record_events(cursor, events)
+        conn.commit()
+        return counts
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+def bulk_update_preferences(records, pool=None, batch_size=1000, history_note=None, defaults=None,
+                            pause=0.0, on_batch=None):
+    """Apply preference changes from an iterable of records in batches; returns a report"""
+    pool = pool or get_pool()
+    tracker = RateTracker()
+    report = {'read': 0, 'inserted': 0, 'updated': 0, 'unchanged': 0, 'missing': 0, 'history': 0,
+              'invalid': 0, 'errors': []}
+
+    def valid_changes():
+        for record in records:
+            report['read'] += 1
+            try:
+                yield normalize_change(record, defaults)
+            except ValueError as e:
+                report['invalid'] += 1
+                if len(report['errors']) < 20:
+                    report['errors'].append(f"record {report['read']}: {e}")
+
+    conn = pool.connection()
+    try:
+        for batch in batched(valid_changes(), batch_size):
+            started = time.monotonic()
+            counts = apply_batch(conn, batch, history_note)
+            tracker.record_batch(len(batch), time.monotonic() - started)
+            for key, value in counts.items():
+                report[key] += value
+            if on_batch:
+                on_batch(report, tracker)
+            if pause:
+                time.sleep(pause)
+    finally:
+        conn.close()
+
+    report.update(tracker.summary())
+    return report
+
+
+def parse_assignments(assignments):
+    """Parse ['frequency=daily', 'marketing_enabled=1'] into a defaults dict"""
+    defaults = {}
+    for assignment in assignments or ():
+        column, _, value = assignment.partition('=')
+        column = column.strip()
+        if column not in PREFERENCE_COLUMNS or not value:
+            raise ValueError(f"Expected one of {', '.join(PREFERENCE_COLUMNS)}=VALUE, got {assignment!r}")
+        defaults[column] = value.strip()
+    return defaults
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply preference changes to many subscribers at once")
+    parser.add_argument('path', help="CSV/NDJSON (optionally .gz) with subscriber_id or email plus changes")
+    parser.add_argument('--format', choices=['csv', 'ndjson'], help="Override format detection")
+    parser.add_argument('--set', action='append', metavar='COLUMN=VALUE',
+                        help="Change applied to every record that does not set the column itself")
+    parser.add_argument('--batch-size', type=int, default=1000, help="Subscribers per transaction")
+    parser.add_argument('--history-note', help="Record an 'updated' history row with this note per change")
+    parser.add_argument('--pause', type=float, default=0.0, help="Seconds to sleep between batches")
+    args = parser.parse_args()
+
+    try:
+        defaults = parse_assignments(args.set)
+    except ValueError as e:
+        parser.error(str(e))
+
+    def progress(report, tracker):
+        if len(tracker.batch_latencies) % 10:
+            return
+        print(f"  ... {report['read']} read, {report['inserted'] + report['updated']} changed, "
+              f"{tracker.rows / max(tracker.elapsed(), 1e-9):.0f} rows/s")
+
+    print(f"🎯 Applying preference changes from {args.path} (batch size {args.batch_size})")
+    report = bulk_update_preferences(read_records(args.path, args.format), batch_size=args.batch_size,
+                                     history_note=args.history_note, defaults=defaults,
+                                     pause=args.pause, on_batch=progress)
+    print(f"✅ {report['updated']} updated, {report['inserted']} created, {report['unchanged']} unchanged, "
+          f"{report['missing']} unknown subscribers, {report['invalid']} invalid "
+          f"in {report['elapsed']:.2f}s - {report['rows_per_sec']:.0f} rows/s")
+    print(f"   Batches: {report['batches']}, latency p50 {report['batch_ms_p50']:.1f} ms, "
+          f"p95 {report['batch_ms_p95']:.1f} ms, max {report['batch_ms_max']:.1f} ms")
+    if args.history_note:
+        print(f"   History rows written: {report['history']}")
+    for error in report['errors']:
+        print(f"   ⚠️  {error}")
+
+
+if __name__ == "__main__":
+    main()
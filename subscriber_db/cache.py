@@ -0,0 +1,117 @@
+"""
+Bounded in-process cache
+LRU eviction with a per-entry TTL and limits on both entry count and
+approximate memory, plus optional negative entries for known-missing keys.
+"""
+
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+MISSING = object()
+NEGATIVE = object()
+
+
+def estimate_size(value):
+    """Approximate the memory footprint of plain dict/list/scalar values in bytes"""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(estimate_size(k) + estimate_size(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple)):
+        size += sum(estimate_size(v) for v in value)
+    return size
+
+
+class TTLCache:
+    """Thread-safe LRU cache with TTL expiry and entry/byte limits"""
+
+    def __init__(self, max_entries=10000, max_bytes=16 * 1024 * 1024, ttl=60.0,
+                 negative_ttl=None, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'negative_hits': 0,
+            'evictions': 0,
+            'expirations': 0,
+            'invalidations': 0,
+        }
+
+    def get(self, key):
+        """Return the cached value, NEGATIVE for a cached miss, or MISSING"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats['misses'] += 1
+                return MISSING
+            value, expires, size = entry
+            if expires <= self._clock():
+                self._remove(key)
+                self._stats['expirations'] += 1
+                self._stats['misses'] += 1
+                return MISSING
+            self._entries.move_to_end(key)
+            if value is NEGATIVE:
+                self._stats['negative_hits'] += 1
+            else:
+                self._stats['hits'] += 1
+            return value
+
+    def set(self, key, value, ttl=None):
+        """Store value under key, evicting least recently used entries as needed"""
+        size = estimate_size(key) + estimate_size(value)
+        if size > self.max_bytes:
+            return
+        expires = self._clock() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (value, expires, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self._stats['evictions'] += 1
+
+    def set_negative(self, key):
+        """Remember that key does not exist (no-op unless negative_ttl is set)"""
+        if self.negative_ttl:
+            self.set(key, NEGATIVE, ttl=self.negative_ttl)
+
+    def invalidate(self, *keys):
+        """Drop the given keys if present"""
+        with self._lock:
+            for key in keys:
+                if key in self._entries:
+                    self._remove(key)
+                    self._stats['invalidations'] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _remove(self, key):
+        _, _, size = self._entries.pop(key)
+        self._bytes -= size
+
+    def stats(self):
+        """Return hit/miss/eviction counters and current occupancy"""
+        with self._lock:
+            snapshot = dict(self._stats)
+            snapshot['entries'] = len(self._entries)
+            snapshot['bytes'] = self._bytes
+        lookups = snapshot['hits'] + snapshot['negative_hits'] + snapshot['misses']
+        snapshot['hit_ratio'] = (snapshot['hits'] + snapshot['negative_hits']) / lookups if lookups else 0.0
+        return snapshot
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,164 @@
+"""
+Dependency-aware check runner
+Runs system checks as a small DAG on a thread pool: a check starts as soon
+as everything it depends on has passed, independent checks run side by
+side, and dependents of a failed check are skipped.
+"""
+
+import json
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager, redirect_stdout
+
+
+class Check:
+    """A named check function and the checks it depends on"""
+
+    def __init__(self, name, func, depends_on=()):
+        self.name = name
+        self.func = func
+        self.depends_on = tuple(depends_on)
+
+
+def validate_graph(checks):
+    """Raise ValueError for unknown dependencies or cycles"""
+    by_name = {check.name: check for check in checks}
+    if len(by_name) != len(checks):
+        raise ValueError("Check names must be unique")
+    for check in checks:
+        for dep in check.depends_on:
+            if dep not in by_name:
+                raise ValueError(f"Check {check.name!r} depends on unknown check {dep!r}")
+
+    visiting, done = set(), set()
+
+    def visit(name):
+        if name in done:
+            return
+        if name in visiting:
+            raise ValueError(f"Dependency cycle through {name!r}")
+        visiting.add(name)
+        for dep in by_name[name].depends_on:
+            visit(dep)
+        visiting.discard(name)
+        done.add(name)
+
+    for check in checks:
+        visit(check.name)
+
+
+def _execute(check, started_at):
+    started = time.monotonic()
+    try:
+        passed = bool(check.func())
+        status, error = ('passed' if passed else 'failed'), None
+    except Exception as e:
+        status, error = 'error', f"{type(e).__name__}: {e}"
+    finished = time.monotonic()
+    return {
+        'name': check.name,
+        'status': status,
+        'error': error,
+        'depends_on': list(check.depends_on),
+        'start': started - started_at,
+        'duration': finished - started,
+    }
+
+
+def critical_path(results, checks):
+    """Return (names, seconds) of the longest duration chain through the DAG"""
+    by_name = {check.name: check for check in checks}
+    best = {}
+
+    def longest(name):
+        if name not in best:
+            result = results[name]
+            own = result['duration'] if result['status'] != 'skipped' else 0.0
+            chains = [longest(dep) for dep in by_name[name].depends_on]
+            path, seconds = max(chains, key=lambda chain: chain[1], default=([], 0.0))
+            best[name] = (path + [name], seconds + own)
+        return best[name]
+
+    return max((longest(name) for name in results), key=lambda chain: chain[1], default=([], 0.0))
+
+
+def run_checks(checks, max_workers=4, on_result=None):
+    """Run checks concurrently in dependency order and return a report dict"""
+    validate_graph(checks)
+    started_at = time.monotonic()
+    results = {}
+    pending = {check.name: check for check in checks}
+    running = {}
+
+    def settle(result):
+        results[result['name']] = result
+        if on_result:
+            on_result(result)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        while pending or running:
+            for name, check in list(pending.items()):
+                dep_results = [results.get(dep) for dep in check.depends_on]
+                if any(r is not None and r['status'] != 'passed' for r in dep_results):
+                    del pending[name]
+                    failed = [r['name'] for r in dep_results if r is not None and r['status'] != 'passed']
+                    settle({'name': name, 'status': 'skipped', 'error': f"dependency failed: {', '.join(failed)}",
+                            'depends_on': list(check.depends_on), 'start': None, 'duration': 0.0})
+                elif all(r is not None for r in dep_results):
+                    del pending[name]
+                    running[executor.submit(_execute, check, started_at)] = name
+            if not running:
+                continue
+            done, _ = wait(list(running), return_when=FIRST_COMPLETED)
+            for future in done:
+                del running[future]
+                settle(future.result())
+
+    wall = time.monotonic() - started_at
+    path, path_seconds = critical_path(results, checks)
+    ordered = [results[check.name] for check in checks]
+    return {
+        'passed': sum(1 for r in ordered if r['status'] == 'passed'),
+        'total': len(ordered),
+        'wall_seconds': wall,
+        'serial_seconds': sum(r['duration'] for r in ordered),
+        'critical_path': path,
+        'critical_path_seconds': path_seconds,
+        'checks': ordered,
+    }
+
+
+def print_summary(report):
+    """Print per-check durations and the critical path"""
+    print(f"\n{'Check':<30} {'Status':<8} {'Duration':>9}")
+    for result in report['checks']:
+        print(f"{result['name']:<30} {result['status']:<8} {result['duration']:>8.2f}s")
+    print(f"\nWall clock {report['wall_seconds']:.2f}s "
+          f"(sum of checks {report['serial_seconds']:.2f}s)")
+    print(f"Critical path ({report['critical_path_seconds']:.2f}s): "
+          f"{' -> '.join(report['critical_path'])}")
+
+
+@contextmanager
+def human_output(json_path):
+    """Send printed progress and summaries to stderr while the JSON report goes to stdout ('-')
+
+    The redirect covers every thread, so checks printing from the pool are
+    kept out of the JSON too.
+    """
+    if json_path == '-':
+        with redirect_stdout(sys.stderr):
+            yield
+    else:
+        yield
+
+
+def write_json(report, path):
+    """Write the report as JSON to path ('-' for stdout)"""
+    text = json.dumps(report, indent=2)
+    if path == '-':
+        print(text)
+    else:
+        with open(path, 'w') as handle:
+            handle.write(text + "\n")
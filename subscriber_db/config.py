@@ -0,0 +1,52 @@
+"""
+Database configuration for the subscriber database
+Reads the same DB_* environment variables used by the CI workflow and tests
+"""
+
+import os
+
+
+def use_pure():
+    """Whether to force the pure-Python protocol (DB_USE_PURE); the C extension is preferred"""
+    return os.getenv('DB_USE_PURE', '0').lower() in ('1', 'true', 'yes')
+
+
+def db_config(**overrides):
+    """Return connection settings for the application user"""
+    config = {
+        'host': os.getenv('DB_HOST', '127.0.0.1'),
+        'port': int(os.getenv('DB_PORT', '3307')),
+        'user': os.getenv('DB_USER', 'subscriber_user'),
+        'password': os.getenv('DB_PASSWORD', 'SubscriberPass123'),
+        'database': os.getenv('DB_NAME', 'subscriber_db'),
+        'use_pure': use_pure(),
+    }
+    config.update(overrides)
+    return config
+
+
+def admin_config(**overrides):
+    """Return connection settings for the root/admin user (no default schema)"""
+    config = {
+        'host': os.getenv('DB_HOST', '127.0.0.1'),
+        'port': int(os.getenv('DB_PORT', '3307')),
+        'user': os.getenv('DB_ADMIN_USER', 'root'),
+        'password': os.getenv('DB_ADMIN_PASSWORD', 'Secret5555'),
+        'use_pure': use_pure(),
+    }
+    config.update(overrides)
+    return config
+
+
+def pool_settings(**overrides):
+    """Return connection pool sizing and maintenance settings"""
+    settings = {
+        'min_size': int(os.getenv('DB_POOL_MIN', '1')),
+        'max_size': int(os.getenv('DB_POOL_MAX', '10')),
+        'checkout_timeout': float(os.getenv('DB_POOL_TIMEOUT', '30')),
+        'idle_timeout': float(os.getenv('DB_POOL_IDLE_TIMEOUT', '300')),
+        'health_check_interval': float(os.getenv('DB_POOL_HEALTH_CHECK', '30')),
+        'statement_cache_size': int(os.getenv('DB_STATEMENT_CACHE', '64')),
+    }
+    settings.update(overrides)
+    return settings
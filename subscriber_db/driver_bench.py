@@ -0,0 +1,217 @@
+#!/usr/bin/env python3
+"""
+Driver Fast-path Benchmark
+Runs the CRUD sequence of tests/test_subscriber_crud.py one cycle at a
+time under each combination of driver (C extension or pure Python),
+protocol (text queries or server-side prepared statements) and row format
+(dict, namedtuple or tuple), and reports cycles/s and per-step latency so
+the data-access layer's fast path can be checked against the alternatives.
+"""
+
+import argparse
+import json
+import sys
+import time
+import uuid
+
+from mysql.connector import HAVE_CEXT
+
+from .pool import get_pool
+from .reporting import percentile
+
+# (driver, protocol, rows); prepared statements always return tuples here,
+# since that is what PooledConnection.execute_prepared hands back
+MODES = (
+    ('pure', 'text', 'dict'),
+    ('pure', 'text', 'namedtuple'),
+    ('pure', 'text', 'tuple'),
+    ('pure', 'prepared', 'tuple'),
+    ('cext', 'text', 'dict'),
+    ('cext', 'text', 'namedtuple'),
+    ('cext', 'text', 'tuple'),
+    ('cext', 'prepared', 'tuple'),
+)
+
+STEP_SQL = {
+    'create': "INSERT INTO subscribers (email, first_name, last_name) VALUES (%s, %s, %s)",
+    'read': "SELECT * FROM subscribers WHERE email = %s",
+    'update': "UPDATE subscribers SET first_name = %s, last_name = %s, is_active = %s WHERE email = %s",
+    'add_preferences': "INSERT INTO subscription_preferences "
+                       "(subscriber_id, newsletter_enabled, marketing_enabled, frequency) VALUES (%s, %s, %s, %s)",
+    'read_preferences': "SELECT sp.* FROM subscription_preferences sp "
+                        "JOIN subscribers s ON sp.subscriber_id = s.id WHERE s.email = %s",
+    'append_history': "INSERT INTO subscription_history (subscriber_id, action, notes) VALUES (%s, %s, %s)",
+    'read_history': "SELECT action FROM subscription_history WHERE subscriber_id = %s ORDER BY action_date",
+    'delete': "DELETE FROM subscribers WHERE email = %s",
+}
+
+STEPS = tuple(STEP_SQL)
+
+CURSOR_ARGS = {'dict': {'dictionary': True}, 'namedtuple': {'named_tuple': True}, 'tuple': {}}
+
+
+def mode_label(mode):
+    return '-'.join(mode)
+
+
+def parse_modes(text):
+    """Parse 'cext-prepared-tuple,pure-text-dict' into MODES entries"""
+    labels = {mode_label(mode): mode for mode in MODES}
+    modes = []
+    for label in filter(None, (part.strip() for part in text.split(','))):
+        if label not in labels:
+            raise ValueError(f"Unknown mode {label!r}; expected one of {', '.join(labels)}")
+        modes.append(labels[label])
+    return modes
+
+
+class TextExecutor:
+    """Runs statements as text queries on one cursor of the requested row format"""
+
+    def __init__(self, conn, rows):
+        self.cursor = conn.cursor(**CURSOR_ARGS[rows])
+
+    def __call__(self, sql, params):
+        self.cursor.execute(sql, params)
+        rows = self.cursor.fetchall() if self.cursor.with_rows else []
+        return rows, self.cursor.lastrowid
+
+    def close(self):
+        self.cursor.close()
+
+
+class PreparedExecutor:
+    """Runs statements through the pooled connection's prepared-statement cache"""
+
+    def __init__(self, conn):
+        self.conn = conn
+
+    def __call__(self, sql, params):
+        cursor = self.conn.execute_prepared(sql, params)
+        rows = cursor.fetchall() if cursor.with_rows else []
+        return rows, cursor.lastrowid
+
+    def close(self):
+        pass
+
+
+def run_cycle(execute, email, timings):
+    """One create/read/update/preferences/history/delete cycle; appends each step's seconds to timings"""
+    def timed(step, params):
+        started = time.perf_counter()
+        result = execute(STEP_SQL[step], params)
+        timings.setdefault(step, []).append(time.perf_counter() - started)
+        return result
+
+    _, subscriber_id = timed('create', (email, 'Bench', 'Cycle'))
+    timed('read', (email,))
+    timed('update', ('Updated', 'Cycle', False, email))
+    timed('add_preferences', (subscriber_id, True, False, 'weekly'))
+    timed('read_preferences', (email,))
+    for action in ('subscribed', 'updated'):
+        timed('append_history', (subscriber_id, action, f'Bench {action} action'))
+    timed('read_history', (subscriber_id,))
+    timed('delete', (email,))
+
+
+def run_mode(mode, cycles, run_id, warmup=20):
+    """Run cycles CRUD cycles on one autocommit connection in the given mode; returns its report"""
+    driver, protocol, rows = mode
+    label = mode_label(mode)
+    pool = get_pool(f"driverbench:{driver}", use_pure=driver == 'pure', autocommit=True, min_size=1, max_size=1)
+    conn = pool.connection()
+    execute = PreparedExecutor(conn) if protocol == 'prepared' else TextExecutor(conn, rows)
+    try:
+        for i in range(warmup):
+            run_cycle(execute, f"driverbench-{run_id}-{label}-w{i}@example.com", {})
+        timings = {}
+        started = time.perf_counter()
+        for i in range(cycles):
+            run_cycle(execute, f"driverbench-{run_id}-{label}-{i}@example.com", timings)
+        elapsed = time.perf_counter() - started
+        connection_class = type(conn.raw).__name__
+    finally:
+        execute.close()
+        conn.close()
+    return {
+        'mode': label,
+        'connection_class': connection_class,
+        'cycles': cycles,
+        'elapsed': elapsed,
+        'cycles_per_sec': cycles / elapsed if elapsed > 0 else 0.0,
+        'steps': {step: {
+            'ms_mean': sum(samples) / len(samples) * 1000,
+            'ms_p50': percentile(samples, 50) * 1000,
+            'ms_p95': percentile(samples, 95) * 1000,
+        } for step, samples in timings.items()},
+    }
+
+
+def cleanup(run_id):
+    """Delete rows a failed run left behind (preferences and history cascade)"""
+    with get_pool('driverbench:cleanup', autocommit=True).cursor() as cursor:
+        cursor.execute("DELETE FROM subscribers WHERE email LIKE %s", (f"driverbench-{run_id}-%",))
+        return cursor.rowcount
+
+
+def run_driver_bench(modes=MODES, cycles=500, warmup=20, log=print):
+    """Benchmark every mode in turn; returns {'run_id', 'have_cext', 'modes': [...], 'skipped': [...]}"""
+    run_id = uuid.uuid4().hex[:8]
+    report = {'run_id': run_id, 'have_cext': HAVE_CEXT, 'cycles': cycles, 'modes': [], 'skipped': []}
+    try:
+        for mode in modes:
+            if mode[0] == 'cext' and not HAVE_CEXT:
+                report['skipped'].append(mode_label(mode))
+                continue
+            log(f"⏱️  {mode_label(mode)}")
+            report['modes'].append(run_mode(mode, cycles, run_id, warmup))
+    finally:
+        cleanup(run_id)
+    if report['modes']:
+        baseline = report['modes'][0]['cycles_per_sec']
+        for result in report['modes']:
+            result['speedup'] = result['cycles_per_sec'] / baseline if baseline else 0.0
+    return report
+
+
+def print_report(report):
+    modes = report['modes']
+    if not modes:
+        print("⚠️  No modes ran")
+        return
+    print(f"\n📊 {report['cycles']} CRUD cycles per mode (speedup relative to {modes[0]['mode']})")
+    print(f"{'Mode':<22} {'cycles/s':>9} {'speedup':>8} " + ' '.join(f"{step[:12]:>12}" for step in STEPS))
+    for result in modes:
+        p50s = ' '.join(f"{result['steps'].get(step, {}).get('ms_p50', 0.0):>12.3f}" for step in STEPS)
+        print(f"{result['mode']:<22} {result['cycles_per_sec']:>9.1f} {result['speedup']:>7.2f}x {p50s}")
+    print("(step columns are p50 milliseconds)")
+    if report['skipped']:
+        print(f"⚠️  C extension unavailable, skipped {', '.join(report['skipped'])}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare driver, protocol and row-format modes on CRUD cycles")
+    parser.add_argument('--cycles', '-n', type=int, default=500, help="Measured CRUD cycles per mode")
+    parser.add_argument('--warmup', type=int, default=20, help="Unmeasured cycles before each mode")
+    parser.add_argument('--modes', default=','.join(mode_label(mode) for mode in MODES),
+                        help="Comma-separated modes to run, the first being the baseline")
+    parser.add_argument('--output', '-o', help="Write the JSON report to this file")
+    args = parser.parse_args()
+
+    try:
+        modes = parse_modes(args.modes)
+    except ValueError as e:
+        parser.error(str(e))
+
+    print(f"🏁 {len(modes)} modes x {args.cycles} cycles (C extension {'available' if HAVE_CEXT else 'missing'})",
+          file=sys.stderr)
+    report = run_driver_bench(modes, args.cycles, args.warmup, log=lambda line: print(line, file=sys.stderr))
+    print_report(report)
+    if args.output:
+        with open(args.output, 'w') as handle:
+            json.dump(report, handle, indent=2, default=str)
+        print(f"📝 Report written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Index Trade-off Benchmark
+Seeds a scratch schema at the version before an index migration, measures
+insert throughput, on-disk index sizes and read latency, applies the
+migration and measures again, so the write amplification saved and the
+read paths gained are reported side by side.
+"""
+
+import argparse
+import json
+import sys
+import time
+
+from .benchmark import CrudWorkload, run_benchmark
+from .migrations import schema_runner
+from .pool import get_pool
+from .seed import TABLE_INSERTS, next_subscriber_id, seed_database
+from .testing import drop_schema, provision_schema
+
+DEFAULT_SCHEMA = 'subscriber_db_indexbench'
+
+WRITE_MIX = {'insert': 1}
+READ_MIX = {'lookup': 1, 'read_history': 1}
+
+
+class SampledReads(CrudWorkload):
+    """CrudWorkload whose workers read a sample of the seeded subscribers instead of their own rows"""
+
+    def __init__(self, pool, sample):
+        super().__init__(pool)
+        self.sample = sample
+
+    def execute(self, op, state):
+        if not state.owned:
+            state.owned = list(self.sample)
+        return super().execute(op, state)
+
+
+def sample_subscribers(pool, size, seed):
+    with pool.cursor() as cursor:
+        cursor.execute("SELECT id, email FROM subscribers ORDER BY RAND(%s) LIMIT %s", (seed, size))
+        return cursor.fetchall()
+
+
+def index_sizes(admin_pool, schema):
+    """Return {table: {index: bytes}} from InnoDB's persistent statistics (partitions summed)"""
+    with admin_pool.cursor() as cursor:
+        cursor.execute(f"ANALYZE TABLE {', '.join(f'`{schema}`.`{table}`' for table in TABLE_INSERTS)}")
+        cursor.fetchall()
+        cursor.execute(
+            "SELECT SUBSTRING_INDEX(table_name, '#', 1) AS base_table, index_name, "
+            "SUM(stat_value) * @@innodb_page_size FROM mysql.innodb_index_stats "
+            "WHERE database_name = %s AND stat_name = 'size' "
+            "GROUP BY base_table, index_name ORDER BY base_table, index_name", (schema,))
+        sizes = {}
+        for table, index, size in cursor.fetchall():
+            sizes.setdefault(table, {})[index] = int(size)
+    return sizes
+
+
+def measure(pool, admin_pool, schema, workers, write_ops, read_ops, seed, sample):
+    """Index sizes, then an insert-only run and a read-only run; returns a phase report"""
+    sizes = index_sizes(admin_pool, schema)
+    workload = CrudWorkload(pool)
+    try:
+        writes = run_benchmark(workload, WRITE_MIX, workers, ops=write_ops, seed=seed)
+    finally:
+        workload.cleanup()
+    reads = run_benchmark(SampledReads(pool, sample), READ_MIX, workers, ops=read_ops, seed=seed)
+    return {
+        'index_bytes': sizes,
+        'secondary_index_bytes': sum(size for table in sizes.values()
+                                     for index, size in table.items() if index != 'PRIMARY'),
+        'inserts_per_sec': writes['ops_per_sec'],
+        'insert_ms_p50': writes['operations'].get('insert', {}).get('ms_p50', 0.0),
+        'insert_ms_p95': writes['operations'].get('insert', {}).get('ms_p95', 0.0),
+        'reads': {op: {key: stats[key] for key in ('ms_p50', 'ms_p95', 'ms_p99')}
+                  for op, stats in reads['operations'].items()},
+        'errors': writes['errors'] + reads['errors'],
+    }
+
+
+def run_index_bench(schema, subscribers, seed, before, after, workers=4, write_ops=5000, read_ops=20000,
+                    log=print):
+    """Measure at version before, migrate to after, measure again; returns a report"""
+    log(f"🧱 Provisioning {schema} at V{before}")
+    provision_schema(schema, target=before)
+    pool = get_pool(f"indexbench:{schema}", database=schema, max_size=max(workers, 6))
+    admin_pool = get_pool('admin', admin=True)
+    log(f"🌱 Seeding {subscribers} subscribers")
+    seeded = seed_database(pool, subscribers, next_subscriber_id(pool), seed)
+    sample = sample_subscribers(pool, min(subscribers, 10000), seed)
+
+    log(f"📏 Measuring at V{before}")
+    report = {'schema': schema, 'subscribers': subscribers, 'seed': seed,
+              'reference_end': seeded['reference_end'], 'workers': workers,
+              'write_ops': write_ops, 'read_ops': read_ops, 'before_version': before, 'after_version': after}
+    report['before'] = measure(pool, admin_pool, schema, workers, write_ops, read_ops, seed, sample)
+
+    log(f"🚀 Migrating to V{after}")
+    runner = schema_runner(schema, admin=True)
+    started = time.perf_counter()
+    try:
+        applied = runner.migrate(target=after)
+    finally:
+        runner.pool.close()
+    report['migration_seconds'] = time.perf_counter() - started
+    report['migrations'] = [result['version'] for result in applied]
+
+    log(f"📏 Measuring at V{after}")
+    report['after'] = measure(pool, admin_pool, schema, workers, write_ops, read_ops, seed, sample)
+    return report
+
+
+def _change(before, after):
+    return f"{(after / before - 1) * 100:+.1f}%" if before else "n/a"
+
+
+def print_report(report):
+    before, after = report['before'], report['after']
+    print(f"\n📊 V{report['before_version']} -> V{report['after_version']} "
+          f"({report['subscribers']} subscribers, migration {report['migration_seconds']:.1f}s)")
+    print(f"{'Index':<48} {'before KiB':>11} {'after KiB':>11}")
+    for table in sorted(set(before['index_bytes']) | set(after['index_bytes'])):
+        old, new = before['index_bytes'].get(table, {}), after['index_bytes'].get(table, {})
+        for index in sorted(set(old) | set(new)):
+            print(f"{table + '.' + index:<48} {old.get(index, 0) / 1024:>11.0f} {new.get(index, 0) / 1024:>11.0f}")
+    print(f"{'secondary indexes total':<48} {before['secondary_index_bytes'] / 1024:>11.0f} "
+          f"{after['secondary_index_bytes'] / 1024:>11.0f} "
+          f"{_change(before['secondary_index_bytes'], after['secondary_index_bytes'])}")
+    print(f"\n{'Metric':<28} {'before':>10} {'after':>10} {'Δ':>8}")
+    rows = [('inserts/s', before['inserts_per_sec'], after['inserts_per_sec']),
+            ('insert p95 ms', before['insert_ms_p95'], after['insert_ms_p95'])]
+    for op in sorted(set(before['reads']) & set(after['reads'])):
+        rows.append((f"{op} p50 ms", before['reads'][op]['ms_p50'], after['reads'][op]['ms_p50']))
+        rows.append((f"{op} p95 ms", before['reads'][op]['ms_p95'], after['reads'][op]['ms_p95']))
+    for label, old, new in rows:
+        print(f"{label:<28} {old:>10.2f} {new:>10.2f} {_change(old, new):>8}")
+    if before['errors'] or after['errors']:
+        print(f"⚠️  {before['errors']} errors before, {after['errors']} after")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure an index migration's write and read trade-off")
+    parser.add_argument('--subscribers', '-n', type=int, default=200000, help="Subscribers to seed")
+    parser.add_argument('--seed', type=int, default=0, help="Seed for the data and the workload")
+    parser.add_argument('--before', default='5', help="Version measured first")
+    parser.add_argument('--after', default='6', help="Version migrated to and measured second")
+    parser.add_argument('--workers', type=int, default=4, help="Concurrent benchmark workers")
+    parser.add_argument('--write-ops', type=int, default=5000, help="Measured inserts per phase")
+    parser.add_argument('--read-ops', type=int, default=20000, help="Measured reads per phase")
+    parser.add_argument('--schema', default=DEFAULT_SCHEMA, help="Scratch schema (dropped and recreated)")
+    parser.add_argument('--output', '-o', help="Write the JSON report to this file")
+    parser.add_argument('--keep', action='store_true', help="Keep the scratch schema afterwards")
+    args = parser.parse_args()
+
+    try:
+        report = run_index_bench(args.schema, args.subscribers, args.seed, args.before, args.after,
+                                 args.workers, args.write_ops, args.read_ops)
+    finally:
+        if not args.keep:
+            drop_schema(args.schema)
+
+    print_report(report)
+    if args.output:
+        with open(args.output, 'w') as handle:
+            json.dump(report, handle, indent=2, default=str)
+        print(f"📝 Report written to {args.output}")
+    if report['before']['errors'] or report['after']['errors']:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
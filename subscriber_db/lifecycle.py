@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+"""
+Bulk Subscriber Lifecycle
+Deactivates (is_active = FALSE plus an 'unsubscribed' history row) or
+purges the subscribers matching a criterion in small primary-key chunks,
+one short transaction each, instead of one statement that locks the
+whole cohort and its cascades. Between chunks it waits while replicas
+lag or lock waits pile up. A checkpoint resumes an interrupted run, and
+--dry-run only counts what would change.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import mysql.connector
+
+from .batching import in_clause, values_clause
+from .export import read_checkpoint, write_checkpoint
+from .outbox import record_events
+from .pool import get_pool
+from .reporting import RateTracker
+
+ACTIONS = ('deactivate', 'purge')
+
+# Lock wait timeout and deadlock: the chunk rolled back whole and can be retried
+RETRYABLE_ERRORS = (1205, 1213)
+
+CHUNK_QUERY = "SELECT id FROM subscribers s WHERE s.id > %s AND ({criterion}) ORDER BY s.id LIMIT %s"
+
+
+class LifecycleError(Exception):
+    """Raised when a chunk keeps failing or the criterion is unusable"""
+
+
+def build_criterion(where=None, email_like=None, inactive_days=None):
+    """Combine the CLI filters into one SQL predicate on subscribers aliased s; returns (sql, params)"""
+    clauses, params = [], []
+    if where:
+        clauses.append(f"({where})")
+    if email_like:
+        clauses.append("s.email LIKE %s")
+        params.append(email_like)
+    if inactive_days is not None:
+        clauses.append("NOT s.is_active AND s.updated_at < NOW() - INTERVAL %s DAY")
+        params.append(int(inactive_days))
+    if not clauses:
+        raise LifecycleError("Refusing to act on every subscriber: give --where, --email-like or --inactive-days")
+    return " AND ".join(clauses), params
+
+
+class Throttle:
+    """Waits while any replica lags more than max_replica_lag seconds or too many row locks are waited on.
+
+    A replica whose SQL thread is stopped reports no lag and counts as lagging.
+    """
+
+    def __init__(self, pool, replica_pools=(), max_replica_lag=None, max_lock_waits=None,
+                 interval=1.0, sleep=time.sleep):
+        self.pool = pool
+        self.replica_pools = list(replica_pools)
+        self.max_replica_lag = max_replica_lag
+        self.max_lock_waits = max_lock_waits
+        self.interval = interval
+        self.sleep = sleep
+        self.waited = 0.0
+
+    def replica_lag(self, replica_pool):
+        with replica_pool.cursor(dictionary=True) as cursor:
+            try:
+                cursor.execute("SHOW REPLICA STATUS")
+            except mysql.connector.Error:
+                cursor.execute("SHOW SLAVE STATUS")
+            status = cursor.fetchone()
+        if not status:
+            return None
+        return status.get('Seconds_Behind_Source', status.get('Seconds_Behind_Master'))
+
+    def lock_waits(self):
+        with self.pool.cursor() as cursor:
+            cursor.execute("SHOW GLOBAL STATUS LIKE 'Innodb_row_lock_current_waits'")
+            return int(cursor.fetchone()[1])
+
+    def reasons(self):
+        """Return why the next chunk should wait (empty when it can go)"""
+        reasons = []
+        if self.max_lock_waits is not None:
+            waits = self.lock_waits()
+            if waits > self.max_lock_waits:
+                reasons.append(f"{waits} row lock waits")
+        if self.max_replica_lag is not None:
+            for replica_pool in self.replica_pools:
+                lag = self.replica_lag(replica_pool)
+                if lag is None or lag > self.max_replica_lag:
+                    host = replica_pool.connect_args.get('host')
+                    reasons.append(f"replica {host} lag {'unknown' if lag is None else f'{lag}s'}")
+        return reasons
+
+    def wait(self, on_wait=None):
+        while True:
+            reasons = self.reasons()
+            if not reasons:
+                return
+            if on_wait:
+                on_wait(reasons)
+            self.sleep(self.interval)
+            self.waited += self.interval
+
+
+def next_chunk(cursor, criterion, params, after_id, chunk_size):
+    """Ids of the next chunk of matching subscribers, read without locks"""
+    cursor.execute(CHUNK_QUERY.format(criterion=criterion), [after_id] + list(params) + [chunk_size])
+    return [row[0] for row in cursor.fetchall()]
+
+
+def deactivate_chunk(cursor, ids, criterion, params, note):
+    """Deactivate the chunk's still-matching active subscribers; returns the ids changed"""
+    cursor.execute(f"SELECT id FROM subscribers s WHERE s.id IN {in_clause(ids)} AND s.is_active "
+                   f"AND ({criterion}) FOR UPDATE", list(ids) + list(params))
+    changed = [row[0] for row in cursor.fetchall()]
+    if not changed:
+        return changed
+    cursor.execute(f"UPDATE subscribers SET is_active = FALSE WHERE id IN {in_clause(changed)}", changed)
+    placeholders, history_params = values_clause([(subscriber_id, 'unsubscribed', note)
+                                                  for subscriber_id in changed])
+    cursor.execute(f"INSERT INTO subscription_history (subscriber_id, action, notes) VALUES {placeholders}",
+                   history_params)
+    events = []
+    for subscriber_id in changed:
+        events.append((subscriber_id, 'subscriber.updated', {'is_active': False}))
+        events.append((subscriber_id, 'history.appended', {'action': 'unsubscribed', 'notes': note}))
+    record_events(cursor, events)
+    return changed
+
+
+def purge_chunk(cursor, ids, criterion, params, note=None):
+    """Delete the chunk's still-matching subscribers and their child rows; returns the ids deleted.
+
+    Children go first, each with its own indexed DELETE, so no cascade
+    runs inside the subscribers delete.
+    """
+    cursor.execute(f"SELECT id FROM subscribers s WHERE s.id IN {in_clause(ids)} AND ({criterion}) FOR UPDATE",
+                   list(ids) + list(params))
+    doomed = [row[0] for row in cursor.fetchall()]
+    if not doomed:
+        return doomed
+    for table in ('subscription_history', 'subscription_preferences'):
+        cursor.execute(f"DELETE FROM {table} WHERE subscriber_id IN {in_clause(doomed)}", doomed)
+    cursor.execute(f"DELETE FROM subscribers WHERE id IN {in_clause(doomed)}", doomed)
+    record_events(cursor, [(subscriber_id, 'subscriber.deleted', {'reason': note} if note else {})
+                           for subscriber_id in doomed])
+    return doomed
+
+
+CHUNK_ACTIONS = {'deactivate': deactivate_chunk, 'purge': purge_chunk}
+
+
+def count_matching(pool, action, criterion, params):
+    """Dry run: the subscribers (and for purge, child rows) the action would touch"""
+    active = " AND s.is_active" if action == 'deactivate' else ""
+    with pool.cursor() as cursor:
+        cursor.execute(f"SELECT COUNT(*) FROM subscribers s WHERE ({criterion}){active}", params)
+        counts = {'subscribers': int(cursor.fetchone()[0])}
+        if action == 'purge':
+            for table in ('subscription_preferences', 'subscription_history'):
+                cursor.execute(f"SELECT COUNT(*) FROM {table} c JOIN subscribers s ON c.subscriber_id = s.id "
+                               f"WHERE ({criterion})", params)
+                counts[table] = int(cursor.fetchone()[0])
+    return counts
+
+
+def run_lifecycle(action, criterion, params=(), pool=None, chunk_size=500, throttle=None, checkpoint=None,
+                  note=None, pause=0.0, max_retries=5, on_chunk=None, on_wait=None):
+    """Apply action to every matching subscriber chunk by chunk; returns a throughput report"""
+    if action not in CHUNK_ACTIONS:
+        raise ValueError(f"Unknown action {action!r}; expected one of {', '.join(ACTIONS)}")
+    apply_chunk = CHUNK_ACTIONS[action]
+    if note is None and action == 'deactivate':
+        note = 'Bulk deactivation'
+    pool = pool or get_pool()
+    tracker = RateTracker()
+    after_id = read_checkpoint(checkpoint)
+    report = {'changed': 0, 'retries': 0}
+    while True:
+        if throttle:
+            throttle.wait(on_wait)
+        started = time.monotonic()
+        with pool.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                ids = next_chunk(cursor, criterion, params, after_id, chunk_size)
+                conn.commit()
+                if not ids:
+                    break
+                for attempt in range(max_retries + 1):
+                    try:
+                        conn.start_transaction()
+                        changed = apply_chunk(cursor, ids, criterion, params, note)
+                        conn.commit()
+                        break
+                    except mysql.connector.Error as e:
+                        conn.rollback()
+                        if e.errno not in RETRYABLE_ERRORS or attempt == max_retries:
+                            raise LifecycleError(f"Chunk after id {after_id} failed: {e}") from e
+                        report['retries'] += 1
+                        time.sleep(min(2 ** attempt * 0.1, 5.0))
+            finally:
+                cursor.close()
+        after_id = ids[-1]
+        if checkpoint:
+            write_checkpoint(checkpoint, after_id)
+        report['changed'] += len(changed)
+        tracker.record_batch(len(ids), time.monotonic() - started)
+        if on_chunk:
+            on_chunk(len(changed), after_id)
+        if pause:
+            time.sleep(pause)
+    # As in archival, the checkpoint only resumes an interrupted run of the same job
+    if checkpoint and os.path.exists(checkpoint):
+        os.remove(checkpoint)
+    report.update(tracker.summary())
+    report['last_id'] = after_id
+    report['throttled_seconds'] = throttle.waited if throttle else 0.0
+    return report
+
+
+def replica_pool(address):
+    """Admin pool on a replica given as host[:port]"""
+    host, _, port = address.partition(':')
+    return get_pool(f"replica:{address}", admin=True, host=host, port=int(port or 3306), min_size=1, max_size=1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Deactivate or purge matching subscribers in throttled chunks")
+    parser.add_argument('action', choices=ACTIONS)
+    parser.add_argument('--where',
+                        help="SQL predicate on subscribers aliased s (e.g. \"s.created_at < '2020-01-01'\")")
+    parser.add_argument('--email-like', help="Match emails with this LIKE pattern")
+    parser.add_argument('--inactive-days', type=int,
+                        help="Match subscribers inactive and unchanged for this long (purge only)")
+    parser.add_argument('--chunk-size', type=int, default=500, help="Subscribers per transaction")
+    parser.add_argument('--note', help="History note for deactivations (default: 'Bulk deactivation')")
+    parser.add_argument('--replica', action='append', default=[], metavar='HOST[:PORT]',
+                        help="Replica whose lag throttles the job (repeatable)")
+    parser.add_argument('--max-replica-lag', type=float, default=5.0, help="Seconds of replica lag to tolerate")
+    parser.add_argument('--max-lock-waits', type=int, default=10,
+                        help="Pause while more row lock waits than this are in progress")
+    parser.add_argument('--pause', type=float, default=0.0, help="Seconds to sleep between chunks")
+    parser.add_argument('--checkpoint', help="File recording the last processed id, to resume an interrupted run")
+    parser.add_argument('--dry-run', action='store_true', help="Only count what would change")
+    args = parser.parse_args()
+
+    # It only matches subscribers that are already inactive, which deactivate would never change
+    if args.action == 'deactivate' and args.inactive_days is not None:
+        parser.error("--inactive-days matches already inactive subscribers; use it with purge")
+    try:
+        criterion, params = build_criterion(args.where, args.email_like, args.inactive_days)
+    except LifecycleError as e:
+        parser.error(str(e))
+
+    pool = get_pool()
+    counts = count_matching(pool, args.action, criterion, params)
+    summary = ", ".join(f"{count} {table}" for table, count in counts.items())
+    if args.dry_run:
+        print(f"🔎 {args.action} would touch {summary}")
+        return
+
+    throttle = Throttle(pool, [replica_pool(address) for address in args.replica],
+                        max_replica_lag=args.max_replica_lag if args.replica else None,
+                        max_lock_waits=args.max_lock_waits)
+
+    done = {'chunks': 0, 'changed': 0}
+
+    def progress(changed, last_id):
+        done['chunks'] += 1
+        done['changed'] += changed
+        if done['chunks'] % 20 == 0:
+            print(f"  ... {done['changed']} changed, through id {last_id}")
+
+    def waiting(reasons):
+        print(f"  ⏸️  Waiting: {', '.join(reasons)}")
+
+    print(f"🧹 {args.action}: {summary} match (chunks of {args.chunk_size})")
+    try:
+        report = run_lifecycle(args.action, criterion, params, pool, args.chunk_size, throttle, args.checkpoint,
+                               args.note, args.pause, on_chunk=progress, on_wait=waiting)
+    except LifecycleError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    print(f"✅ {report['changed']} subscribers {args.action}d in {report['elapsed']:.2f}s "
+          f"({report['batches']} chunks, p95 {report['batch_ms_p95']:.1f} ms, "
+          f"throttled {report['throttled_seconds']:.0f}s, {report['retries']} retries)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+#!/usr/bin/env python3
+"""
+Migration Apply-Time Benchmark
+Provisions a scratch schema at a starting version, seeds it to a chosen
+size and applies a range of migrations while a background CRUD load runs,
+recording per-statement wall time, rows affected, lock time and how long
+the load stalled behind each statement.
+"""
+
+import argparse
+import json
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+
+import mysql.connector
+
+from .benchmark import CrudWorkload, parse_mix, run_benchmark
+from .migrations import MigrationError, schema_runner
+from .pool import get_pool
+from .reporting import percentile
+from .seed import TABLE_INSERTS, next_subscriber_id, seed_database
+from .testing import drop_schema, provision_schema
+
+DEFAULT_SCHEMA = 'subscriber_db_migbench'
+DEFAULT_LOAD_MIX = 'insert=20,lookup=50,update_preferences=15,append_history=10,delete=5'
+
+
+def lock_time_ms(cursor):
+    """Lock time of the session's previous statement from performance_schema, or None.
+
+    Needs the events_statements_history consumer (on by default in MySQL 8).
+    """
+    try:
+        cursor.execute(
+            "SELECT h.LOCK_TIME / 1000000000 FROM performance_schema.events_statements_history h "
+            "JOIN performance_schema.threads t ON t.THREAD_ID = h.THREAD_ID "
+            "WHERE t.PROCESSLIST_ID = CONNECTION_ID() ORDER BY h.EVENT_ID DESC LIMIT 1")
+        row = cursor.fetchone()
+    except mysql.connector.Error:
+        return None
+    return float(row[0]) if row and row[0] is not None else None
+
+
+class LoadRecorder:
+    """Collects (op, start, seconds, error) samples from the background load"""
+
+    def __init__(self):
+        self.samples = []
+        self._lock = threading.Lock()
+
+    def record(self, op, started, seconds, error):
+        with self._lock:
+            self.samples.append((started, seconds, error is not None))
+
+    def window(self, start, end):
+        """Latency of operations that overlapped [start, end]"""
+        with self._lock:
+            overlapping = [(seconds, failed) for began, seconds, failed in self.samples
+                           if began < end and began + seconds > start]
+        latencies = [seconds for seconds, failed in overlapping if not failed]
+        return {
+            'ops': len(overlapping),
+            'errors': sum(1 for _, failed in overlapping if failed),
+            'ms_p95': percentile(latencies, 95) * 1000,
+            'ms_max': max(latencies) * 1000 if latencies else 0.0,
+        }
+
+
+class LockMonitor:
+    """Samples how many sessions in a schema are waiting on a lock"""
+
+    def __init__(self, pool, schema, interval=0.05):
+        self.pool = pool
+        self.schema = schema
+        self.interval = interval
+        self.samples = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        with self.pool.connection() as conn:
+            conn.autocommit = True
+            cursor = conn.cursor()
+            try:
+                while not self._stop.is_set():
+                    cursor.execute(
+                        "SELECT COUNT(*) FROM information_schema.processlist "
+                        "WHERE db = %s AND state LIKE %s", (self.schema, 'Waiting for%lock%'))
+                    self.samples.append((time.perf_counter(), cursor.fetchone()[0]))
+                    self._stop.wait(self.interval)
+            finally:
+                cursor.close()
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def window(self, start, end):
+        waiting = [count for at, count in self.samples if start <= at <= end]
+        return {
+            'max_waiting': max(waiting, default=0),
+            'waiting_session_seconds': sum(waiting) * self.interval,
+        }
+
+
+def existing_tables(pool):
+    with pool.cursor() as cursor:
+        cursor.execute("SELECT table_name FROM information_schema.tables WHERE table_schema = DATABASE()")
+        return {row[0] for row in cursor.fetchall()}
+
+
+def statement_label(statement, width=80):
+    text = " ".join(statement.split())
+    return text if len(text) <= width else text[:width - 3] + "..."
+
+
+def run_migration_bench(schema, subscribers, seed, from_version, to_version=None,
+                        load_workers=4, load_mix=None, seed_workers=2, settle=1.0, log=print):
+    """Seed schema at from_version, apply migrations up to to_version under load; returns a report"""
+    log(f"🧱 Provisioning {schema} at V{from_version}")
+    provision_schema(schema, target=from_version)
+    data_pool = get_pool(f"migbench:{schema}", database=schema, max_size=max(seed_workers * 3, load_workers, 1))
+
+    tables = existing_tables(data_pool) & set(TABLE_INSERTS)
+    seeded = None
+    if subscribers and 'subscribers' in tables:
+        log(f"🌱 Seeding {subscribers} subscribers into {', '.join(sorted(tables))}")
+        seeded = seed_database(data_pool, subscribers, next_subscriber_id(data_pool), seed,
+                               workers=seed_workers, tables=tables)
+
+    monitor = LockMonitor(get_pool('admin', admin=True), schema)
+    recorder = LoadRecorder()
+    stop = threading.Event()
+    load_report = {}
+    load_thread = None
+    if load_workers:
+        workload = CrudWorkload(data_pool)
+
+        def background():
+            load_report.update(run_benchmark(workload, load_mix or parse_mix(DEFAULT_LOAD_MIX),
+                                             load_workers, seed=seed, stop=stop, on_op=recorder.record))
+
+        load_thread = threading.Thread(target=background, daemon=True)
+        load_thread.start()
+    monitor.start()
+
+    load_started = time.perf_counter()
+    time.sleep(settle)
+    migrations_started = time.perf_counter()
+    statements = []
+
+    def on_statement(migration, statement, seconds, rowcount, cursor):
+        end = time.perf_counter()
+        statements.append({
+            'version': migration.version,
+            'script': migration.script,
+            'statement': statement_label(statement),
+            'seconds': seconds,
+            'rowcount': rowcount,
+            'lock_time_ms': lock_time_ms(cursor),
+            'window': (end - seconds, end),
+        })
+
+    runner = schema_runner(schema, admin=True)
+    error = None
+    try:
+        log(f"🚀 Applying migrations V{from_version} -> {f'V{to_version}' if to_version else 'latest'}")
+        results = runner.migrate(target=to_version, on_statement=on_statement)
+    except MigrationError as e:
+        results, error = [], str(e)
+    finally:
+        runner.pool.close()
+        migrations_finished = time.perf_counter()
+        time.sleep(settle)
+        stop.set()
+        if load_thread:
+            load_thread.join()
+        monitor.stop()
+
+    for entry in statements:
+        start, end = entry.pop('window')
+        entry['load'] = recorder.window(start, end)
+        entry['locks'] = monitor.window(start, end)
+
+    return {
+        'schema': schema,
+        'subscribers': subscribers,
+        'seed': seed,
+        'from_version': from_version,
+        'to_version': to_version,
+        'load_workers': load_workers,
+        'checked_at': datetime.now(timezone.utc).isoformat(),
+        'seeded': seeded,
+        'baseline_load': recorder.window(load_started, migrations_started),
+        'migrations': results,
+        'migration_seconds': migrations_finished - migrations_started,
+        'statements': statements,
+        'load': {key: load_report.get(key) for key in ('total_ops', 'ops_per_sec', 'errors', 'first_errors')},
+        'error': error,
+    }
+
+
+def print_report(report):
+    baseline = report['baseline_load']
+    print(f"\nBackground load before migrating: p95 {baseline['ms_p95']:.1f} ms, max {baseline['ms_max']:.1f} ms")
+    print(f"{'Version':<8} {'Seconds':>8} {'Rows':>10} {'Lock ms':>9} {'Load p95':>9} {'Load max':>9} "
+          f"{'Waiting':>8}  Statement")
+    for entry in report['statements']:
+        lock = f"{entry['lock_time_ms']:.1f}" if entry['lock_time_ms'] is not None else 'n/a'
+        print(f"V{entry['version']:<7} {entry['seconds']:>8.3f} {entry['rowcount']:>10} {lock:>9} "
+              f"{entry['load']['ms_p95']:>9.1f} {entry['load']['ms_max']:>9.1f} "
+              f"{entry['locks']['max_waiting']:>8}  {entry['statement']}")
+    print(f"\nMigrations took {report['migration_seconds']:.2f}s")
+    if report['error']:
+        print(f"❌ {report['error']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time migrations against a seeded scratch database")
+    parser.add_argument('--subscribers', '-n', type=int, default=100000, help="Subscribers to seed")
+    parser.add_argument('--seed', type=int, default=0, help="Seed for the data and the load")
+    parser.add_argument('--from', dest='from_version', default='3',
+                        help="Version the scratch schema is migrated to before seeding")
+    parser.add_argument('--to', dest='to_version', help="Last version to apply (default: latest)")
+    parser.add_argument('--schema', default=DEFAULT_SCHEMA, help="Scratch schema (dropped and recreated)")
+    parser.add_argument('--load-workers', type=int, default=4, help="Background CRUD workers (0 disables)")
+    parser.add_argument('--load-mix', default=DEFAULT_LOAD_MIX, help="Background operation weights")
+    parser.add_argument('--seed-workers', type=int, default=2, help="Loader threads per table")
+    parser.add_argument('--output', '-o', help="Write the JSON report to this file")
+    parser.add_argument('--keep', action='store_true', help="Keep the scratch schema afterwards")
+    args = parser.parse_args()
+
+    try:
+        load_mix = parse_mix(args.load_mix)
+    except ValueError as e:
+        parser.error(str(e))
+
+    try:
+        report = run_migration_bench(args.schema, args.subscribers, args.seed, args.from_version,
+                                     args.to_version, args.load_workers, load_mix, args.seed_workers)
+    finally:
+        if not args.keep:
+            drop_schema(args.schema)
+
+    print_report(report)
+    if args.output:
+        with open(args.output, 'w') as handle:
+            json.dump(report, handle, indent=2, default=str)
+        print(f"📝 Report written to {args.output}")
+    if report['error']:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,525 @@
+#!/usr/bin/env python3
+"""
+In-process Flyway-compatible migration runner
+Reads flyway.conf, finds V<version>__<description>.sql scripts in the
+configured locations, and migrates/validates/reports against the same
+flyway_schema_history table (and checksums) that Flyway itself uses.
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+import zlib
+from urllib.parse import urlparse
+
+from .config import admin_config, db_config
+from .online_schema import OnlineSchemaChange, parse_alter, parse_marker
+from .pool import ConnectionPool, get_pool
+
+MIGRATION_PATTERN = re.compile(r'^V(\d+(?:[._]\d+)*)__(.+)\.sql$')
+
+DELIMITER_PATTERN = re.compile(r'[ \t\r\n]*DELIMITER[ \t]+(\S+)[^\n]*(?:\n|$)', re.IGNORECASE)
+
+LINE_BREAK_PATTERN = re.compile(r'\r\n|\r|\n')
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HISTORY_TABLE_DDL = """
+    CREATE TABLE IF NOT EXISTS `{table}` (
+        `installed_rank` INT NOT NULL,
+        `version` VARCHAR(50),
+        `description` VARCHAR(200) NOT NULL,
+        `type` VARCHAR(20) NOT NULL,
+        `script` VARCHAR(1000) NOT NULL,
+        `checksum` INT,
+        `installed_by` VARCHAR(100) NOT NULL,
+        `installed_on` TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+        `execution_time` INT NOT NULL,
+        `success` BOOL NOT NULL,
+        CONSTRAINT `{table}_pk` PRIMARY KEY (`installed_rank`),
+        INDEX `{table}_s_idx` (`success`)
+    ) ENGINE=InnoDB
+"""
+
+BASELINE_DESCRIPTION = '<< Flyway Baseline >>'
+
+
+class MigrationError(Exception):
+    """Raised when migrate or validate finds the schema history inconsistent"""
+
+
+class Migration:
+    """A versioned SQL migration script"""
+
+    def __init__(self, path, location):
+        self.path = path
+        self.location = location
+        self.script = os.path.relpath(path, location).replace(os.sep, '/')
+        match = MIGRATION_PATTERN.match(os.path.basename(path))
+        if not match:
+            raise ValueError(f"Not a versioned migration: {path}")
+        self.version = match.group(1).replace('_', '.')
+        self.description = match.group(2).replace('_', ' ')
+
+    @property
+    def version_key(self):
+        return tuple(int(part) for part in self.version.split('.'))
+
+    def read(self):
+        with open(self.path, encoding='utf-8-sig') as handle:
+            return handle.read()
+
+    def statements(self):
+        return split_statements(self.read())
+
+    @property
+    def checksum(self):
+        return flyway_checksum(self.read())
+
+    @property
+    def online_options(self):
+        """Options from an online-schema-change marker, or None for a plain migration"""
+        return parse_marker(self.read())
+
+    def __repr__(self):
+        return f"Migration(V{self.version}, {self.description!r})"
+
+
+def flyway_checksum(text):
+    """Return Flyway's checksum for a script: signed CRC32 of its lines without line breaks"""
+    if text.startswith('\ufeff'):
+        text = text[1:]
+    lines = LINE_BREAK_PATTERN.split(text)
+    if lines and lines[-1] == '':
+        lines.pop()
+    crc = 0
+    for line in lines:
+        crc = zlib.crc32(line.encode('utf-8'), crc)
+    return crc - (1 << 32) if crc >= (1 << 31) else crc
+
+
+def read_flyway_conf(path=None):
+    """Parse flyway.conf into a dict of flyway.* settings"""
+    path = path or os.path.join(REPO_ROOT, 'flyway.conf')
+    settings = {}
+    with open(path, encoding='utf-8') as handle:
+        for line in handle:
+            line = line.strip()
+            if not line or line.startswith('#') or '=' not in line:
+                continue
+            key, value = line.split('=', 1)
+            settings[key.strip()] = value.strip()
+    return settings
+
+
+def configured_locations(settings=None, base_dir=None):
+    """Return filesystem directories from flyway.locations"""
+    settings = settings if settings is not None else read_flyway_conf()
+    base_dir = base_dir or REPO_ROOT
+    locations = []
+    for location in settings.get('flyway.locations', 'filesystem:sql').split(','):
+        location = location.strip()
+        if location.startswith('filesystem:'):
+            location = location[len('filesystem:'):]
+        locations.append(os.path.join(base_dir, location))
+    return locations
+
+
+def connection_settings(settings=None):
+    """Build mysql.connector arguments from flyway.url/user/password.
+
+    FLYWAY_URL, FLYWAY_USER and FLYWAY_PASSWORD override everything, as
+    with the Flyway CLI. Otherwise DB_HOST, DB_PORT, DB_NAME, DB_USER and
+    DB_PASSWORD override the file, as they do for config.db_config, so the
+    runner reaches the same server (e.g. compose's 3307 mapping) as the
+    rest of the tools.
+    """
+    settings = settings if settings is not None else read_flyway_conf()
+    url = os.getenv('FLYWAY_URL', settings.get('flyway.url', ''))
+    if not url.startswith('jdbc:mysql://'):
+        raise ValueError(f"Unsupported flyway.url: {url!r}")
+    parsed = urlparse(url[len('jdbc:'):])
+    config = {
+        'host': parsed.hostname or '127.0.0.1',
+        'port': parsed.port or 3306,
+        'user': settings.get('flyway.user', 'root'),
+        'password': settings.get('flyway.password', ''),
+    }
+    database = parsed.path.lstrip('/')
+    if 'FLYWAY_URL' not in os.environ:
+        config['host'] = os.getenv('DB_HOST', config['host'])
+        config['port'] = int(os.getenv('DB_PORT', config['port']))
+        database = os.getenv('DB_NAME', database)
+    config['user'] = os.getenv('FLYWAY_USER', os.getenv('DB_USER', config['user']))
+    config['password'] = os.getenv('FLYWAY_PASSWORD', os.getenv('DB_PASSWORD', config['password']))
+    if database:
+        config['database'] = database
+    return config
+
+
+def discover_migrations(locations=None):
+    """Return versioned migrations across locations, ordered by version"""
+    locations = locations or configured_locations()
+    found = {}
+    for location in locations:
+        for dirpath, _, filenames in os.walk(location):
+            for filename in sorted(filenames):
+                if not MIGRATION_PATTERN.match(filename):
+                    continue
+                migration = Migration(os.path.join(dirpath, filename), location)
+                if migration.version_key in found:
+                    raise ValueError(
+                        f"Found more than one migration with version {migration.version}: "
+                        f"{found[migration.version_key].path}, {migration.path}")
+                found[migration.version_key] = migration
+    return [found[key] for key in sorted(found)]
+
+
+def split_statements(sql):
+    """Split a MySQL script into statements.
+
+    Honours quotes, backticks, --/# and /* */ comments, and DELIMITER
+    directives (needed for trigger and procedure bodies).
+    """
+    statements = []
+    buffer = []
+    delimiter = ';'
+    i = 0
+    length = len(sql)
+
+    started = False
+
+    def flush():
+        statement = ''.join(buffer).strip()
+        if statement:
+            statements.append(statement)
+        buffer.clear()
+
+    while i < length:
+        if not started:
+            match = DELIMITER_PATTERN.match(sql, i)
+            if match:
+                delimiter = match.group(1)
+                buffer.clear()
+                i = match.end()
+                continue
+        char = sql[i]
+        if char in ("'", '"', '`'):
+            end = i + 1
+            while end < length:
+                if sql[end] == '\\' and char != '`':
+                    end += 2
+                    continue
+                if sql[end] == char:
+                    if end + 1 < length and sql[end + 1] == char:
+                        end += 2
+                        continue
+                    break
+                end += 1
+            buffer.append(sql[i:end + 1])
+            started = True
+            i = end + 1
+        elif sql.startswith('--', i) and (i + 2 >= length or sql[i + 2] in ' \t\r\n') or char == '#':
+            end = sql.find('\n', i)
+            i = length if end == -1 else end
+        elif sql.startswith('/*', i) and not sql.startswith('/*!', i):
+            end = sql.find('*/', i + 2)
+            i = length if end == -1 else end + 2
+        elif sql.startswith(delimiter, i):
+            flush()
+            started = False
+            i += len(delimiter)
+        else:
+            buffer.append(char)
+            started = started or not char.isspace()
+            i += 1
+    flush()
+    return statements
+
+
+
+HISTORY_COLUMNS = ('installed_rank', 'version', 'description', 'type', 'script', 'checksum',
+                   'installed_by', 'installed_on', 'execution_time', 'success')
+
+
+def version_key(version):
+    return tuple(int(part) for part in version.split('.'))
+
+
+
+class MigrationRunner:
+    """Applies pending migrations and maintains flyway_schema_history"""
+
+    def __init__(self, pool=None, migrations=None, settings=None):
+        self.settings = settings if settings is not None else read_flyway_conf()
+        self.pool = pool or get_pool('migrations', **connection_settings(self.settings))
+        if migrations is None:
+            migrations = discover_migrations(configured_locations(self.settings))
+        self.migrations = migrations
+        self.table = self.settings.get('flyway.table', 'flyway_schema_history')
+        self.baseline_on_migrate = self.settings.get('flyway.baselineOnMigrate', 'false') == 'true'
+        self.validate_on_migrate = self.settings.get('flyway.validateOnMigrate', 'true') == 'true'
+        self.baseline_version = self.settings.get('flyway.baselineVersion', '1')
+
+    def _session(self):
+        conn = self.pool.connection()
+        conn.autocommit = True
+        return conn, conn.cursor()
+
+    def _history(self, cursor):
+        """Return history rows as dicts, or None when the table does not exist"""
+        cursor.execute(
+            "SELECT COUNT(*) FROM information_schema.tables "
+            "WHERE table_schema = DATABASE() AND table_name = %s", (self.table,))
+        if not cursor.fetchone()[0]:
+            return None
+        cursor.execute(f"SELECT {', '.join(HISTORY_COLUMNS)} FROM `{self.table}` ORDER BY installed_rank")
+        return [dict(zip(HISTORY_COLUMNS, row)) for row in cursor.fetchall()]
+
+    def _record(self, cursor, history, version, description, kind, script, checksum,
+                execution_ms, success):
+        rank = max([row['installed_rank'] for row in history] or [0]) + 1
+        cursor.execute(
+            f"INSERT INTO `{self.table}` (installed_rank, version, description, type, script, "
+            f"checksum, installed_by, execution_time, success) "
+            f"VALUES (%s, %s, %s, %s, %s, %s, SUBSTRING_INDEX(USER(), '@', 1), %s, %s)",
+            (rank, version, description, kind, script, checksum, execution_ms, success))
+        history.append({'installed_rank': rank, 'version': version, 'description': description,
+                        'type': kind, 'script': script, 'checksum': checksum,
+                        'execution_time': execution_ms, 'success': success})
+
+    def states(self, history):
+        """Combine local migrations and history rows into `flyway info` style entries"""
+        applied = {}
+        baseline = None
+        for row in history:
+            if row['type'] == 'BASELINE':
+                baseline = version_key(row['version'])
+            elif row['version'] is not None:
+                applied[version_key(row['version'])] = row
+        latest = max(list(applied) + ([baseline] if baseline else []), default=None)
+
+        entries = []
+        if baseline:
+            entries.append({'version': '.'.join(map(str, baseline)), 'description': BASELINE_DESCRIPTION,
+                            'state': 'Baseline', 'migration': None, 'row': None})
+        local = {m.version_key: m for m in self.migrations}
+        for key in sorted(set(local) | set(applied)):
+            migration = local.get(key)
+            row = applied.get(key)
+            if row is not None:
+                if not row['success']:
+                    state = 'Failed'
+                elif migration is None:
+                    state = 'Missing'
+                else:
+                    state = 'Success'
+            elif baseline and key <= baseline:
+                state = 'Below Baseline'
+            elif latest and key < latest:
+                state = 'Ignored'
+            else:
+                state = 'Pending'
+            entries.append({
+                'version': migration.version if migration else row['version'],
+                'description': migration.description if migration else row['description'],
+                'state': state,
+                'migration': migration,
+                'row': row,
+            })
+        return entries
+
+    def validation_errors(self, entries, allow_pending=False):
+        """Return Flyway-style validation errors for info entries"""
+        errors = []
+        for entry in entries:
+            state, version = entry['state'], entry['version']
+            if state == 'Failed':
+                errors.append(f"Detected failed migration to version {version} ({entry['description']}); "
+                              f"remove its partial changes and history row before migrating")
+            elif state == 'Missing':
+                errors.append(f"Detected applied migration not resolved locally: {version}")
+            elif state == 'Success' and entry['row']['checksum'] != entry['migration'].checksum:
+                errors.append(f"Migration checksum mismatch for migration version {version}: "
+                              f"applied {entry['row']['checksum']}, "
+                              f"resolved locally {entry['migration'].checksum}")
+            elif state == 'Ignored':
+                errors.append(f"Detected resolved migration not applied to database: {version} (out of order)")
+            elif state == 'Pending' and not allow_pending:
+                errors.append(f"Detected resolved migration not applied to database: {version}")
+        return errors
+
+    def info(self):
+        """Return the state of every migration, like `flyway info`"""
+        conn, cursor = self._session()
+        try:
+            return self.states(self._history(cursor) or [])
+        finally:
+            cursor.close()
+            conn.close()
+
+    def validate(self, allow_pending=False):
+        """Return validation errors, like `flyway validate` (empty list means valid)"""
+        return self.validation_errors(self.info(), allow_pending)
+
+    def baseline(self):
+        """Create the history table with a baseline row for an existing schema"""
+        conn, cursor = self._session()
+        try:
+            history = self._history(cursor)
+            if history:
+                raise MigrationError(f"Schema history table `{self.table}` is not empty; cannot baseline")
+            cursor.execute(HISTORY_TABLE_DDL.format(table=self.table))
+            self._record(cursor, [], self.baseline_version, BASELINE_DESCRIPTION, 'BASELINE',
+                         BASELINE_DESCRIPTION, None, 0, True)
+        finally:
+            cursor.close()
+            conn.close()
+
+    def migrate(self, target=None, on_migration=None, on_statement=None):
+        """Apply pending migrations up to target; returns per-migration results.
+
+        on_statement(migration, statement, seconds, rowcount, cursor) is
+        called after every statement; on_migration(result) after every script.
+        """
+        conn, cursor = self._session()
+        lock_name = f"flyway:{self.table}"
+        try:
+            cursor.execute("SELECT DATABASE(), GET_LOCK(CONCAT(DATABASE(), ':', %s), 60)", (lock_name,))
+            database, locked = cursor.fetchone()
+            if not locked:
+                raise MigrationError(f"Timed out waiting for the migration lock on {database}")
+            try:
+                return self._migrate_locked(cursor, target, on_migration, on_statement)
+            finally:
+                cursor.execute("SELECT RELEASE_LOCK(CONCAT(DATABASE(), ':', %s))", (lock_name,))
+                cursor.fetchall()
+        finally:
+            cursor.close()
+            conn.close()
+
+    def _migrate_locked(self, cursor, target, on_migration, on_statement):
+        history = self._history(cursor)
+        if history is None:
+            cursor.execute(
+                "SELECT COUNT(*) FROM information_schema.tables WHERE table_schema = DATABASE()")
+            non_empty = cursor.fetchone()[0] > 0
+            if non_empty and not self.baseline_on_migrate:
+                raise MigrationError("Found non-empty schema without schema history table; "
+                                     "run baseline or set flyway.baselineOnMigrate=true")
+            cursor.execute(HISTORY_TABLE_DDL.format(table=self.table))
+            history = []
+            if non_empty:
+                self._record(cursor, history, self.baseline_version, BASELINE_DESCRIPTION, 'BASELINE',
+                             BASELINE_DESCRIPTION, None, 0, True)
+
+        entries = self.states(history)
+        if self.validate_on_migrate:
+            errors = self.validation_errors(entries, allow_pending=True)
+            if errors:
+                raise MigrationError("Validate failed:\n  " + "\n  ".join(errors))
+
+        target_key = version_key(target) if target else None
+        results = []
+        for entry in entries:
+            migration = entry['migration']
+            if entry['state'] != 'Pending':
+                continue
+            if target_key and migration.version_key > target_key:
+                break
+            results.append(self._apply(cursor, history, migration, on_statement))
+            if on_migration:
+                on_migration(results[-1])
+        return results
+
+    def _apply(self, cursor, history, migration, on_statement):
+        started = time.monotonic()
+        statements = migration.statements()
+        try:
+            online = migration.online_options
+            for statement in statements:
+                statement_started = time.monotonic()
+                alter = parse_alter(statement) if online is not None else None
+                if alter:
+                    rowcount = OnlineSchemaChange(cursor, *alter, **online).run()['rows_copied']
+                else:
+                    cursor.execute(statement)
+                    if cursor.with_rows:
+                        cursor.fetchall()
+                    rowcount = cursor.rowcount
+                if on_statement:
+                    on_statement(migration, statement, time.monotonic() - statement_started,
+                                 rowcount, cursor)
+        except Exception as e:
+            execution_ms = int((time.monotonic() - started) * 1000)
+            self._record(cursor, history, migration.version, migration.description, 'SQL',
+                         migration.script, migration.checksum, execution_ms, False)
+            raise MigrationError(f"Migration V{migration.version} ({migration.script}) failed: {e}") from e
+        execution_ms = int((time.monotonic() - started) * 1000)
+        self._record(cursor, history, migration.version, migration.description, 'SQL',
+                     migration.script, migration.checksum, execution_ms, True)
+        return {
+            'version': migration.version,
+            'description': migration.description,
+            'script': migration.script,
+            'statements': len(statements),
+            'execution_ms': execution_ms,
+        }
+
+
+def schema_runner(database, admin=False):
+    """Return a MigrationRunner bound to a single-connection pool on database"""
+    config = admin_config(database=database) if admin else db_config(database=database)
+    return MigrationRunner(pool=ConnectionPool(min_size=0, max_size=1, **config))
+
+
+def print_info(entries):
+    print(f"{'Version':<10} {'Description':<40} {'State':<15} {'Installed on':<20} {'Time (ms)':>9}")
+    for entry in entries:
+        row = entry['row'] or {}
+        installed = row.get('installed_on')
+        print(f"{entry['version']:<10} {entry['description'][:40]:<40} {entry['state']:<15} "
+              f"{str(installed) if installed else '':<20} {row.get('execution_time', ''):>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Flyway-compatible migrations without the JVM")
+    parser.add_argument('command', choices=['migrate', 'validate', 'info', 'baseline'])
+    parser.add_argument('--config', help="Path to flyway.conf (default: repository flyway.conf)")
+    parser.add_argument('--target', help="Migrate up to and including this version")
+    args = parser.parse_args()
+
+    started = time.monotonic()
+    runner = MigrationRunner(settings=read_flyway_conf(args.config))
+    try:
+        if args.command == 'info':
+            print_info(runner.info())
+        elif args.command == 'validate':
+            errors = runner.validate()
+            if errors:
+                for error in errors:
+                    print(f"❌ {error}")
+                sys.exit(1)
+            print(f"✅ Successfully validated {len(runner.migrations)} migrations")
+        elif args.command == 'baseline':
+            runner.baseline()
+            print(f"✅ Baselined schema at version {runner.baseline_version}")
+        else:
+            def report(result):
+                print(f"  ✅ V{result['version']} {result['description']} "
+                      f"({result['statements']} statements, {result['execution_ms']} ms)")
+            results = runner.migrate(target=args.target, on_migration=report)
+            if not results:
+                print("✅ Schema is up to date. No migration necessary.")
+            else:
+                print(f"✅ Successfully applied {len(results)} migrations")
+    except MigrationError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    print(f"⏱️  Completed in {time.monotonic() - started:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,386 @@
+"""
+Online Schema Change
+Applies ALTER TABLE without blocking writes for the whole table copy: the
+new definition is built on an empty shadow table, triggers mirror writes
+into it while existing rows are copied in throttled primary-key chunks,
+and RENAME TABLE swaps the two atomically.
+
+A migration opts in with a marker comment, optionally followed by options:
+
+    -- online-schema-change chunk-time=0.5 max-threads-running=40
+    ALTER TABLE subscribers ADD COLUMN locale VARCHAR(10) NULL AFTER is_active;
+
+Only the Python migration runner understands the marker; the Flyway CLI
+would run the ALTER directly.
+"""
+
+import re
+import time
+
+MARKER_PATTERN = re.compile(r'^[ \t]*--[ \t]*online-schema-change\b([^\r\n]*)', re.IGNORECASE | re.MULTILINE)
+ALTER_PATTERN = re.compile(r'^\s*ALTER\s+TABLE\s+`?(\w+)`?\s+(.+?)\s*;?\s*$', re.IGNORECASE | re.DOTALL)
+# Clauses that rename tables or columns cannot be mirrored by column name
+UNSUPPORTED_PATTERN = re.compile(r'\b(RENAME|CHANGE)\b', re.IGNORECASE)
+CONSTRAINT_PATTERN = re.compile(r'CONSTRAINT `([^`]+)`')
+DEFINER_PATTERN = re.compile(r"^(CREATE\s+)DEFINER\s*=\s*(?:`[^`]*`|'[^']*'|[^\s@]+)@(?:`[^`]*`|'[^']*'|\S+)\s+",
+                             re.IGNORECASE)
+
+OPTION_TYPES = {
+    'chunk-size': ('chunk_size', int),
+    'chunk-time': ('chunk_time', float),
+    'max-threads-running': ('max_threads_running', int),
+    'sleep-ratio': ('sleep_ratio', float),
+    'keep-old': ('drop_old', lambda value: value.lower() not in ('1', 'true', 'yes')),
+}
+
+MIN_CHUNK_SIZE = 100
+MAX_CHUNK_SIZE = 50000
+
+
+class OnlineSchemaError(Exception):
+    """Raised when an ALTER cannot be applied online"""
+
+
+def parse_marker(sql):
+    """Return the marker's options as OnlineSchemaChange kwargs, or None when unmarked"""
+    match = MARKER_PATTERN.search(sql)
+    if not match:
+        return None
+    options = {}
+    for item in match.group(1).split():
+        key, _, value = item.partition('=')
+        if key not in OPTION_TYPES or not value:
+            raise OnlineSchemaError(f"Unknown online-schema-change option: {item!r}")
+        name, convert = OPTION_TYPES[key]
+        options[name] = convert(value)
+    return options
+
+
+def parse_alter(statement):
+    """Return (table, alter specification) for an ALTER TABLE statement, else None"""
+    match = ALTER_PATTERN.match(statement)
+    if not match:
+        return None
+    return match.group(1), match.group(2)
+
+
+def toggle_name(name):
+    """Alternate a constraint name between 'name' and '_name' so old and new can coexist"""
+    toggled = name[1:] if name.startswith('_') else '_' + name
+    if len(toggled) > 64:
+        raise OnlineSchemaError(f"Constraint name too long to toggle: {name}")
+    return toggled
+
+
+def shadow_definition(create_sql, table, shadow):
+    """Rewrite SHOW CREATE TABLE output for the shadow table with toggled constraint names"""
+    head = f"CREATE TABLE `{table}`"
+    if not create_sql.startswith(head):
+        raise OnlineSchemaError(f"Unexpected definition for {table}: {create_sql[:60]!r}")
+    body = CONSTRAINT_PATTERN.sub(lambda m: f"CONSTRAINT `{toggle_name(m.group(1))}`", create_sql[len(head):])
+    return f"CREATE TABLE `{shadow}`" + body
+
+
+def strip_definer(create_sql):
+    """Drop the DEFINER clause from SHOW CREATE TRIGGER output, so it is recreated as the current user"""
+    return DEFINER_PATTERN.sub(r"\1", create_sql, count=1)
+
+
+def quote_columns(columns, prefix=''):
+    return ", ".join(f"{prefix}`{column}`" for column in columns)
+
+
+def keyset_predicate(key, op, values):
+    """Compare the primary key columns, in index order, with values: op is '>' (after) or '<=' (up to).
+
+    Spelled out as OR-ed prefix comparisons rather than a row constructor,
+    so each branch is a range on the primary key. Returns (sql, params).
+    """
+    strict = '>' if op == '>' else '<'
+    branches, params = [], []
+    for i, column in enumerate(key):
+        final = i == len(key) - 1
+        terms = [f"`{prefix}` = %s" for prefix in key[:i]] + [f"`{column}` {op if final else strict} %s"]
+        branches.append(" AND ".join(terms))
+        params.extend(values[:i + 1])
+    if len(branches) == 1:
+        return branches[0], params
+    return "(" + " OR ".join(f"({branch})" for branch in branches) + ")", params
+
+
+def trigger_statements(table, shadow, columns, key):
+    """Return (name, CREATE TRIGGER sql) pairs that mirror writes on table into shadow.
+
+    key is the list of primary key columns. Updates use INSERT ... ON
+    DUPLICATE KEY UPDATE rather than REPLACE: once child foreign keys
+    point at the shadow, the delete half of a REPLACE would cascade into
+    the children.
+    """
+    names = quote_columns(columns)
+    new_values = quote_columns(columns, 'NEW.')
+    assignments = ", ".join(f"`{column}` = VALUES(`{column}`)" for column in columns if column not in key)
+    upsert = (f"INSERT INTO `{shadow}` ({names}) VALUES ({new_values}) "
+              f"ON DUPLICATE KEY UPDATE {assignments or f'`{key[0]}` = `{key[0]}`'}")
+    old_row = " AND ".join(f"`{column}` = OLD.`{column}`" for column in key)
+    key_changed = " OR ".join(f"NOT (OLD.`{column}` <=> NEW.`{column}`)" for column in key)
+    return [
+        (f"osc_{table}_ins", f"CREATE TRIGGER `osc_{table}_ins` AFTER INSERT ON `{table}` "
+                             f"FOR EACH ROW {upsert}"),
+        (f"osc_{table}_upd", f"CREATE TRIGGER `osc_{table}_upd` AFTER UPDATE ON `{table}` FOR EACH ROW BEGIN "
+                             f"IF {key_changed} THEN "
+                             f"DELETE FROM `{shadow}` WHERE {old_row}; END IF; "
+                             f"{upsert}; END"),
+        (f"osc_{table}_del", f"CREATE TRIGGER `osc_{table}_del` AFTER DELETE ON `{table}` "
+                             f"FOR EACH ROW DELETE FROM `{shadow}` WHERE {old_row}"),
+    ]
+
+
+class OnlineSchemaChange:
+    """Runs one ALTER TABLE online on an autocommit cursor.
+
+    Steps: build the shadow table and apply the ALTER to it, install sync
+    triggers, copy rows in primary-key chunks sized to chunk_time (pausing
+    while Threads_running exceeds max_threads_running), repoint child
+    foreign keys at the shadow, then RENAME both tables in one statement.
+    Other triggers on the table (the V4 reference checks, the V5
+    counters) are moved to the new table under the same write lock as the
+    rename, so no write runs without them. On failure everything is
+    rolled back, including a half-done swap.
+    """
+
+    def __init__(self, cursor, table, alter_spec, chunk_size=1000, chunk_time=0.5,
+                 max_threads_running=50, sleep_ratio=0.0, drop_old=True, on_progress=None,
+                 sleep=time.sleep):
+        if UNSUPPORTED_PATTERN.search(alter_spec):
+            raise OnlineSchemaError(f"RENAME/CHANGE cannot be applied online: {alter_spec}")
+        self.cursor = cursor
+        self.table = table
+        self.alter_spec = alter_spec
+        self.shadow = f"_{table}_new"
+        self.old = f"_{table}_old"
+        self.chunk_size = chunk_size
+        self.chunk_time = chunk_time
+        self.max_threads_running = max_threads_running
+        self.sleep_ratio = sleep_ratio
+        self.drop_old = drop_old
+        self.on_progress = on_progress
+        self.sleep = sleep
+        self.triggers = []
+        self.child_keys_moved = False
+
+    def _query(self, sql, params=()):
+        self.cursor.execute(sql, params)
+        return self.cursor.fetchall()
+
+    def _columns(self, table):
+        return [row[0] for row in self._query(
+            "SELECT column_name FROM information_schema.columns "
+            "WHERE table_schema = DATABASE() AND table_name = %s AND generation_expression = '' "
+            "ORDER BY ordinal_position", (table,))]
+
+    def _primary_key(self, table):
+        """The primary key columns in index order (composite keys are copied by keyset on all of them)"""
+        columns = [row[0] for row in self._query(
+            "SELECT column_name FROM information_schema.key_column_usage "
+            "WHERE table_schema = DATABASE() AND table_name = %s AND constraint_name = 'PRIMARY' "
+            "ORDER BY ordinal_position", (table,))]
+        if not columns:
+            raise OnlineSchemaError(f"{table} needs a primary key")
+        return columns
+
+    def _child_foreign_keys(self, parent):
+        rows = self._query(
+            "SELECT k.table_name, k.constraint_name, k.column_name, k.referenced_column_name, "
+            "r.update_rule, r.delete_rule "
+            "FROM information_schema.key_column_usage k "
+            "JOIN information_schema.referential_constraints r "
+            "ON r.constraint_schema = k.constraint_schema AND r.constraint_name = k.constraint_name "
+            "AND r.table_name = k.table_name "
+            "WHERE k.referenced_table_schema = DATABASE() AND k.referenced_table_name = %s "
+            "ORDER BY k.table_name, k.constraint_name, k.ordinal_position", (parent,))
+        keys = {}
+        for child, name, column, referenced, update_rule, delete_rule in rows:
+            key = keys.setdefault((child, name), {'child': child, 'name': name, 'columns': [],
+                                                  'referenced': [], 'on_update': update_rule,
+                                                  'on_delete': delete_rule})
+            key['columns'].append(column)
+            key['referenced'].append(referenced)
+        return list(keys.values())
+
+    def _table_exists(self, table):
+        return self._query(
+            "SELECT COUNT(*) FROM information_schema.tables WHERE table_schema = DATABASE() AND table_name = %s",
+            (table,))[0][0] > 0
+
+    def _other_triggers(self):
+        return [row[0] for row in self._query(
+            "SELECT trigger_name FROM information_schema.triggers "
+            "WHERE event_object_schema = DATABASE() AND event_object_table = %s "
+            "ORDER BY action_timing, event_manipulation, action_order", (self.table,))
+            if not row[0].startswith(f"osc_{self.table}_")]
+
+    def run(self):
+        """Apply the ALTER online; returns a report dict"""
+        for name in (self.shadow, self.old):
+            if self._table_exists(name):
+                raise OnlineSchemaError(f"{name} already exists; drop it after checking it is a leftover")
+        key = self._primary_key(self.table)
+        if any(fk['child'] == self.table for fk in self._child_foreign_keys(self.table)):
+            raise OnlineSchemaError(f"{self.table} references itself; not supported online")
+
+        started = time.monotonic()
+        try:
+            create_sql = self._query(f"SHOW CREATE TABLE `{self.table}`")[0][1]
+            self.cursor.execute(shadow_definition(create_sql, self.table, self.shadow))
+            self.cursor.execute(f"ALTER TABLE `{self.shadow}` {self.alter_spec}")
+            if self._primary_key(self.shadow) != key:
+                raise OnlineSchemaError("The ALTER may not change the primary key")
+            shadow_columns = set(self._columns(self.shadow))
+            columns = [column for column in self._columns(self.table) if column in shadow_columns]
+
+            for name, sql in trigger_statements(self.table, self.shadow, columns, key):
+                self.cursor.execute(sql)
+                self.triggers.append(name)
+
+            copied, chunks = self._copy(columns, key)
+            copy_seconds = time.monotonic() - started
+            self._move_child_foreign_keys(self.table, self.shadow)
+        except BaseException:
+            self._abort()
+            raise
+
+        swap_started = time.monotonic()
+        try:
+            other_triggers = [(name, strip_definer(self._query(f"SHOW CREATE TRIGGER `{name}`")[0][2]))
+                              for name in self._other_triggers()]
+            self._swap(other_triggers)
+        except BaseException:
+            self._abort()
+            raise
+        swap_seconds = time.monotonic() - swap_started
+        if self.drop_old:
+            self.cursor.execute(f"DROP TABLE `{self.old}`")
+
+        return {
+            'table': self.table,
+            'rows_copied': copied,
+            'chunks': chunks,
+            'copy_seconds': copy_seconds,
+            'swap_seconds': swap_seconds,
+            'seconds': time.monotonic() - started,
+            'old_table': None if self.drop_old else self.old,
+        }
+
+    def _swap(self, other_triggers):
+        """Rename the shadow into place and move the other triggers onto it, all under one write lock.
+
+        Triggers follow their table through the rename, so the originals end
+        up on the old table; names are schema-wide, so each is dropped there
+        before it is created on the new one. If any step fails the rename is
+        reversed and the original triggers recreated before the lock is
+        released.
+        """
+        renamed = False
+        dropped = []
+        self.cursor.execute(f"LOCK TABLES `{self.table}` WRITE, `{self.shadow}` WRITE")
+        try:
+            try:
+                self.cursor.execute(f"RENAME TABLE `{self.table}` TO `{self.old}`, "
+                                    f"`{self.shadow}` TO `{self.table}`")
+                renamed = True
+                for name in self.triggers:
+                    self.cursor.execute(f"DROP TRIGGER IF EXISTS `{name}`")
+                for name, sql in other_triggers:
+                    self.cursor.execute(f"DROP TRIGGER `{name}`")
+                    dropped.append((name, sql))
+                    self.cursor.execute(sql)
+            except BaseException as e:
+                self._restore(renamed, dropped, e)
+                raise
+        finally:
+            self.cursor.execute("UNLOCK TABLES")
+
+    def _restore(self, renamed, dropped, error):
+        """Undo a failed swap while the tables are still locked"""
+        try:
+            for name, _ in dropped:
+                self.cursor.execute(f"DROP TRIGGER IF EXISTS `{name}`")
+            if renamed:
+                self.cursor.execute(f"RENAME TABLE `{self.table}` TO `{self.shadow}`, "
+                                    f"`{self.old}` TO `{self.table}`")
+            for _, sql in dropped:
+                self.cursor.execute(sql)
+        except Exception as restore_error:
+            statements = ";\n".join(sql for _, sql in dropped)
+            raise OnlineSchemaError(
+                f"Swapping {self.table} failed ({error}) and so did restoring it ({restore_error}); "
+                f"check the table names and recreate these triggers by hand:\n{statements}") from restore_error
+
+    def _wait_for_load(self):
+        while True:
+            self.cursor.execute("SHOW GLOBAL STATUS LIKE 'Threads_running'")
+            running = int(self.cursor.fetchone()[1])
+            if running <= self.max_threads_running:
+                return
+            self.sleep(1.0)
+
+    def _copy(self, columns, key):
+        names = quote_columns(columns)
+        key_names = quote_columns(key)
+        key_desc = ", ".join(f"`{column}` DESC" for column in key)
+        copied = chunks = 0
+        last = None
+        chunk_size = self.chunk_size
+        while True:
+            self._wait_for_load()
+            lower, lower_params = keyset_predicate(key, '>', last) if last is not None else ("TRUE", [])
+            rows = self._query(
+                f"SELECT {key_names} FROM (SELECT {key_names} FROM `{self.table}` WHERE {lower} "
+                f"ORDER BY {key_names} LIMIT {int(chunk_size)}) AS chunk ORDER BY {key_desc} LIMIT 1",
+                tuple(lower_params))
+            if not rows:
+                return copied, chunks
+            upper = tuple(rows[0])
+            upper_sql, upper_params = keyset_predicate(key, '<=', upper)
+            chunk_started = time.monotonic()
+            self.cursor.execute(
+                f"INSERT IGNORE INTO `{self.shadow}` ({names}) "
+                f"SELECT {names} FROM `{self.table}` WHERE {lower} AND {upper_sql} "
+                f"LOCK IN SHARE MODE", tuple(lower_params + upper_params))
+            seconds = time.monotonic() - chunk_started
+            copied += max(self.cursor.rowcount, 0)
+            chunks += 1
+            last = upper
+            if self.on_progress:
+                self.on_progress(self.table, copied, upper[0] if len(key) == 1 else upper)
+            # Resize towards chunk_time, damping swings from one noisy chunk
+            if seconds > 0:
+                target = chunk_size * self.chunk_time / seconds
+                chunk_size = int(min(MAX_CHUNK_SIZE, max(MIN_CHUNK_SIZE, (chunk_size + target) / 2)))
+            if self.sleep_ratio:
+                self.sleep(seconds * self.sleep_ratio)
+
+    def _move_child_foreign_keys(self, source, target):
+        """Repoint foreign keys referencing source at target without copying the child tables"""
+        keys = self._child_foreign_keys(source)
+        if not keys:
+            return
+        self.child_keys_moved = target == self.shadow
+        self.cursor.execute("SET SESSION foreign_key_checks = 0")
+        try:
+            for fk in keys:
+                self.cursor.execute(
+                    f"ALTER TABLE `{fk['child']}` DROP FOREIGN KEY `{fk['name']}`, "
+                    f"ADD CONSTRAINT `{toggle_name(fk['name'])}` FOREIGN KEY ({quote_columns(fk['columns'])}) "
+                    f"REFERENCES `{target}` ({quote_columns(fk['referenced'])}) "
+                    f"ON UPDATE {fk['on_update']} ON DELETE {fk['on_delete']}")
+        finally:
+            self.cursor.execute("SET SESSION foreign_key_checks = 1")
+
+    def _abort(self):
+        """Undo a failed change before the swap: triggers, child keys and the shadow table"""
+        for name in self.triggers:
+            self.cursor.execute(f"DROP TRIGGER IF EXISTS `{name}`")
+        if self.child_keys_moved:
+            self._move_child_foreign_keys(self.shadow, self.table)
+        self.cursor.execute(f"DROP TABLE IF EXISTS `{self.shadow}`")
@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+"""
+Subscriber Change Outbox
+The repository and bulk tools record one subscriber_outbox row (V7) per
+change, in the same transaction as the change itself. OutboxConsumer
+reads the table in id order and delivers batches at least once to a
+sink, then advances its durable watermark in outbox_consumers. prune()
+removes rows every consumer has delivered.
+"""
+
+import argparse
+import json
+import os
+import time
+from datetime import date, datetime
+from decimal import Decimal
+
+from .batching import values_clause
+from .pool import get_pool
+from .reporting import RateTracker
+
+OUTBOX_TABLE = 'subscriber_outbox'
+CONSUMERS_TABLE = 'outbox_consumers'
+
+EVENT_TYPES = ('subscriber.created', 'subscriber.updated', 'subscriber.deleted',
+               'preferences.updated', 'history.appended')
+
+FETCH_QUERY = f"""
+    SELECT id, subscriber_id, event_type, payload, created_at, NOW(6) AS read_at
+    FROM {OUTBOX_TABLE}
+    WHERE id > %s
+    ORDER BY id
+    LIMIT %s
+"""
+
+STATUS_QUERY = f"""
+    SELECT c.name, c.last_id, c.delivered, c.updated_at,
+           (SELECT COUNT(*) FROM {OUTBOX_TABLE} o WHERE o.id > c.last_id) AS backlog,
+           (SELECT MIN(o.created_at) FROM {OUTBOX_TABLE} o WHERE o.id > c.last_id) AS oldest_pending,
+           NOW(6) AS read_at
+    FROM {CONSUMERS_TABLE} c
+    ORDER BY c.name
+"""
+
+
+class OutboxError(Exception):
+    """Raised when a consumer's watermark was moved by another process"""
+
+
+def _json_default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    raise TypeError(f"Not JSON serializable: {type(value).__name__}")
+
+
+def record_events(cursor, events):
+    """Insert (subscriber_id, event_type, payload dict) rows on the caller's cursor.
+
+    Call it inside the transaction that makes the change, so the events
+    commit or roll back with it. Returns the number of rows written.
+    """
+    rows = []
+    for subscriber_id, event_type, payload in events:
+        if event_type not in EVENT_TYPES:
+            raise ValueError(f"Unknown outbox event type: {event_type!r}")
+        rows.append((subscriber_id, event_type, json.dumps(payload, default=_json_default, sort_keys=True)))
+    if not rows:
+        return 0
+    placeholders, params = values_clause(rows)
+    cursor.execute(f"INSERT INTO {OUTBOX_TABLE} (subscriber_id, event_type, payload) VALUES {placeholders}",
+                   params)
+    return len(rows)
+
+
+def row_to_event(row):
+    payload = row['payload']
+    if isinstance(payload, (bytes, bytearray)):
+        payload = payload.decode('utf-8')
+    return {
+        'id': row['id'],
+        'subscriber_id': row['subscriber_id'],
+        'type': row['event_type'],
+        'payload': json.loads(payload) if isinstance(payload, str) else payload,
+        'created_at': row['created_at'].isoformat(),
+    }
+
+
+def deliverable(rows, after_id, grace_seconds, increment=1):
+    """Return the leading rows that can be delivered without skipping a pending id.
+
+    Ids are allocated at insert time but become visible at commit, so a
+    hole can be a transaction that has not committed yet. Delivery stops
+    at the first hole until the row after it is grace_seconds old; after
+    that the hole is treated as a rollback and skipped.
+    """
+    ready = []
+    expected = after_id + increment
+    for row in rows:
+        if row['id'] > expected and (row['read_at'] - row['created_at']).total_seconds() < grace_seconds:
+            break
+        ready.append(row)
+        expected = row['id'] + increment
+    return ready
+
+
+class FileSink:
+    """Appends events to an NDJSON file, fsynced before the watermark moves"""
+
+    def __init__(self, path):
+        self.path = path
+
+    def deliver(self, events):
+        with open(self.path, 'a', encoding='utf-8') as handle:
+            for event in events:
+                handle.write(json.dumps(event, sort_keys=True) + "\n")
+            handle.flush()
+            os.fsync(handle.fileno())
+
+
+class CallbackSink:
+    """Hands each batch to a callable; an exception leaves the batch undelivered"""
+
+    def __init__(self, callback):
+        self.callback = callback
+
+    def deliver(self, events):
+        self.callback(events)
+
+
+class OutboxConsumer:
+    """Delivers outbox events in id order to sink.deliver(events), at least once.
+
+    The watermark only moves after the sink returns, so a crash or a
+    failing sink means the batch is delivered again. Events carry their
+    outbox id for downstream de-duplication. A new consumer starts at the
+    oldest retained event, or at the newest one with start='latest'.
+    """
+
+    def __init__(self, name, sink, pool=None, batch_size=500, grace_seconds=30.0, start='earliest'):
+        if start not in ('earliest', 'latest'):
+            raise ValueError(f"start must be 'earliest' or 'latest', got {start!r}")
+        self.name = name
+        self.sink = sink
+        self.pool = pool or get_pool()
+        self.batch_size = batch_size
+        self.grace_seconds = grace_seconds
+        self.start = start
+        self.last_id = None
+        self.increment = 1
+        self.tracker = RateTracker()
+
+    def register(self):
+        """Create the consumer's watermark row if it is new; returns its last_id"""
+        with self.pool.cursor(commit=True) as cursor:
+            if self.start == 'latest':
+                cursor.execute(f"SELECT COALESCE(MAX(id), 0) FROM {OUTBOX_TABLE}")
+            else:
+                cursor.execute(f"SELECT COALESCE(MIN(id), 1) - 1 FROM {OUTBOX_TABLE}")
+            initial = cursor.fetchone()[0]
+            cursor.execute(f"INSERT IGNORE INTO {CONSUMERS_TABLE} (name, last_id) VALUES (%s, %s)",
+                           (self.name, initial))
+            cursor.execute(f"SELECT last_id FROM {CONSUMERS_TABLE} WHERE name = %s", (self.name,))
+            self.last_id = int(cursor.fetchone()[0])
+            cursor.execute("SELECT @@auto_increment_increment")
+            self.increment = int(cursor.fetchone()[0])
+        return self.last_id
+
+    def poll(self):
+        """Deliver the next ready batch; returns the number of events delivered"""
+        if self.last_id is None:
+            self.register()
+        started = time.monotonic()
+        conn = self.pool.connection()
+        cursor = conn.cursor(dictionary=True)
+        try:
+            cursor.execute(FETCH_QUERY, (self.last_id, self.batch_size))
+            rows = deliverable(cursor.fetchall(), self.last_id, self.grace_seconds, self.increment)
+            conn.commit()
+            if not rows:
+                return 0
+            self.sink.deliver([row_to_event(row) for row in rows])
+            cursor.execute(
+                f"UPDATE {CONSUMERS_TABLE} SET last_id = %s, delivered = delivered + %s "
+                f"WHERE name = %s AND last_id = %s", (rows[-1]['id'], len(rows), self.name, self.last_id))
+            if cursor.rowcount != 1:
+                conn.rollback()
+                raise OutboxError(f"Consumer {self.name!r} was advanced past {self.last_id} by another process")
+            conn.commit()
+        finally:
+            cursor.close()
+            conn.close()
+        self.last_id = rows[-1]['id']
+        self.tracker.record_batch(len(rows), time.monotonic() - started)
+        return len(rows)
+
+    def run(self, poll_interval=1.0, stop_when_idle=False, on_batch=None):
+        """Poll until interrupted (or, with stop_when_idle, until nothing is ready)"""
+        while True:
+            delivered = self.poll()
+            if delivered:
+                if on_batch:
+                    on_batch(self)
+                continue
+            if stop_when_idle:
+                return self.metrics()
+            time.sleep(poll_interval)
+
+    def lag(self):
+        """Return (events pending, seconds since the oldest pending event was written)"""
+        with self.pool.cursor() as cursor:
+            cursor.execute(f"SELECT COUNT(*), TIMESTAMPDIFF(MICROSECOND, MIN(created_at), NOW(6)) "
+                           f"FROM {OUTBOX_TABLE} WHERE id > %s", (self.last_id or 0,))
+            backlog, lag_us = cursor.fetchone()
+        return int(backlog), (lag_us or 0) / 1e6
+
+    def metrics(self):
+        """Delivered events, events/s, batch latency and current lag"""
+        summary = self.tracker.summary()
+        backlog, lag_seconds = self.lag()
+        return {
+            'consumer': self.name,
+            'last_id': self.last_id,
+            'delivered': summary['rows'],
+            'events_per_sec': summary['rows_per_sec'],
+            'batches': summary['batches'],
+            'batch_ms_p95': summary['batch_ms_p95'],
+            'backlog': backlog,
+            'lag_seconds': lag_seconds,
+        }
+
+
+def prune(pool=None, keep_seconds=0, batch_size=5000, pause=0.0):
+    """Delete events every registered consumer has delivered; returns rows deleted.
+
+    Rows newer than keep_seconds are kept so a late consumer can still
+    start from them. With no registered consumers nothing is pruned.
+    """
+    pool = pool or get_pool()
+    deleted = 0
+    conn = pool.connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"SELECT MIN(last_id) FROM {CONSUMERS_TABLE}")
+        low_watermark = cursor.fetchone()[0]
+        if low_watermark is None:
+            return 0
+        while True:
+            cursor.execute(
+                f"DELETE FROM {OUTBOX_TABLE} WHERE id <= %s "
+                f"AND created_at < NOW(6) - INTERVAL %s SECOND ORDER BY id LIMIT %s",
+                (low_watermark, keep_seconds, batch_size))
+            removed = cursor.rowcount
+            conn.commit()
+            deleted += removed
+            if removed < batch_size:
+                return deleted
+            if pause:
+                time.sleep(pause)
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def consumer_status(pool=None):
+    """Return one dict per consumer with its watermark, backlog and lag"""
+    pool = pool or get_pool()
+    with pool.cursor(dictionary=True) as cursor:
+        cursor.execute(STATUS_QUERY)
+        rows = cursor.fetchall()
+    for row in rows:
+        oldest = row.pop('oldest_pending')
+        read_at = row.pop('read_at')
+        row['lag_seconds'] = (read_at - oldest).total_seconds() if oldest else 0.0
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Consume, prune or inspect the subscriber change outbox")
+    parser.add_argument('command', choices=['consume', 'prune', 'status'])
+    parser.add_argument('--name', default='default', help="Consumer name (its watermark is stored under it)")
+    parser.add_argument('--to-file', metavar='PATH', help="Append delivered events to this NDJSON file")
+    parser.add_argument('--batch-size', type=int, default=500, help="Events per delivery")
+    parser.add_argument('--grace-seconds', type=float, default=30.0,
+                        help="How long a gap in outbox ids may hold delivery back")
+    parser.add_argument('--start', choices=['earliest', 'latest'], default='earliest',
+                        help="Where a new consumer starts")
+    parser.add_argument('--follow', action='store_true', help="Keep polling instead of stopping when caught up")
+    parser.add_argument('--keep-hours', type=float, default=0.0, help="prune: keep delivered events this long")
+    args = parser.parse_args()
+
+    if args.command == 'status':
+        for row in consumer_status():
+            print(f"  {row['name']:<20} last_id {row['last_id']:>10}  delivered {row['delivered']:>10}  "
+                  f"backlog {row['backlog']:>8}  lag {row['lag_seconds']:.1f}s")
+        return
+    if args.command == 'prune':
+        print(f"🧹 Pruned {prune(keep_seconds=int(args.keep_hours * 3600))} delivered events")
+        return
+    if not args.to_file:
+        parser.error("consume needs --to-file")
+
+    def progress(consumer):
+        if len(consumer.tracker.batch_latencies) % 10 == 0:
+            print(f"  ... delivered through id {consumer.last_id}, "
+                  f"{consumer.tracker.rows / max(consumer.tracker.elapsed(), 1e-9):.0f} events/s")
+
+    consumer = OutboxConsumer(args.name, FileSink(args.to_file), batch_size=args.batch_size,
+                              grace_seconds=args.grace_seconds, start=args.start)
+    print(f"📬 Consumer {args.name!r} delivering to {args.to_file} from id {consumer.register()}")
+    try:
+        metrics = consumer.run(stop_when_idle=not args.follow, on_batch=progress)
+    except KeyboardInterrupt:
+        metrics = consumer.metrics()
+    print(f"✅ {metrics['delivered']} events delivered ({metrics['events_per_sec']:.0f}/s), "
+          f"last id {metrics['last_id']}, backlog {metrics['backlog']}, lag {metrics['lag_seconds']:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""
+Subscription History Partition Maintenance
+Keeps monthly RANGE partitions of subscription_history (V4) ahead of the
+current date by splitting p_future, and retires months past the retention
+window by dropping them or exchanging them out into standalone archive
+tables. V4 creates months up to the current one and each run pre-creates
+--ahead more, so p_future stays empty and the split, like the drop and
+exchange, does not depend on the number of rows involved.
+"""
+
+import argparse
+import calendar
+from datetime import datetime, timezone
+
+from . import stats
+from .pool import get_pool
+
+TABLE = 'subscription_history'
+FUTURE_PARTITION = 'p_future'
+
+
+def month_start(value):
+    return datetime(value.year, value.month, 1)
+
+
+def add_months(value, months):
+    index = value.year * 12 + value.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def epoch(value):
+    """UTC epoch seconds, matching UNIX_TIMESTAMP(action_date) in the partition function"""
+    return calendar.timegm(value.timetuple())
+
+
+def partition_name(month):
+    return f"p{month:%Y%m}"
+
+
+def list_partitions(cursor, table=TABLE):
+    """Return [{'name', 'bound', 'rows'}] in partition order; bound is None for MAXVALUE"""
+    cursor.execute(
+        "SELECT partition_name, partition_description, table_rows FROM information_schema.partitions "
+        "WHERE table_schema = DATABASE() AND table_name = %s AND partition_name IS NOT NULL "
+        "ORDER BY partition_ordinal_position", (table,))
+    return [{'name': name, 'bound': None if bound == 'MAXVALUE' else int(bound), 'rows': rows}
+            for name, bound, rows in cursor.fetchall()]
+
+
+def plan_rollover(partitions, now, months_ahead=3, retain_months=None, archive=False, table=TABLE):
+    """Return the ALTER statements that bring the partition layout up to date.
+
+    Months from the end of the last bounded partition through months_ahead
+    past now are split out of p_future. With retain_months, partitions
+    whose rows all predate the first of the month retain_months ago are
+    dropped, or with archive first exchanged into `<table>_<partition>`.
+    """
+    if not partitions or partitions[-1]['name'] != FUTURE_PARTITION or partitions[-1]['bound'] is not None:
+        raise ValueError(f"{table} is not partitioned with a trailing {FUTURE_PARTITION} MAXVALUE partition")
+    statements = []
+
+    bounded = [p for p in partitions if p['bound'] is not None]
+    if not bounded:
+        raise ValueError(f"{table} needs at least one bounded partition before {FUTURE_PARTITION}")
+    last_bound = datetime.fromtimestamp(bounded[-1]['bound'], timezone.utc).replace(tzinfo=None)
+    horizon = add_months(month_start(now), months_ahead + 1)
+    new_partitions = []
+    month = month_start(last_bound)
+    if month < last_bound:
+        month = add_months(month, 1)
+    while month < horizon:
+        upper = add_months(month, 1)
+        new_partitions.append(f"PARTITION {partition_name(month)} VALUES LESS THAN ({epoch(upper)})")
+        month = upper
+    # A bound that is not on a month boundary (e.g. a hand-made partition) gets a catch-up partition
+    if new_partitions and month_start(last_bound) != last_bound:
+        first = add_months(month_start(last_bound), 1)
+        new_partitions.insert(0, f"PARTITION {partition_name(month_start(last_bound))} "
+                                 f"VALUES LESS THAN ({epoch(first)})")
+    if new_partitions:
+        new_partitions.append(f"PARTITION {FUTURE_PARTITION} VALUES LESS THAN MAXVALUE")
+        statements.append(f"ALTER TABLE {table} REORGANIZE PARTITION {FUTURE_PARTITION} INTO (\n    "
+                          + ",\n    ".join(new_partitions) + "\n)")
+
+    if retain_months is not None:
+        cutoff = epoch(add_months(month_start(now), -retain_months))
+        expired = [p['name'] for p in bounded if p['bound'] <= cutoff]
+        # Never drop every bounded partition: the newest one after the split anchors the next rollover
+        if not new_partitions:
+            expired = [name for name in expired if name != bounded[-1]['name']]
+        for name in expired:
+            if archive:
+                archive_table = f"{table}_{name}"
+                statements.append(f"CREATE TABLE {archive_table} LIKE {table}")
+                statements.append(f"ALTER TABLE {archive_table} REMOVE PARTITIONING")
+                statements.append(f"ALTER TABLE {table} EXCHANGE PARTITION {name} "
+                                  f"WITH TABLE {archive_table} WITHOUT VALIDATION")
+        if expired:
+            statements.append(f"ALTER TABLE {table} DROP PARTITION {', '.join(expired)}")
+    return statements
+
+
+def emptied_partitions(statement, table=TABLE):
+    """Partitions whose rows leave table when statement runs (an EXCHANGE or a DROP)"""
+    exchange_prefix = f"ALTER TABLE {table} EXCHANGE PARTITION "
+    drop_prefix = f"ALTER TABLE {table} DROP PARTITION "
+    if statement.startswith(exchange_prefix):
+        return [statement[len(exchange_prefix):].split()[0]]
+    if statement.startswith(drop_prefix):
+        return statement[len(drop_prefix):].split(', ')
+    return []
+
+
+def rollover(pool=None, now=None, months_ahead=3, retain_months=None, archive=False, dry_run=False):
+    """Plan and (unless dry_run) apply the rollover; returns the statements"""
+    pool = pool or get_pool()
+    now = now or datetime.now(timezone.utc).replace(tzinfo=None)
+    with pool.cursor(commit=True) as cursor:
+        statements = plan_rollover(list_partitions(cursor), now, months_ahead, retain_months, archive)
+        if not dry_run:
+            # Exchanging and dropping partitions fire no triggers, so take their rows out of the V5
+            # counters. Count them up front: with archive the EXCHANGE empties a partition before its DROP.
+            pending = {}
+            if stats.stats_available(cursor):
+                for name in dict.fromkeys(name for statement in statements
+                                          for name in emptied_partitions(statement)):
+                    pending[name] = stats.history_partition_deltas(cursor, [name])
+            for statement in statements:
+                cursor.execute(statement)
+                for name in emptied_partitions(statement):
+                    if name in pending:
+                        stats.adjust(cursor, pending.pop(name))
+    return statements
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Maintain monthly subscription_history partitions")
+    parser.add_argument('--ahead', type=int, default=3, help="Months to pre-create beyond the current one")
+    parser.add_argument('--retain', type=int, help="Months of history to keep (default: keep everything)")
+    parser.add_argument('--archive', action='store_true',
+                        help="Exchange expired partitions into subscription_history_pYYYYMM tables before dropping")
+    parser.add_argument('--dry-run', action='store_true', help="Print the statements without running them")
+    parser.add_argument('--status', action='store_true', help="List partitions and row estimates")
+    args = parser.parse_args()
+
+    if args.status:
+        with get_pool().cursor() as cursor:
+            for partition in list_partitions(cursor):
+                bound = (datetime.fromtimestamp(partition['bound'], timezone.utc).strftime('%Y-%m-%d')
+                         if partition['bound'] is not None else 'MAXVALUE')
+                print(f"  {partition['name']:<12} < {bound:<10} ~{partition['rows']} rows")
+        return
+
+    statements = rollover(months_ahead=args.ahead, retain_months=args.retain,
+                          archive=args.archive, dry_run=args.dry_run)
+    for statement in statements:
+        print(statement + ";")
+    verb = "Planned" if args.dry_run else "Applied"
+    print(f"✅ {verb} {len(statements)} partition maintenance statement(s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,348 @@
+"""
+Bounded MySQL connection pool
+Reuses authenticated connections instead of opening one per operation,
+health-checks stale connections on checkout, reaps idle ones and tracks
+the metrics needed to size the pool.
+"""
+
+import atexit
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+
+import mysql.connector
+from mysql.connector import errors
+
+from .config import admin_config, db_config, pool_settings
+
+
+class PoolTimeoutError(errors.PoolError):
+    """Raised when no connection becomes available before the checkout timeout"""
+
+
+class _Slot:
+    """A raw connection plus the state that outlives each checkout of it"""
+
+    def __init__(self, raw, statement_cache_size=64):
+        self.raw = raw
+        self.statements = OrderedDict()
+        self.statement_cache_size = max(statement_cache_size, 1)
+        self.statements_prepared = 0
+        self.statement_hits = 0
+        self.last_used = time.monotonic()
+
+
+class PooledConnection:
+    """Proxy for one checkout of a pooled connection; close() returns it to the pool.
+
+    Every checkout gets a new proxy, so once closed a proxy stays detached:
+    closing it again does nothing and any other use raises, even after the
+    connection behind it has been handed to someone else.
+    """
+
+    def __init__(self, pool, slot):
+        self._pool = pool
+        self._slot = slot
+        self._raw = slot.raw
+        self._autocommit_changed = False
+
+    def _checked_out(self):
+        if self._raw is None:
+            raise errors.OperationalError("Connection has been returned to the pool")
+        return self._raw
+
+    def __getattr__(self, name):
+        return getattr(self._checked_out(), name)
+
+    @property
+    def autocommit(self):
+        return self._checked_out().autocommit
+
+    @autocommit.setter
+    def autocommit(self, value):
+        self._checked_out().autocommit = value
+        self._autocommit_changed = True
+
+    @property
+    def raw(self):
+        """The underlying mysql.connector connection"""
+        return self._checked_out()
+
+    @property
+    def statements_prepared(self):
+        return self._slot.statements_prepared if self._slot else 0
+
+    @property
+    def statement_hits(self):
+        return self._slot.statement_hits if self._slot else 0
+
+    def execute_prepared(self, sql, params=()):
+        """Run sql as a server-side prepared statement cached on this connection; returns its cursor.
+
+        Rows come back as plain tuples in select-list order. The driver only
+        skips re-preparing when handed the very string object it prepared,
+        so the cache keeps the first string seen for each text and always
+        executes that one. Past statement_cache_size the least recently used
+        statement is closed, which deallocates it on the server. Fetch all
+        rows before running anything else on the connection.
+        """
+        raw = self._checked_out()
+        slot = self._slot
+        entry = slot.statements.get(sql)
+        if entry is None:
+            entry = (sql, raw.cursor(prepared=True))
+            slot.statements[sql] = entry
+            slot.statements_prepared += 1
+            while len(slot.statements) > slot.statement_cache_size:
+                _, (_, evicted) = slot.statements.popitem(last=False)
+                evicted.close()
+        else:
+            slot.statements.move_to_end(sql)
+            slot.statement_hits += 1
+        statement, cursor = entry
+        cursor.execute(statement, params)
+        return cursor
+
+    def close(self):
+        """Return the connection to the pool (later calls do nothing)"""
+        if self._raw is not None:
+            self._pool._release(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+class ConnectionPool:
+    """Thread-safe pool with min/max size, health checks and idle reaping"""
+
+    def __init__(self, min_size=1, max_size=10, checkout_timeout=30.0,
+                 idle_timeout=300.0, health_check_interval=30.0, statement_cache_size=64,
+                 session_settings=None, connect=None, **connect_args):
+        if min_size < 0 or max_size < 1 or min_size > max_size:
+            raise ValueError("Pool requires 0 <= min_size <= max_size and max_size >= 1")
+        self.min_size = min_size
+        self.max_size = max_size
+        self.checkout_timeout = checkout_timeout
+        self.idle_timeout = idle_timeout
+        self.health_check_interval = health_check_interval
+        self.statement_cache_size = statement_cache_size
+        self.session_settings = dict(session_settings or {})
+        self.connect_args = connect_args
+        self._connect = connect or mysql.connector.connect
+        self._idle = deque()
+        self._size = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._started = time.monotonic()
+        self._stats = {
+            'checkouts': 0,
+            'created': 0,
+            'discarded': 0,
+            'reaped': 0,
+            'timeouts': 0,
+            'wait_time_total': 0.0,
+            'wait_time_max': 0.0,
+            'peak_in_use': 0,
+        }
+        for _ in range(min_size):
+            self._idle.append(self._open())
+            self._size += 1
+
+    def _open(self):
+        """Open and initialise a new raw connection"""
+        raw = self._connect(**self.connect_args)
+        if self.session_settings:
+            cursor = raw.cursor()
+            for name, value in self.session_settings.items():
+                cursor.execute(f"SET SESSION {name} = %s", (value,))
+            cursor.close()
+        with self._cond:
+            self._stats['created'] += 1
+        return _Slot(raw, self.statement_cache_size)
+
+    def _discard(self, slot):
+        try:
+            slot.raw.close()
+        except Exception:
+            pass
+
+    def _is_healthy(self, slot):
+        """Ping connections that have been idle longer than the health interval"""
+        if time.monotonic() - slot.last_used < self.health_check_interval:
+            return True
+        try:
+            slot.raw.ping(reconnect=False)
+            return True
+        except Exception:
+            return False
+
+    def _reap_locked(self):
+        """Close idle connections above min_size that exceeded idle_timeout"""
+        now = time.monotonic()
+        kept = deque()
+        while self._idle:
+            slot = self._idle.popleft()
+            if self._size > self.min_size and now - slot.last_used > self.idle_timeout:
+                self._discard(slot)
+                self._size -= 1
+                self._stats['reaped'] += 1
+            else:
+                kept.append(slot)
+        self._idle = kept
+
+    def reap_idle(self):
+        """Reap idle connections now; also happens on every release"""
+        with self._cond:
+            self._reap_locked()
+
+    def connection(self, timeout=None):
+        """Check out a connection, waiting up to timeout seconds for one to free up"""
+        timeout = self.checkout_timeout if timeout is None else timeout
+        started = time.monotonic()
+        deadline = started + timeout
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise errors.PoolError("Connection pool is closed")
+                if self._idle:
+                    slot = self._idle.pop()
+                    break
+                if self._size < self.max_size:
+                    self._size += 1
+                    slot = None
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self._stats['timeouts'] += 1
+                    raise PoolTimeoutError(
+                        f"No connection available within {timeout:.1f}s "
+                        f"(max_size={self.max_size})")
+                self._cond.wait(remaining)
+
+        if slot is not None and not self._is_healthy(slot):
+            self._discard(slot)
+            with self._cond:
+                self._stats['discarded'] += 1
+            slot = None
+        if slot is None:
+            try:
+                slot = self._open()
+            except Exception:
+                with self._cond:
+                    self._size -= 1
+                    self._cond.notify()
+                raise
+
+        waited = time.monotonic() - started
+        with self._cond:
+            self._stats['checkouts'] += 1
+            self._stats['wait_time_total'] += waited
+            self._stats['wait_time_max'] = max(self._stats['wait_time_max'], waited)
+            in_use = self._size - len(self._idle)
+            self._stats['peak_in_use'] = max(self._stats['peak_in_use'], in_use)
+        return PooledConnection(self, slot)
+
+    def _release(self, conn):
+        with self._cond:
+            slot, raw = conn._slot, conn._raw
+            if raw is None:
+                return
+            conn._slot = conn._raw = None
+        healthy = True
+        try:
+            if raw.in_transaction:
+                raw.rollback()
+            if conn._autocommit_changed:
+                raw.autocommit = self.connect_args.get('autocommit', False)
+        except Exception:
+            healthy = False
+
+        with self._cond:
+            if healthy and not self._closed:
+                slot.last_used = time.monotonic()
+                self._idle.append(slot)
+                self._reap_locked()
+            else:
+                self._discard(slot)
+                self._size -= 1
+                if not self._closed:
+                    self._stats['discarded'] += 1
+            self._cond.notify()
+
+    @contextmanager
+    def cursor(self, commit=False, **cursor_args):
+        """Yield a cursor on a pooled connection, committing on success if asked"""
+        conn = self.connection()
+        cursor = conn.cursor(**cursor_args)
+        try:
+            yield cursor
+            if commit:
+                conn.commit()
+        finally:
+            cursor.close()
+            conn.close()
+
+    def metrics(self):
+        """Return a snapshot of pool usage for sizing decisions"""
+        with self._cond:
+            elapsed = max(time.monotonic() - self._started, 1e-9)
+            checkouts = self._stats['checkouts']
+            snapshot = dict(self._stats)
+            snapshot.update({
+                'size': self._size,
+                'idle': len(self._idle),
+                'in_use': self._size - len(self._idle),
+                'min_size': self.min_size,
+                'max_size': self.max_size,
+                'checkouts_per_sec': checkouts / elapsed,
+                'wait_time_avg': snapshot['wait_time_total'] / checkouts if checkouts else 0.0,
+                'uptime': elapsed,
+            })
+        return snapshot
+
+    def close(self):
+        """Close idle connections; in-use ones are closed when released"""
+        with self._cond:
+            self._closed = True
+            while self._idle:
+                self._discard(self._idle.pop())
+                self._size -= 1
+            self._cond.notify_all()
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(name='default', admin=False, session_settings=None, **overrides):
+    """Return the shared pool registered under name, creating it on first use.
+
+    Overrides may mix connection arguments (database, autocommit, ...) and
+    pool settings (min_size, max_size, ...); they only apply on creation.
+    """
+    with _pools_lock:
+        pool = _pools.get(name)
+        if pool is None or pool._closed:
+            settings = pool_settings()
+            for key in list(overrides):
+                if key in settings:
+                    settings[key] = overrides.pop(key)
+            connect_args = admin_config(**overrides) if admin else db_config(**overrides)
+            pool = ConnectionPool(session_settings=session_settings, **settings, **connect_args)
+            _pools[name] = pool
+        return pool
+
+
+def close_all_pools():
+    """Close every shared pool (registered to run at interpreter exit)"""
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.close()
+        _pools.clear()
+
+
+atexit.register(close_all_pools)
@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""
+Query Plan Regression Harness
+Runs EXPLAIN FORMAT=JSON for a registry of the queries the application and
+tests depend on, reduces each plan to access type, index, rows examined,
+cost and filesort/temporary-table use, and compares the result with a
+recorded baseline so a migration that turns an index lookup into a scan
+or adds a filesort fails the check.
+"""
+
+import argparse
+import json
+import sys
+
+from .pool import get_pool
+from .seed import TABLE_INSERTS, next_subscriber_id, seed_database
+from .testing import drop_schema, provision_schema
+
+DEFAULT_SCHEMA = 'subscriber_db_plans'
+
+# Each query's parameters come from its sample query, so lookups hit real rows
+# (EXPLAIN of a const lookup that matches nothing has no plan to compare).
+# index_backed queries must never scan a whole table or filesort, even without a baseline.
+QUERIES = {
+    'subscriber_by_email': {
+        'sql': "SELECT * FROM subscribers WHERE email = %s",
+        'sample': "SELECT email FROM subscribers ORDER BY id LIMIT 1",
+        'index_backed': True,
+    },
+    'preferences_by_email': {
+        'sql': "SELECT sp.* FROM subscription_preferences sp "
+               "JOIN subscribers s ON sp.subscriber_id = s.id WHERE s.email = %s",
+        'sample': "SELECT s.email FROM subscribers s "
+                  "JOIN subscription_preferences sp ON sp.subscriber_id = s.id ORDER BY s.id LIMIT 1",
+        'index_backed': True,
+    },
+    'history_by_subscriber': {
+        'sql': "SELECT action FROM subscription_history WHERE subscriber_id = %s ORDER BY action_date",
+        'sample': "SELECT subscriber_id FROM subscription_history ORDER BY id LIMIT 1",
+        'index_backed': True,
+    },
+    'test_cleanup_history': {
+        'sql': "DELETE FROM subscription_history WHERE subscriber_id IN "
+               "(SELECT id FROM subscribers WHERE email LIKE '%test%')",
+        'index_backed': False,
+    },
+    'test_cleanup_subscribers': {
+        'sql': "DELETE FROM subscribers WHERE email LIKE '%test%'",
+        'index_backed': False,
+    },
+}
+
+# Best to worst, as documented for EXPLAIN's type column
+ACCESS_RANK = ('system', 'const', 'eq_ref', 'ref', 'fulltext', 'ref_or_null', 'index_merge',
+               'unique_subquery', 'index_subquery', 'range', 'index', 'ALL')
+
+ROWS_GROWTH_LIMIT = 2.0
+ROWS_GROWTH_FLOOR = 100
+
+
+class PlanError(Exception):
+    """Raised when a registered query cannot be explained against the current data"""
+
+
+def _walk(node, plan):
+    if isinstance(node, dict):
+        if 'table_name' in node and 'access_type' in node:
+            plan['tables'].append({
+                'table': node['table_name'],
+                'access_type': node['access_type'],
+                'key': node.get('key'),
+                'rows': int(node.get('rows_examined_per_scan', 0)),
+            })
+        if node.get('using_filesort'):
+            plan['filesort'] = True
+        if node.get('using_temporary_table'):
+            plan['temporary'] = True
+        for value in node.values():
+            _walk(value, plan)
+    elif isinstance(node, list):
+        for value in node:
+            _walk(value, plan)
+
+
+def summarize_plan(explain):
+    """Reduce EXPLAIN FORMAT=JSON output (parsed) to the fields that are compared"""
+    block = explain.get('query_block', {})
+    plan = {'cost': float(block.get('cost_info', {}).get('query_cost', 0.0)),
+            'tables': [], 'filesort': False, 'temporary': False}
+    _walk(block, plan)
+    plan['rows_examined'] = sum(table['rows'] for table in plan['tables'])
+    return plan
+
+
+def access_rank(access_type):
+    return ACCESS_RANK.index(access_type) if access_type in ACCESS_RANK else len(ACCESS_RANK)
+
+
+def explain_query(cursor, name, query):
+    params = None
+    if query.get('sample'):
+        cursor.execute(query['sample'])
+        params = cursor.fetchone()
+        if params is None:
+            raise PlanError(f"{name}: no sample row; explain against a seeded database")
+    cursor.execute("EXPLAIN FORMAT=JSON " + query['sql'], params)
+    return summarize_plan(json.loads(cursor.fetchone()[0]))
+
+
+def explain_all(pool=None, queries=None):
+    """Return {query name: plan summary} for every registered query"""
+    pool = pool or get_pool()
+    queries = queries or QUERIES
+    with pool.cursor() as cursor:
+        return {name: explain_query(cursor, name, query) for name, query in queries.items()}
+
+
+def plan_problems(name, plan, baseline=None, queries=None):
+    """Return (regressions, notes) for one query's plan, against its baseline plan if given"""
+    query = (queries or QUERIES).get(name, {})
+    regressions, notes = [], []
+    if query.get('index_backed'):
+        for table in plan['tables']:
+            if table['access_type'] == 'ALL':
+                regressions.append(f"{name}: full scan of {table['table']}")
+        if plan['filesort']:
+            regressions.append(f"{name}: filesort")
+    if baseline is None:
+        return regressions, notes
+
+    before = {table['table']: table for table in baseline['tables']}
+    for table in plan['tables']:
+        old = before.get(table['table'])
+        if old is None:
+            notes.append(f"{name}: new table access {table['table']} ({table['access_type']})")
+            continue
+        if access_rank(table['access_type']) > access_rank(old['access_type']):
+            regressions.append(f"{name}: {table['table']} access {old['access_type']} -> {table['access_type']}")
+        if table['key'] != old['key']:
+            notes.append(f"{name}: {table['table']} index {old['key']} -> {table['key']}")
+    if plan['filesort'] and not baseline['filesort']:
+        regressions.append(f"{name}: filesort appeared")
+    if plan['temporary'] and not baseline['temporary']:
+        regressions.append(f"{name}: temporary table appeared")
+    if (plan['rows_examined'] > baseline['rows_examined'] * ROWS_GROWTH_LIMIT
+            and plan['rows_examined'] - baseline['rows_examined'] > ROWS_GROWTH_FLOOR):
+        regressions.append(f"{name}: rows examined {baseline['rows_examined']} -> {plan['rows_examined']}")
+    return regressions, notes
+
+
+def check_plans(plans, baseline=None, queries=None):
+    """Return (regressions, notes) over all plans; baseline is {name: plan} or None"""
+    regressions, notes = [], []
+    for name, plan in plans.items():
+        found, noted = plan_problems(name, plan, (baseline or {}).get(name), queries)
+        regressions += found
+        notes += noted
+    return regressions, notes
+
+
+def seed_scratch(schema, subscribers, seed):
+    """Provision and seed a scratch schema; returns a pool on it"""
+    provision_schema(schema)
+    pool = get_pool(f"plans:{schema}", database=schema, max_size=6)
+    seed_database(pool, subscribers, next_subscriber_id(pool), seed)
+    with pool.cursor() as cursor:
+        cursor.execute("ANALYZE TABLE " + ", ".join(TABLE_INSERTS))
+        cursor.fetchall()
+    return pool
+
+
+def print_plans(plans):
+    for name, plan in plans.items():
+        accesses = ', '.join(f"{t['table']}:{t['access_type']}({t['key'] or '-'})" for t in plan['tables'])
+        flags = ''.join((' filesort' if plan['filesort'] else '', ' temporary' if plan['temporary'] else ''))
+        print(f"  {name:<26} cost {plan['cost']:>10.2f}  rows {plan['rows_examined']:>8}  {accesses}{flags}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check that the core queries keep index-backed plans")
+    parser.add_argument('--record', metavar='FILE', help="Write the current plans as a baseline")
+    parser.add_argument('--check', metavar='FILE', help="Compare the current plans with a baseline")
+    parser.add_argument('--subscribers', '-n', type=int,
+                        help="Explain against a scratch schema seeded with this many subscribers")
+    parser.add_argument('--seed', type=int, default=0, help="Seed for the scratch data")
+    parser.add_argument('--schema', default=DEFAULT_SCHEMA, help="Scratch schema (dropped and recreated)")
+    parser.add_argument('--keep', action='store_true', help="Keep the scratch schema afterwards")
+    args = parser.parse_args()
+
+    pool = None
+    try:
+        if args.subscribers:
+            print(f"🌱 Seeding {args.subscribers} subscribers into {args.schema}")
+            pool = seed_scratch(args.schema, args.subscribers, args.seed)
+        plans = explain_all(pool)
+    except PlanError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+    finally:
+        if args.subscribers and not args.keep:
+            drop_schema(args.schema)
+
+    print("🔎 Query plans:")
+    print_plans(plans)
+    if args.record:
+        with open(args.record, 'w') as handle:
+            json.dump(plans, handle, indent=2, sort_keys=True)
+        print(f"📝 Baseline written to {args.record}")
+
+    baseline = None
+    if args.check:
+        with open(args.check) as handle:
+            baseline = json.load(handle)
+    regressions, notes = check_plans(plans, baseline)
+    for note in notes:
+        print(f"  ℹ️  {note}")
+    for regression in regressions:
+        print(f"  ❌ {regression}")
+    if regressions:
+        sys.exit(1)
+    print(f"✅ {len(plans)} query plans OK" + (f" against {args.check}" if args.check else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Database Readiness Probe
+Polls until MySQL accepts TCP connections, authenticates, answers a query
+and (optionally) has the expected schema version, backing off exponentially
+with jitter up to an overall deadline. Reports the measured time-to-ready.
+"""
+
+import argparse
+import json
+import random
+import socket
+import sys
+import time
+from datetime import datetime, timezone
+
+import mysql.connector
+
+from .config import db_config
+from .migrations import discover_migrations, version_key
+
+PHASES = ('tcp', 'auth', 'query', 'schema')
+
+
+class NotReady(Exception):
+    """Raised by a probe phase that has not succeeded yet"""
+
+    def __init__(self, phase, message):
+        super().__init__(f"{phase}: {message}")
+        self.phase = phase
+
+
+def schema_version(cursor, table='flyway_schema_history'):
+    """Return the highest successfully applied migration version, or None"""
+    cursor.execute(
+        "SELECT COUNT(*) FROM information_schema.tables "
+        "WHERE table_schema = DATABASE() AND table_name = %s", (table,))
+    if not cursor.fetchone()[0]:
+        return None
+    cursor.execute(f"SELECT version FROM `{table}` WHERE success = 1 AND version IS NOT NULL")
+    versions = [row[0] for row in cursor.fetchall()]
+    return max(versions, key=version_key) if versions else None
+
+
+def probe(config, expected_version=None, timeout=5.0):
+    """Run every readiness phase once; returns the schema version or raises NotReady"""
+    try:
+        with socket.create_connection((config['host'], config['port']), timeout=timeout):
+            pass
+    except OSError as e:
+        raise NotReady('tcp', e)
+
+    try:
+        conn = mysql.connector.connect(connection_timeout=int(max(timeout, 1)), **config)
+    except mysql.connector.Error as e:
+        raise NotReady('auth', e)
+    try:
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SELECT 1")
+            cursor.fetchall()
+        except mysql.connector.Error as e:
+            raise NotReady('query', e)
+        version = schema_version(cursor) if expected_version else None
+        cursor.close()
+    finally:
+        conn.close()
+
+    if expected_version and (version is None or version_key(version) < version_key(expected_version)):
+        raise NotReady('schema', f"schema version {version or 'none'}, expected {expected_version}")
+    return version
+
+
+def wait_for_db(config=None, deadline=60.0, expected_version=None, initial_delay=0.1,
+                max_delay=5.0, probe_timeout=5.0, sleep=time.sleep):
+    """Poll until the database is ready or the deadline passes; returns a report dict"""
+    config = config or db_config()
+    if expected_version == 'latest':
+        expected_version = discover_migrations()[-1].version
+    started = time.monotonic()
+    reached = {}
+    attempts = 0
+    last_error = None
+    version = None
+
+    while True:
+        attempts += 1
+        try:
+            version = probe(config, expected_version, probe_timeout)
+            for phase in PHASES:
+                reached.setdefault(phase, time.monotonic() - started)
+            ready = True
+            break
+        except NotReady as e:
+            last_error = str(e)
+            for phase in PHASES[:PHASES.index(e.phase)]:
+                reached.setdefault(phase, time.monotonic() - started)
+
+        remaining = deadline - (time.monotonic() - started)
+        if remaining <= 0:
+            ready = False
+            break
+        # Full jitter keeps many waiting clients from probing in lockstep
+        delay = random.uniform(0, min(max_delay, initial_delay * 2 ** attempts))
+        sleep(min(delay, remaining))
+
+    return {
+        'ready': ready,
+        'time_to_ready': time.monotonic() - started if ready else None,
+        'elapsed': time.monotonic() - started,
+        'attempts': attempts,
+        'phases': reached,
+        'schema_version': version,
+        'expected_version': expected_version,
+        'last_error': None if ready else last_error,
+        'host': f"{config['host']}:{config['port']}",
+        'checked_at': datetime.now(timezone.utc).isoformat(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Wait until the subscriber database is ready")
+    parser.add_argument('--timeout', type=float, default=60.0, help="Overall deadline in seconds")
+    parser.add_argument('--expect-version', help="Minimum schema version, or 'latest'")
+    parser.add_argument('--max-delay', type=float, default=5.0, help="Backoff ceiling in seconds")
+    parser.add_argument('--record', help="Append the report as a JSON line to this file")
+    args = parser.parse_args()
+
+    print("⏳ Waiting for the database to be ready...")
+    report = wait_for_db(deadline=args.timeout, expected_version=args.expect_version,
+                         max_delay=args.max_delay)
+    if args.record:
+        with open(args.record, 'a') as handle:
+            handle.write(json.dumps(report) + "\n")
+
+    if report['ready']:
+        print(f"✅ Database ready after {report['time_to_ready']:.2f}s "
+              f"({report['attempts']} attempts, schema version {report['schema_version'] or 'n/a'})")
+    else:
+        print(f"❌ Database not ready after {report['elapsed']:.2f}s: {report['last_error']}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""
+Throughput and latency reporting helpers
+Shared by the import, export and benchmark tools
+"""
+
+import math
+import time
+
+
+def percentile(values, pct):
+    """Return the nearest-rank percentile (0-100) of values, or 0.0 when empty"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+    return ordered[rank - 1]
+
+
+class RateTracker:
+    """Accumulates row counts and per-batch latencies for a running job"""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.rows = 0
+        self.batch_latencies = []
+
+    def record_batch(self, rows, seconds):
+        self.rows += rows
+        self.batch_latencies.append(seconds)
+
+    def elapsed(self):
+        return time.monotonic() - self.started
+
+    def summary(self):
+        """Return rows, rows/s and batch latency percentiles (milliseconds)"""
+        elapsed = self.elapsed()
+        latencies = self.batch_latencies
+        return {
+            'rows': self.rows,
+            'elapsed': elapsed,
+            'rows_per_sec': self.rows / elapsed if elapsed > 0 else 0.0,
+            'batches': len(latencies),
+            'batch_ms_p50': percentile(latencies, 50) * 1000,
+            'batch_ms_p95': percentile(latencies, 95) * 1000,
+            'batch_ms_max': max(latencies) * 1000 if latencies else 0.0,
+        }
@@ -0,0 +1,238 @@
+"""
+Subscriber Repository
+Read-through cached access to subscribers and their preferences, plus their
+subscription history. Every write made through the repository invalidates
+the affected cache entries and records an outbox event in its transaction.
+"""
+
+from collections import namedtuple
+from contextlib import contextmanager
+
+from .cache import MISSING, NEGATIVE, TTLCache
+from .outbox import record_events
+from .pool import get_pool
+from .schema import HISTORY_ACTIONS, PREFERENCE_COLUMNS
+
+PROFILE_QUERY = """
+    SELECT s.id, s.email, s.first_name, s.last_name, s.is_active, s.created_at, s.updated_at,
+           sp.newsletter_enabled, sp.marketing_enabled, sp.frequency
+    FROM subscribers s
+    LEFT JOIN subscription_preferences sp ON sp.subscriber_id = s.id
+    WHERE {where}
+"""
+
+# Column order of PROFILE_QUERY rows, for tuple (prepared) results
+PROFILE_FIELDS = ('id', 'email', 'first_name', 'last_name', 'is_active', 'created_at', 'updated_at',
+                  'newsletter_enabled', 'marketing_enabled', 'frequency')
+
+# Built once so every lookup hands the statement cache the same string object
+PROFILE_BY_ID = PROFILE_QUERY.format(where="s.id = %s")
+PROFILE_BY_EMAIL = PROFILE_QUERY.format(where="s.email = %s")
+
+UPDATABLE_COLUMNS = ('email', 'first_name', 'last_name', 'is_active')
+
+HISTORY_QUERY = """
+    SELECT id, action, action_date, notes
+    FROM subscription_history
+    WHERE subscriber_id = %s
+    ORDER BY action_date, id
+    LIMIT %s
+"""
+
+HistoryEntry = namedtuple('HistoryEntry', ('id', 'action', 'action_date', 'notes'))
+
+
+def email_key(email):
+    """Cache key for an email (MySQL's default collation is case-insensitive)"""
+    return ('email', email.strip().lower())
+
+
+def id_key(subscriber_id):
+    return ('id', int(subscriber_id))
+
+
+def row_to_profile(row):
+    """Split a profile query row (dict, or tuple in PROFILE_FIELDS order) into fields and preferences"""
+    if not isinstance(row, dict):
+        row = dict(zip(PROFILE_FIELDS, row))
+    profile = {key: row[key] for key in ('id', 'email', 'first_name', 'last_name',
+                                         'is_active', 'created_at', 'updated_at')}
+    if row['frequency'] is None:
+        profile['preferences'] = None
+    else:
+        profile['preferences'] = {key: row[key] for key in PREFERENCE_COLUMNS}
+    return profile
+
+
+class SubscriberRepository:
+    """Subscriber/preference access with an in-process read-through cache.
+
+    Profiles are cached by id; email entries map to an id (or to a negative
+    marker for unknown emails), so one invalidation by id covers both keys.
+    Profile and history reads run as server-side prepared statements from
+    each pooled connection's statement cache; pass prepared=False to send
+    them as text queries instead.
+    """
+
+    def __init__(self, pool=None, cache=None, prepared=True):
+        self.pool = pool or get_pool()
+        self.cache = cache if cache is not None else TTLCache()
+        self.prepared = prepared
+
+    def _select(self, sql, params):
+        """Return every row of a read as tuples, prepared or as a text query"""
+        conn = self.pool.connection()
+        try:
+            if self.prepared:
+                return conn.execute_prepared(sql, params).fetchall()
+            cursor = conn.cursor()
+            try:
+                cursor.execute(sql, params)
+                return cursor.fetchall()
+            finally:
+                cursor.close()
+        finally:
+            conn.close()
+
+    def _fetch_profile(self, sql, params):
+        rows = self._select(sql, params)
+        return row_to_profile(rows[0]) if rows else None
+
+    def _remember(self, profile):
+        self.cache.set(id_key(profile['id']), profile)
+        self.cache.set(email_key(profile['email']), profile['id'])
+
+    def get_by_id(self, subscriber_id):
+        """Return the subscriber profile with preferences, or None"""
+        cached = self.cache.get(id_key(subscriber_id))
+        if cached is not MISSING:
+            return cached
+        profile = self._fetch_profile(PROFILE_BY_ID, (subscriber_id,))
+        if profile:
+            self._remember(profile)
+        return profile
+
+    def get_by_email(self, email):
+        """Return the subscriber profile for email, or None"""
+        key = email_key(email)
+        cached = self.cache.get(key)
+        if cached is NEGATIVE:
+            return None
+        if cached is not MISSING:
+            profile = self.cache.get(id_key(cached))
+            if profile is not MISSING and email_key(profile['email']) == key:
+                return profile
+        profile = self._fetch_profile(PROFILE_BY_EMAIL, (email,))
+        if profile:
+            self._remember(profile)
+        else:
+            self.cache.set_negative(key)
+        return profile
+
+    @contextmanager
+    def transaction(self):
+        """Yield a cursor inside a transaction that commits on success and rolls back on error"""
+        conn = self.pool.connection()
+        cursor = conn.cursor()
+        try:
+            conn.start_transaction()
+            yield cursor
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+            conn.close()
+
+    def create(self, email, first_name=None, last_name=None, is_active=True, preferences=None):
+        """Insert a subscriber (and optional preferences); returns the new id"""
+        with self.transaction() as cursor:
+            cursor.execute("""
+                INSERT INTO subscribers (email, first_name, last_name, is_active)
+                VALUES (%s, %s, %s, %s)
+            """, (email, first_name, last_name, is_active))
+            subscriber_id = cursor.lastrowid
+            if preferences is not None:
+                self._upsert_preferences(cursor, subscriber_id, preferences)
+            record_events(cursor, [(subscriber_id, 'subscriber.created', {
+                'email': email, 'first_name': first_name, 'last_name': last_name,
+                'is_active': bool(is_active), 'preferences': preferences})])
+        self.cache.invalidate(email_key(email))
+        return subscriber_id
+
+    def update(self, subscriber_id, **fields):
+        """Update subscriber columns; returns True if the row exists"""
+        unknown = set(fields) - set(UPDATABLE_COLUMNS)
+        if unknown:
+            raise ValueError(f"Cannot update columns: {sorted(unknown)}")
+        if not fields:
+            return False
+        assignments = ", ".join(f"{column} = %s" for column in fields)
+        with self.transaction() as cursor:
+            cursor.execute(f"UPDATE subscribers SET {assignments} WHERE id = %s",
+                           tuple(fields.values()) + (subscriber_id,))
+            rowcount = cursor.rowcount
+            if rowcount:
+                record_events(cursor, [(subscriber_id, 'subscriber.updated', fields)])
+        self.cache.invalidate(id_key(subscriber_id))
+        if 'email' in fields:
+            self.cache.invalidate(email_key(fields['email']))
+        return rowcount > 0
+
+    def delete(self, subscriber_id):
+        """Delete a subscriber (preferences and history cascade); returns True if deleted"""
+        with self.transaction() as cursor:
+            cursor.execute("DELETE FROM subscribers WHERE id = %s", (subscriber_id,))
+            rowcount = cursor.rowcount
+            if rowcount:
+                record_events(cursor, [(subscriber_id, 'subscriber.deleted', {})])
+        self.cache.invalidate(id_key(subscriber_id))
+        return rowcount > 0
+
+    def _upsert_preferences(self, cursor, subscriber_id, preferences):
+        """Insert or update the preferences row; returns the upsert's rowcount (0 when unchanged)"""
+        unknown = set(preferences) - set(PREFERENCE_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown preference fields: {sorted(unknown)}")
+        columns = ['subscriber_id'] + list(preferences)
+        updates = ", ".join(f"{column} = VALUES({column})" for column in preferences)
+        cursor.execute(
+            f"INSERT INTO subscription_preferences ({', '.join(columns)}) "
+            f"VALUES ({', '.join(['%s'] * len(columns))}) "
+            f"ON DUPLICATE KEY UPDATE {updates or 'subscriber_id = subscriber_id'}",
+            (subscriber_id,) + tuple(preferences.values()))
+        return cursor.rowcount
+
+    def set_preferences(self, subscriber_id, **preferences):
+        """Create or update the subscriber's preferences row"""
+        with self.transaction() as cursor:
+            if self._upsert_preferences(cursor, subscriber_id, preferences):
+                record_events(cursor, [(subscriber_id, 'preferences.updated', preferences)])
+        self.cache.invalidate(id_key(subscriber_id))
+
+    def get_preferences(self, subscriber_id):
+        """Return the subscriber's preferences dict, or None if there is no subscriber or row"""
+        profile = self.get_by_id(subscriber_id)
+        return profile['preferences'] if profile else None
+
+    def append_history(self, subscriber_id, action, notes=None):
+        """Record a history event for the subscriber; returns its id"""
+        if action not in HISTORY_ACTIONS:
+            raise ValueError(f"Unknown history action: {action!r}")
+        with self.transaction() as cursor:
+            cursor.execute(
+                "INSERT INTO subscription_history (subscriber_id, action, notes) VALUES (%s, %s, %s)",
+                (subscriber_id, action, notes))
+            history_id = cursor.lastrowid
+            record_events(cursor, [(subscriber_id, 'history.appended',
+                                    {'history_id': history_id, 'action': action, 'notes': notes})])
+        return history_id
+
+    def list_history(self, subscriber_id, limit=100):
+        """Return the subscriber's history events oldest first as HistoryEntry tuples (not cached)"""
+        return [HistoryEntry(*row) for row in self._select(HISTORY_QUERY, (subscriber_id, limit))]
+
+    def cache_stats(self):
+        """Return the cache's hit/miss/eviction counters"""
+        return self.cache.stats()
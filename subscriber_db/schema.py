@@ -0,0 +1,35 @@
+"""
+Schema constants mirroring the Flyway migrations (V1-V4)
+"""
+
+TABLES = ('subscribers', 'subscription_preferences', 'subscription_history')
+
+FREQUENCIES = ('daily', 'weekly', 'monthly')
+
+HISTORY_ACTIONS = ('subscribed', 'unsubscribed', 'updated', 'reactivated')
+
+SUBSCRIBER_COLUMNS = ('email', 'first_name', 'last_name', 'is_active')
+
+PREFERENCE_COLUMNS = ('newsletter_enabled', 'marketing_enabled', 'frequency')
+
+PREFERENCE_DEFAULTS = {
+    'newsletter_enabled': True,
+    'marketing_enabled': False,
+    'frequency': 'weekly',
+}
+
+
+def parse_bool(value, default=None):
+    """Parse booleans from CSV/JSON style values ('1', 'true', 'yes', True, ...)"""
+    if value is None or value == '':
+        return default
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, (int, float)):
+        return bool(value)
+    text = str(value).strip().lower()
+    if text in ('1', 'true', 't', 'yes', 'y'):
+        return True
+    if text in ('0', 'false', 'f', 'no', 'n'):
+        return False
+    raise ValueError(f"Not a boolean: {value!r}")
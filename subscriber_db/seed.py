@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""
+Synthetic Data Generator
+Seeds subscribers, one subscription_preferences row each and a
+variable-length subscription_history per subscriber from an RNG seeded
+per subscriber, so the same seed, size, start id and reference end always
+produce the same rows whatever the chunk size. Rows are
+loaded with multi-row INSERTs by parallel per-table loaders.
+"""
+
+import argparse
+import queue
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+
+from .batching import values_clause
+from .pool import get_pool
+from .reporting import RateTracker
+
+# Default end of the generated timeline: a fixed date, so runs on different days match, recent
+# enough that history fills V4's monthly partitions rather than only p_history
+REFERENCE_END = datetime(2026, 10, 1)
+
+FIRST_NAMES = (
+    'James', 'Mary', 'John', 'Patricia', 'Robert', 'Jennifer', 'Michael', 'Linda', 'William',
+    'Elizabeth', 'David', 'Barbara', 'Richard', 'Susan', 'Joseph', 'Jessica', 'Thomas', 'Sarah',
+    'Charles', 'Karen', 'Wei', 'Priya', 'Mohammed', 'Fatima', 'Carlos', 'Sofia', 'Hiroshi',
+    'Yuki', 'Olga', 'Ivan', 'Amara', 'Kwame', 'Lucas', 'Emma', 'Noah', 'Olivia', 'Liam', 'Ava',
+)
+
+LAST_NAMES = (
+    'Smith', 'Johnson', 'Williams', 'Brown', 'Jones', 'Garcia', 'Miller', 'Davis', 'Rodriguez',
+    'Martinez', 'Hernandez', 'Lopez', 'Wilson', 'Anderson', 'Thomas', 'Taylor', 'Moore', 'Martin',
+    'Lee', 'Wang', 'Li', 'Zhang', 'Kumar', 'Singh', 'Patel', 'Nguyen', 'Kim', 'Tanaka', 'Sato',
+    'Ivanov', 'Okafor', 'Mensah', 'Silva', 'Santos', 'Muller', 'Schmidt', 'Rossi', 'Dubois',
+)
+
+# Consumer mailbox providers by share; the remainder goes to a long tail of company domains
+DOMAIN_WEIGHTS = {
+    'gmail.com': 38,
+    'yahoo.com': 11,
+    'hotmail.com': 9,
+    'outlook.com': 8,
+    'icloud.com': 6,
+    'aol.com': 2,
+    'protonmail.com': 2,
+    'gmx.de': 2,
+}
+CORPORATE_SHARE = 22
+CORPORATE_DOMAINS = 2000
+
+FREQUENCY_WEIGHTS = {'weekly': 60, 'monthly': 25, 'daily': 15}
+
+DEFAULT_PROFILE = {
+    'active_ratio': 0.85,
+    'newsletter_ratio': 0.8,
+    'marketing_ratio': 0.3,
+    'avg_history': 1.5,
+    'years': 5,
+    'reference_end': REFERENCE_END,
+}
+
+SUBSCRIBER_INSERT = ("INSERT INTO subscribers "
+                     "(id, email, first_name, last_name, is_active, created_at, updated_at) VALUES ")
+PREFERENCE_INSERT = ("INSERT INTO subscription_preferences "
+                     "(subscriber_id, newsletter_enabled, marketing_enabled, frequency, created_at, updated_at) "
+                     "VALUES ")
+HISTORY_INSERT = "INSERT INTO subscription_history (subscriber_id, action, action_date, notes) VALUES "
+
+TABLE_INSERTS = {
+    'subscribers': SUBSCRIBER_INSERT,
+    'subscription_preferences': PREFERENCE_INSERT,
+    'subscription_history': HISTORY_INSERT,
+}
+
+
+def _email(rng, first, last, subscriber_id, domains, domain_weights):
+    """Letters-only prefix plus the id, so emails are unique by construction"""
+    style = rng.random()
+    if style < 0.5:
+        local = f"{first}.{last}"
+    elif style < 0.7:
+        local = f"{first[0]}{last}"
+    elif style < 0.85:
+        local = f"{first}_{last}"
+    else:
+        local = first
+    domain = rng.choices(domains, domain_weights)[0]
+    if domain is None:
+        # Pareto-distributed company index: a few large employers, many small ones
+        domain = f"corp{int(rng.paretovariate(1.1)) % CORPORATE_DOMAINS}.example.com"
+    return f"{local}{subscriber_id}@{domain}".lower()
+
+
+def _history(rng, subscriber_id, created_at, is_active, avg_history, reference_end):
+    """Return history rows whose final state agrees with is_active"""
+    continue_probability = avg_history / (1.0 + avg_history)
+    actions = ['subscribed']
+    active = True
+    while rng.random() < continue_probability:
+        if active:
+            action = 'updated' if rng.random() < 0.7 else 'unsubscribed'
+        else:
+            action = 'reactivated'
+        actions.append(action)
+        active = action != 'unsubscribed'
+    if active != is_active:
+        actions.append('unsubscribed' if active else 'reactivated')
+
+    span = max((reference_end - created_at).total_seconds(), 1.0)
+    offsets = sorted(rng.uniform(0, span) for _ in actions[1:])
+    rows = [(subscriber_id, 'subscribed', created_at, 'Initial subscription')]
+    for action, offset in zip(actions[1:], offsets):
+        rows.append((subscriber_id, action, created_at + timedelta(seconds=int(offset)), None))
+    return rows
+
+
+def generate_chunk(seed, first_id, count, profile=None):
+    """Generate rows for subscribers first_id..first_id+count-1.
+
+    Returns (subscribers, preferences, history) lists of tuples in the
+    column order of the INSERT statements above. The RNG is reseeded from
+    (seed, subscriber_id) for every subscriber, so a subscriber's rows do
+    not depend on which chunk generates them and chunks can be generated
+    independently and in any order.
+    """
+    profile = dict(DEFAULT_PROFILE, **(profile or {}))
+    rng = random.Random()
+    domains = list(DOMAIN_WEIGHTS) + [None]
+    domain_weights = list(DOMAIN_WEIGHTS.values()) + [CORPORATE_SHARE]
+    frequencies = list(FREQUENCY_WEIGHTS)
+    frequency_weights = list(FREQUENCY_WEIGHTS.values())
+    timeline = int(profile['years'] * 365 * 86400)
+    reference_end = profile['reference_end']
+
+    subscribers, preferences, history = [], [], []
+    for subscriber_id in range(first_id, first_id + count):
+        rng.seed(f"{seed}:{subscriber_id}")
+        first = rng.choice(FIRST_NAMES)
+        last = rng.choice(LAST_NAMES)
+        # Signups skew recent: squaring the draw pulls offsets towards the reference end
+        created_at = reference_end - timedelta(seconds=int(timeline * rng.random() ** 2))
+        is_active = rng.random() < profile['active_ratio']
+        rows = _history(rng, subscriber_id, created_at, is_active, profile['avg_history'], reference_end)
+        updated_at = rows[-1][2]
+        subscribers.append((subscriber_id, _email(rng, first, last, subscriber_id, domains, domain_weights),
+                            first, last, is_active, created_at, updated_at))
+        preferences.append((subscriber_id, rng.random() < profile['newsletter_ratio'],
+                            rng.random() < profile['marketing_ratio'],
+                            rng.choices(frequencies, frequency_weights)[0], created_at, updated_at))
+        history.extend(rows)
+    return subscribers, preferences, history
+
+
+def next_subscriber_id(pool):
+    """Return the first id above every existing subscriber"""
+    with pool.cursor() as cursor:
+        cursor.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM subscribers")
+        return cursor.fetchone()[0]
+
+
+def load_rows(conn, table, rows):
+    """Insert rows into table with one multi-row INSERT and commit"""
+    placeholders, params = values_clause(rows)
+    cursor = conn.cursor()
+    try:
+        cursor.execute(TABLE_INSERTS[table] + placeholders, params)
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+def seed_database(pool, count, start_id, seed=0, chunk_size=1000, workers=2,
+                  defer_checks=False, profile=None, on_batch=None, tables=None):
+    """Generate and load count subscribers starting at start_id; returns a report dict.
+
+    One generator feeds a bounded queue per table and each table has workers
+    loader threads. With foreign key checks on, a chunk's preference and
+    history rows are queued only after its subscribers commit. defer_checks
+    loads preferences alongside subscribers; it expects a pool whose
+    sessions set foreign_key_checks=0 and unique_checks=0, as main() does.
+    tables restricts loading to a subset (e.g. only subscribers before V2).
+    """
+    tables = [table for table in TABLE_INSERTS if tables is None or table in tables]
+    if 'subscribers' not in tables:
+        raise ValueError("Seeding requires the subscribers table")
+    queues = {table: queue.Queue(maxsize=workers * 4) for table in tables}
+    trackers = {table: RateTracker() for table in tables}
+    lock = threading.Lock()
+    failed = threading.Event()
+    errors = []
+
+    def loader(table):
+        while True:
+            item = queues[table].get()
+            if item is None:
+                return
+            if failed.is_set():
+                continue
+            rows, children = item
+            try:
+                started = time.monotonic()
+                with pool.connection() as conn:
+                    load_rows(conn, table, rows)
+                seconds = time.monotonic() - started
+            except Exception as e:
+                with lock:
+                    errors.append(e)
+                failed.set()
+                continue
+            with lock:
+                trackers[table].record_batch(len(rows), seconds)
+                if on_batch:
+                    on_batch(table, len(rows), seconds)
+            for child_table, child_rows in children:
+                queues[child_table].put((child_rows, ()))
+
+    threads = {table: [threading.Thread(target=loader, args=(table,), daemon=True) for _ in range(workers)]
+               for table in tables}
+    for table_threads in threads.values():
+        for thread in table_threads:
+            thread.start()
+
+    started = time.monotonic()
+    for first_id in range(start_id, start_id + count, chunk_size):
+        if failed.is_set():
+            break
+        size = min(chunk_size, start_id + count - first_id)
+        subscribers, preferences, history = generate_chunk(seed, first_id, size, profile)
+        children = [(table, rows) for table, rows in
+                    (('subscription_preferences', preferences), ('subscription_history', history))
+                    if table in tables]
+        if defer_checks:
+            # History's subscriber check is a trigger (V4), which foreign_key_checks=0 does not disable
+            queues['subscribers'].put((subscribers, [c for c in children if c[0] == 'subscription_history']))
+            for child_table, child_rows in children:
+                if child_table != 'subscription_history':
+                    queues[child_table].put((child_rows, ()))
+        else:
+            queues['subscribers'].put((subscribers, children))
+
+    # Subscribers finish first because their loaders may still enqueue child rows
+    for table in tables:
+        for _ in threads[table]:
+            queues[table].put(None)
+        for thread in threads[table]:
+            thread.join()
+    elapsed = time.monotonic() - started
+
+    if errors:
+        raise errors[0]
+    report = {table: trackers[table].summary() for table in tables}
+    total = sum(summary['rows'] for summary in report.values())
+    return {
+        'subscribers': count,
+        'start_id': start_id,
+        'seed': seed,
+        'reference_end': dict(DEFAULT_PROFILE, **(profile or {}))['reference_end'].isoformat(sep=' '),
+        'elapsed': elapsed,
+        'rows': total,
+        'rows_per_sec': total / elapsed if elapsed > 0 else 0.0,
+        'tables': report,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Seed subscriber_db with a reproducible synthetic dataset")
+    parser.add_argument('--subscribers', '-n', type=int, default=100000, help="Subscribers to generate")
+    parser.add_argument('--seed', type=int, default=0, help="RNG seed")
+    parser.add_argument('--start-id', type=int, help="First subscriber id (default: above the current max)")
+    parser.add_argument('--chunk-size', type=int, default=1000, help="Subscribers per INSERT")
+    parser.add_argument('--workers', type=int, default=2, help="Loader threads per table")
+    parser.add_argument('--defer-checks', action='store_true',
+                        help="Load with foreign_key_checks=0 and unique_checks=0 (empty or seed-only tables)")
+    parser.add_argument('--active-ratio', type=float, default=DEFAULT_PROFILE['active_ratio'])
+    parser.add_argument('--avg-history', type=float, default=DEFAULT_PROFILE['avg_history'],
+                        help="Mean history events per subscriber beyond the initial subscription")
+    parser.add_argument('--years', type=float, default=DEFAULT_PROFILE['years'],
+                        help="Signup dates span this many years before the reference end")
+    parser.add_argument('--reference-end', type=datetime.fromisoformat, default=REFERENCE_END,
+                        help=f"End of the generated timeline, part of the dataset's identity "
+                             f"(default {REFERENCE_END:%Y-%m-%d})")
+    args = parser.parse_args()
+
+    session_settings = {'foreign_key_checks': 0, 'unique_checks': 0} if args.defer_checks else None
+    pool = get_pool('seed', session_settings=session_settings,
+                    min_size=1, max_size=args.workers * len(TABLE_INSERTS))
+    start_id = args.start_id or next_subscriber_id(pool)
+    profile = {'active_ratio': args.active_ratio, 'avg_history': args.avg_history, 'years': args.years,
+               'reference_end': args.reference_end}
+    progress = {'subscribers': 0}
+
+    def on_batch(table, rows, seconds):
+        if table == 'subscribers':
+            progress['subscribers'] += rows
+            print(f"  {progress['subscribers']:>10} / {args.subscribers} subscribers "
+                  f"({rows / seconds:.0f} rows/s)", end='\r', flush=True)
+
+    print(f"🌱 Seeding {args.subscribers} subscribers from id {start_id} "
+          f"(seed {args.seed}, reference end {args.reference_end:%Y-%m-%d})")
+    report = seed_database(pool, args.subscribers, start_id, args.seed, args.chunk_size,
+                           args.workers, args.defer_checks, profile, on_batch)
+    print()
+    for table, summary in report['tables'].items():
+        print(f"  {table:<26} {summary['rows']:>10} rows  {summary['rows_per_sec']:>9.0f} rows/s  "
+              f"batch p95 {summary['batch_ms_p95']:.1f} ms")
+    print(f"✅ {report['rows']} rows in {report['elapsed']:.1f}s ({report['rows_per_sec']:.0f} rows/s)")
+    with pool.cursor() as cursor:
+        cursor.execute("ANALYZE TABLE " + ", ".join(TABLE_INSERTS))
+        cursor.fetchall()
+
+
+if __name__ == "__main__":
+    main()
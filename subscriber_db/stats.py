@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+"""
+Table Statistics
+Reads the exact row counters that the V5 triggers keep in table_stats
+(subscribers total/active, preferences per frequency, history per action)
+instead of running SELECT COUNT(*) scans. Counters are sharded rows summed
+on read. --verify compares them with a real scan, --rebuild recounts them.
+"""
+
+import argparse
+import json
+import sys
+
+from .pool import get_pool
+from .schema import FREQUENCIES, HISTORY_ACTIONS
+
+STATS_TABLE = 'table_stats'
+
+# The same recount the V5 migration backfills from
+SCAN_QUERY = """
+    SELECT 'subscribers', COUNT(*) FROM subscribers
+    UNION ALL
+    SELECT 'subscribers.active', COUNT(*) FROM subscribers WHERE is_active
+    UNION ALL
+    SELECT 'subscription_preferences', COUNT(*) FROM subscription_preferences
+    UNION ALL
+    SELECT CONCAT('subscription_preferences.frequency.', COALESCE(frequency, 'none')), COUNT(*)
+    FROM subscription_preferences GROUP BY frequency
+    UNION ALL
+    SELECT 'subscription_history', COUNT(*) FROM subscription_history
+    UNION ALL
+    SELECT CONCAT('subscription_history.action.', action), COUNT(*)
+    FROM subscription_history GROUP BY action
+"""
+
+
+def stats_available(cursor):
+    cursor.execute("SELECT COUNT(*) FROM information_schema.tables "
+                   "WHERE table_schema = DATABASE() AND table_name = %s", (STATS_TABLE,))
+    return cursor.fetchone()[0] > 0
+
+
+def read_counters(cursor):
+    """Return {counter name: value}, summing the shard rows"""
+    cursor.execute(f"SELECT name, SUM(value) FROM {STATS_TABLE} GROUP BY name")
+    return {name: int(value) for name, value in cursor.fetchall()}
+
+
+def scan_counters(cursor):
+    """Return the same counters computed with COUNT(*) scans"""
+    cursor.execute(SCAN_QUERY)
+    return {name: int(value) for name, value in cursor.fetchall()}
+
+
+def adjust(cursor, deltas):
+    """Add {counter name: delta} to the counters, for changes that bypass the triggers"""
+    rows = [(name, delta) for name, delta in deltas.items() if delta]
+    if rows:
+        cursor.executemany(f"INSERT INTO {STATS_TABLE} (name, shard, value) VALUES (%s, 0, %s) "
+                           f"ON DUPLICATE KEY UPDATE value = value + VALUES(value)", rows)
+
+
+def history_partition_deltas(cursor, partitions):
+    """Counter deltas for dropping whole subscription_history partitions (DDL fires no triggers)"""
+    cursor.execute(f"SELECT action, COUNT(*) FROM subscription_history "
+                   f"PARTITION ({', '.join(partitions)}) GROUP BY action")
+    deltas = {}
+    for action, count in cursor.fetchall():
+        deltas[f"subscription_history.action.{action}"] = -int(count)
+        deltas['subscription_history'] = deltas.get('subscription_history', 0) - int(count)
+    return deltas
+
+
+def summarize(counters):
+    """Shape flat counters into per-table totals and breakdowns"""
+    subscribers = counters.get('subscribers', 0)
+    active = counters.get('subscribers.active', 0)
+    return {
+        'subscribers': {'total': subscribers, 'active': active, 'inactive': subscribers - active},
+        'subscription_preferences': {
+            'total': counters.get('subscription_preferences', 0),
+            'frequency': {f: counters.get(f"subscription_preferences.frequency.{f}", 0) for f in FREQUENCIES},
+        },
+        'subscription_history': {
+            'total': counters.get('subscription_history', 0),
+            'action': {a: counters.get(f"subscription_history.action.{a}", 0) for a in HISTORY_ACTIONS},
+        },
+    }
+
+
+def get_stats(pool=None, scan_fallback=True):
+    """Return summarize()d counters plus the migration count.
+
+    flyway_schema_history holds one row per migration, so it is counted
+    directly. Before V5 is applied the counters are scanned instead when
+    scan_fallback is set; 'source' says which was used.
+    """
+    pool = pool or get_pool()
+    with pool.cursor() as cursor:
+        if stats_available(cursor):
+            counters, source = read_counters(cursor), 'counters'
+        elif scan_fallback:
+            counters, source = scan_counters(cursor), 'scan'
+        else:
+            raise LookupError(f"{STATS_TABLE} does not exist; apply the V5 migration")
+        cursor.execute("SELECT COUNT(*) FROM flyway_schema_history")
+        stats = summarize(counters)
+        stats['flyway_schema_history'] = {'total': cursor.fetchone()[0]}
+    stats['source'] = source
+    return stats
+
+
+def table_counts(stats):
+    """Return {table: total rows} from get_stats()"""
+    return {table: value['total'] for table, value in stats.items() if isinstance(value, dict)}
+
+
+def verify(pool=None):
+    """Return {counter: (counted, scanned)} for every counter that has drifted"""
+    pool = pool or get_pool()
+    with pool.cursor() as cursor:
+        counters, scanned = read_counters(cursor), scan_counters(cursor)
+    return {name: (counters.get(name, 0), scanned.get(name, 0))
+            for name in sorted(set(counters) | set(scanned))
+            if counters.get(name, 0) != scanned.get(name, 0)}
+
+
+def rebuild(pool=None):
+    """Recount every counter from the tables; returns the new counters.
+
+    Deleting the counter rows first locks them (and the gaps between
+    them), so writers block in their triggers until the recount commits.
+    Their uncommitted rows are invisible to the recount and their counter
+    updates land afterwards, so nothing is missed or counted twice.
+    """
+    pool = pool or get_pool()
+    with pool.connection() as conn:
+        cursor = conn.cursor()
+        try:
+            conn.start_transaction()
+            cursor.execute(f"DELETE FROM {STATS_TABLE}")
+            counters = scan_counters(cursor)
+            adjust(cursor, counters)
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+    return counters
+
+
+def print_stats(stats):
+    print(f"📊 Table statistics (from {stats['source']}):")
+    subscribers = stats['subscribers']
+    print(f"  subscribers: {subscribers['total']} ({subscribers['active']} active, "
+          f"{subscribers['inactive']} inactive)")
+    preferences = stats['subscription_preferences']
+    breakdown = ', '.join(f"{name} {count}" for name, count in preferences['frequency'].items())
+    print(f"  subscription_preferences: {preferences['total']} ({breakdown})")
+    history = stats['subscription_history']
+    breakdown = ', '.join(f"{name} {count}" for name, count in history['action'].items())
+    print(f"  subscription_history: {history['total']} ({breakdown})")
+    print(f"  flyway_schema_history: {stats['flyway_schema_history']['total']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show trigger-maintained table statistics")
+    parser.add_argument('--json', action='store_true', help="Print the statistics as JSON")
+    parser.add_argument('--verify', action='store_true', help="Compare the counters with COUNT(*) scans")
+    parser.add_argument('--rebuild', action='store_true', help="Recount the counters from the tables")
+    args = parser.parse_args()
+
+    if args.rebuild:
+        counters = rebuild()
+        print(f"✅ Rebuilt {len(counters)} counters")
+    if args.verify:
+        drift = verify()
+        for name, (counted, scanned) in drift.items():
+            print(f"  ❌ {name}: counter {counted}, scan {scanned}")
+        if drift:
+            sys.exit(1)
+        print("✅ Counters match the tables")
+        return
+
+    stats = get_stats()
+    if args.json:
+        print(json.dumps(stats, indent=2))
+    else:
+        print_stats(stats)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Test Environment Helpers
+Provisions isolated, fully migrated schemas for parallel test workers and
+compares serial against parallel suite wall-clock time.
+"""
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+
+from .config import db_config
+from .migrations import REPO_ROOT, schema_runner
+from .pool import get_pool
+
+SCHEMA_NAME_PATTERN = re.compile(r'^[A-Za-z0-9_]+$')
+
+
+def worker_schema_name(base, worker_id):
+    """Return the per-worker schema name, e.g. subscriber_db_gw0"""
+    name = f"{base}_{worker_id}"
+    if not SCHEMA_NAME_PATTERN.match(name):
+        raise ValueError(f"Invalid schema name: {name!r}")
+    return name
+
+
+def provision_schema(name, user=None, target=None):
+    """(Re)create schema name, grant it to the application user and migrate it (up to target)"""
+    if not SCHEMA_NAME_PATTERN.match(name):
+        raise ValueError(f"Invalid schema name: {name!r}")
+    user = user or db_config()['user']
+    conn = get_pool('admin', admin=True).connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"DROP DATABASE IF EXISTS `{name}`")
+        cursor.execute(f"CREATE DATABASE `{name}`")
+        cursor.execute(f"GRANT ALL PRIVILEGES ON `{name}`.* TO %s@'%%'", (user,))
+    finally:
+        cursor.close()
+        conn.close()
+    runner = schema_runner(name, admin=True)
+    try:
+        runner.migrate(target=target)
+    finally:
+        runner.pool.close()
+
+
+def drop_schema(name):
+    """Drop a schema created by provision_schema"""
+    if not SCHEMA_NAME_PATTERN.match(name):
+        raise ValueError(f"Invalid schema name: {name!r}")
+    conn = get_pool('admin', admin=True).connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f"DROP DATABASE IF EXISTS `{name}`")
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def run_suite(pytest_args, workers=0):
+    """Run pytest from the repository root and return (exit code, wall seconds)"""
+    cmd = [sys.executable, '-m', 'pytest', '-q'] + list(pytest_args)
+    if workers:
+        cmd += ['-n', str(workers)]
+    started = time.monotonic()
+    result = subprocess.run(cmd, cwd=REPO_ROOT)
+    return result.returncode, time.monotonic() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare serial and parallel test suite wall clock")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 2)
+    parser.add_argument('--json', help="Write the timing report to this file")
+    parser.add_argument('pytest_args', nargs='*', default=['tests/'])
+    args = parser.parse_args()
+
+    print(f"⏱️  Serial run: pytest {' '.join(args.pytest_args)}")
+    serial_code, serial_time = run_suite(args.pytest_args)
+    print(f"⏱️  Parallel run with {args.workers} workers")
+    parallel_code, parallel_time = run_suite(args.pytest_args, args.workers)
+
+    report = {
+        'workers': args.workers,
+        'serial_seconds': serial_time,
+        'parallel_seconds': parallel_time,
+        'speedup': serial_time / parallel_time if parallel_time else 0.0,
+        'serial_exit_code': serial_code,
+        'parallel_exit_code': parallel_code,
+    }
+    print("\n" + "=" * 60)
+    print(f"Serial:   {serial_time:.2f}s (exit {serial_code})")
+    print(f"Parallel: {parallel_time:.2f}s (exit {parallel_code}, {args.workers} workers)")
+    print(f"Speedup:  {report['speedup']:.2f}x")
+    print("=" * 60)
+    if args.json:
+        with open(args.json, 'w') as handle:
+            json.dump(report, handle, indent=2)
+    sys.exit(serial_code or parallel_code)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,11 +4,13 @@ Flyway Migration System Test
 Verifies that Flyway migrations are properly configured and can be executed
 """
 
-import subprocess
 import os
-import mysql.connector
 from datetime import datetime
 
+from subscriber_db import get_pool
+from subscriber_db.migrations import MigrationRunner, print_info
+from subscriber_db.stats import get_stats, table_counts
+
 def test_flyway_migrations():
     print("=" * 60)
     print("FLYWAY MIGRATION SYSTEM TEST")
@@ -30,13 +32,7 @@ def test_flyway_migrations():
     # Check database schema
     print("\n🗄️  Checking Database Schema:")
     try:
-        conn = mysql.connector.connect(
-            host='127.0.0.1',
-            port=3307,
-            user='subscriber_user',
-            password='SubscriberPass123',
-            database='subscriber_db'
-        )
+        conn = get_pool().connection()
         cursor = conn.cursor()
         
         # Check tables
@@ -45,17 +41,15 @@ def test_flyway_migrations():
         expected_tables = ['subscribers', 'subscription_preferences', 'subscription_history']
         
         print(f"  Tables found: {tables}")
+        counts = table_counts(get_stats())
         for table in expected_tables:
             if table in tables:
-                cursor.execute(f"SELECT COUNT(*) FROM {table}")
-                count = cursor.fetchone()[0]
-                print(f"    ✅ {table}: {count} records")
+                print(f"    ✅ {table}: {counts[table]} records")
             else:
                 print(f"    ❌ {table}: NOT FOUND")
         
         # Check Flyway schema history
-        cursor.execute("SELECT COUNT(*) FROM flyway_schema_history")
-        flyway_count = cursor.fetchone()[0]
+        flyway_count = counts['flyway_schema_history']
         print(f"  Flyway schema history: {flyway_count} entries")
         
         cursor.close()
@@ -65,46 +59,18 @@ def test_flyway_migrations():
         print(f"  ❌ Database connection failed: {e}")
         return False
     
+    runner = MigrationRunner(pool=get_pool())
+    
     # Test Flyway validation
     print("\n🔍 Testing Flyway Validation:")
     try:
-        # Test initial migrations
-        cmd = [
-            'docker', 'run', '--rm', '--network', 'assignment4_default',
-            '-v', f'{os.getcwd()}/migrations/initial:/flyway/sql',
-            'redgate/flyway',
-            '-user=subscriber_user',
-            '-password=SubscriberPass123',
-            '-url=jdbc:mysql://assignment4-db-1:3306/subscriber_db?allowPublicKeyRetrieval=true&useSSL=false',
-            '-locations=filesystem:/flyway/sql',
-            'validate'
-        ]
-        
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        if result.returncode == 0:
-            print("  ✅ Initial migrations validation: PASSED")
-        else:
-            print(f"  ❌ Initial migrations validation: FAILED")
-            print(f"    Error: {result.stderr}")
-        
-        # Test incremental migrations
-        cmd = [
-            'docker', 'run', '--rm', '--network', 'assignment4_default',
-            '-v', f'{os.getcwd()}/migrations/incremental:/flyway/sql',
-            'redgate/flyway',
-            '-user=subscriber_user',
-            '-password=SubscriberPass123',
-            '-url=jdbc:mysql://assignment4-db-1:3306/subscriber_db?allowPublicKeyRetrieval=true&useSSL=false',
-            '-locations=filesystem:/flyway/sql',
-            'validate'
-        ]
-        
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        if result.returncode == 0:
-            print("  ✅ Incremental migrations validation: PASSED")
+        errors = runner.validate()
+        if not errors:
+            print(f"  ✅ Migrations validation ({len(runner.migrations)} scripts): PASSED")
         else:
-            print(f"  ❌ Incremental migrations validation: FAILED")
-            print(f"    Error: {result.stderr}")
+            print(f"  ❌ Migrations validation: FAILED")
+            for error in errors:
+                print(f"    Error: {error}")
             
     except Exception as e:
         print(f"  ❌ Flyway validation failed: {e}")
@@ -112,24 +78,9 @@ def test_flyway_migrations():
     # Test migration info
     print("\n📊 Testing Flyway Info:")
     try:
-        cmd = [
-            'docker', 'run', '--rm', '--network', 'assignment4_default',
-            '-v', f'{os.getcwd()}/migrations:/flyway/sql',
-            'redgate/flyway',
-            '-user=subscriber_user',
-            '-password=SubscriberPass123',
-            '-url=jdbc:mysql://assignment4-db-1:3306/subscriber_db?allowPublicKeyRetrieval=true&useSSL=false',
-            '-locations=filesystem:/flyway/sql/initial,filesystem:/flyway/sql/incremental',
-            'info'
-        ]
-        
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        if result.returncode == 0:
-            print("  ✅ Flyway info command: PASSED")
-            print("  📋 Migration status retrieved successfully")
-        else:
-            print(f"  ❌ Flyway info command: FAILED")
-            print(f"    Error: {result.stderr}")
+        print_info(runner.info())
+        print("  ✅ Flyway info command: PASSED")
+        print("  📋 Migration status retrieved successfully")
             
     except Exception as e:
         print(f"  ❌ Flyway info failed: {e}")
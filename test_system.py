@@ -4,18 +4,36 @@ Comprehensive System Testing Script
 Tests all components of the Assignment 4 implementation
 """
 
+import argparse
 import subprocess
 import sys
-import time
-import mysql.connector
 import os
 from datetime import datetime
 
+from subscriber_db import get_pool
+from subscriber_db.config import admin_config
+from subscriber_db.checks import Check, human_output, print_summary, run_checks, write_json
+from subscriber_db.migrations import MigrationRunner
+from subscriber_db.readiness import wait_for_db
+from subscriber_db.stats import get_stats
+
 def print_status(message, status="INFO"):
     """Print formatted status messages"""
     timestamp = datetime.now().strftime("%H:%M:%S")
     print(f"[{timestamp}] [{status}] {message}")
 
+def test_database_ready():
+    """Test 0: Wait until the database accepts connections"""
+    print_status("Waiting for the database...", "TEST")
+    # Probe as root: subscriber_user only exists once the setup check below has run
+    readiness = wait_for_db(config=admin_config(), deadline=30)
+    if readiness['ready']:
+        print_status(f"✅ Database ready after {readiness['time_to_ready']:.2f}s "
+                     f"({readiness['attempts']} attempts)", "PASS")
+        return True
+    print_status(f"❌ Database not ready: {readiness['last_error']}", "FAIL")
+    return False
+
 def test_docker_environment():
     """Test 1: Verify Docker containers are running"""
     print_status("Testing Docker Environment...", "TEST")
@@ -41,12 +59,7 @@ def test_database_connection():
     print_status("Testing Database Connection...", "TEST")
     
     try:
-        connection = mysql.connector.connect(
-            host='127.0.0.1',
-            port=3307,
-            user='root',
-            password='Secret5555'
-        )
+        connection = get_pool('admin', admin=True).connection()
         cursor = connection.cursor()
         cursor.execute("SHOW DATABASES")
         databases = [row[0] for row in cursor.fetchall()]
@@ -66,12 +79,7 @@ def test_subscriber_database_setup():
     
     try:
         # Create database and user
-        connection = mysql.connector.connect(
-            host='127.0.0.1',
-            port=3307,
-            user='root',
-            password='Secret5555'
-        )
+        connection = get_pool('admin', admin=True).connection()
         cursor = connection.cursor()
         
         # Create database
@@ -101,42 +109,20 @@ def test_flyway_migrations():
     print_status("Testing Flyway Migrations...", "TEST")
     
     try:
-        # Test initial migrations
-        cmd = [
-            'docker', 'run', '--rm',
-            '-v', f'{os.getcwd()}/migrations/initial:/flyway/sql',
-            'redgate/flyway',
-            '-user=subscriber_user',
-            '-password=SubscriberPass123',
-            '-url=jdbc:mysql://host.docker.internal:3307/subscriber_db',
-            'migrate'
-        ]
+        runner = MigrationRunner(pool=get_pool())
+        results = runner.migrate()
+        for result in results:
+            print_status(f"✅ Applied V{result['version']} {result['description']} "
+                         f"({result['execution_ms']} ms)", "PASS")
+        if not results:
+            print_status("✅ Schema is up to date", "PASS")
         
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        if result.returncode == 0:
-            print_status("✅ Initial migrations successful", "PASS")
-        else:
-            print_status(f"❌ Initial migrations failed: {result.stderr}", "FAIL")
-            return False
-        
-        # Test incremental migrations
-        cmd = [
-            'docker', 'run', '--rm',
-            '-v', f'{os.getcwd()}/migrations/incremental:/flyway/sql',
-            'redgate/flyway',
-            '-user=subscriber_user',
-            '-password=SubscriberPass123',
-            '-url=jdbc:mysql://host.docker.internal:3307/subscriber_db',
-            'migrate'
-        ]
-        
-        result = subprocess.run(cmd, capture_output=True, text=True)
-        if result.returncode == 0:
-            print_status("✅ Incremental migrations successful", "PASS")
-            return True
-        else:
-            print_status(f"❌ Incremental migrations failed: {result.stderr}", "FAIL")
+        errors = runner.validate()
+        if errors:
+            print_status(f"❌ Migration validation failed: {errors}", "FAIL")
             return False
+        print_status("✅ Migration checksums validated", "PASS")
+        return True
             
     except Exception as e:
         print_status(f"❌ Flyway test failed: {e}", "FAIL")
@@ -147,13 +133,7 @@ def test_database_schema():
     print_status("Testing Database Schema...", "TEST")
     
     try:
-        connection = mysql.connector.connect(
-            host='127.0.0.1',
-            port=3307,
-            user='subscriber_user',
-            password='SubscriberPass123',
-            database='subscriber_db'
-        )
+        connection = get_pool().connection()
         cursor = connection.cursor()
         
         # Check tables
@@ -168,8 +148,7 @@ def test_database_schema():
             return False
         
         # Check subscriber data
-        cursor.execute("SELECT COUNT(*) FROM subscribers")
-        count = cursor.fetchone()[0]
+        count = get_stats()['subscribers']['total']
         print_status(f"✅ Subscribers table has {count} records", "PASS")
         
         cursor.close()
@@ -223,13 +202,7 @@ def test_crud_operations():
         os.environ['DB_NAME'] = 'subscriber_db'
         
         # Run a simple test
-        connection = mysql.connector.connect(
-            host='127.0.0.1',
-            port=3307,
-            user='subscriber_user',
-            password='SubscriberPass123',
-            database='subscriber_db'
-        )
+        connection = get_pool().connection()
         cursor = connection.cursor(dictionary=True)
         
         # Test CREATE
@@ -362,32 +335,38 @@ def test_documentation():
         print_status(f"❌ Documentation test failed: {e}", "FAIL")
         return False
 
-def main():
-    """Run all tests"""
+def system_checks():
+    """Return the checks; the database checks form a chain, the file and tooling checks run alongside it"""
+    return [
+        Check("Database Ready", test_database_ready),
+        Check("Docker Environment", test_docker_environment),
+        Check("Database Connection", test_database_connection, ["Database Ready"]),
+        Check("Subscriber Database Setup", test_subscriber_database_setup, ["Database Connection"]),
+        Check("Flyway Migrations", test_flyway_migrations, ["Subscriber Database Setup"]),
+        Check("Database Schema", test_database_schema, ["Flyway Migrations"]),
+        Check("Python Dependencies", test_python_dependencies),
+        Check("CRUD Operations", test_crud_operations, ["Database Schema"]),
+        Check("GitHub Actions Workflow", test_github_actions_workflow),
+        Check("Documentation", test_documentation)
+    ]
+
+def run_all_tests(workers):
+    """Run all tests, printing progress and results; returns the check report"""
     print("=" * 60)
     print("ASSIGNMENT 4 - COMPREHENSIVE SYSTEM TESTING")
     print("=" * 60)
     
-    tests = [
-        ("Docker Environment", test_docker_environment),
-        ("Database Connection", test_database_connection),
-        ("Subscriber Database Setup", test_subscriber_database_setup),
-        ("Flyway Migrations", test_flyway_migrations),
-        ("Database Schema", test_database_schema),
-        ("Python Dependencies", test_python_dependencies),
-        ("CRUD Operations", test_crud_operations),
-        ("GitHub Actions Workflow", test_github_actions_workflow),
-        ("Documentation", test_documentation)
-    ]
+    tests = system_checks()
     
-    passed = 0
-    total = len(tests)
+    def report_skip(result):
+        if result['status'] == 'skipped':
+            print_status(f"⏭️  {result['name']} skipped ({result['error']})", "SKIP")
+        elif result['status'] == 'error':
+            print_status(f"❌ {result['name']} raised {result['error']}", "FAIL")
     
-    for test_name, test_func in tests:
-        print(f"\n{'='*20} {test_name} {'='*20}")
-        if test_func():
-            passed += 1
-        time.sleep(1)  # Brief pause between tests
+    report = run_checks(tests, max_workers=workers, on_result=report_skip)
+    passed, total = report['passed'], report['total']
+    print_summary(report)
     
     print("\n" + "=" * 60)
     print(f"TEST RESULTS: {passed}/{total} tests passed")
@@ -406,6 +385,19 @@ def main():
     
     print("\nTo clean up the environment:")
     print("docker-compose -f mysql-adminer.yml down")
+    return report
+
+def main():
+    """Run all tests"""
+    parser = argparse.ArgumentParser(description="Comprehensive system checks")
+    parser.add_argument('--workers', type=int, default=4, help="Checks to run concurrently")
+    parser.add_argument('--json', metavar='PATH', help="Write the check report as JSON ('-' for stdout)")
+    args = parser.parse_args()
+
+    with human_output(args.json):
+        report = run_all_tests(args.workers)
+    if args.json:
+        write_json(report, args.json)
 
 if __name__ == "__main__":
     main() 
\ No newline at end of file
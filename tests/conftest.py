@@ -0,0 +1,34 @@
+"""
+Shared pytest fixtures for the subscriber database tests.
+"""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from subscriber_db.testing import drop_schema, provision_schema, worker_schema_name
+
+
+@pytest.fixture(scope='session')
+def worker_schema():
+    """Give each pytest-xdist worker its own freshly migrated schema.
+
+    Serial runs keep using DB_NAME as-is.
+    """
+    base = os.getenv('DB_NAME', 'subscriber_db')
+    worker = os.getenv('PYTEST_XDIST_WORKER')
+    if not worker:
+        yield base
+        return
+
+    name = worker_schema_name(base, worker)
+    provision_schema(name)
+    os.environ['DB_NAME'] = name
+    try:
+        yield name
+    finally:
+        os.environ['DB_NAME'] = base
+        drop_schema(name)
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the asyncio subscriber repository.
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mysql.connector import errors
+
+from subscriber_db.aio import AsyncSubscriberRepository
+
+
+class SlowRepository:
+    """Blocking repository stand-in that tracks how many calls overlap."""
+
+    def __init__(self, delay=0.05):
+        self.delay = delay
+        self.lock = threading.Lock()
+        self.active = self.peak = 0
+        self.finished = []
+        self.pool = FakePool()
+
+    def get_by_id(self, subscriber_id):
+        with self.lock:
+            self.active += 1
+            self.peak = max(self.peak, self.active)
+        time.sleep(self.delay)
+        with self.lock:
+            self.active -= 1
+            self.finished.append(subscriber_id)
+        return {'id': subscriber_id}
+
+
+class FakeConnection:
+    def __init__(self, log):
+        self.log = log
+
+    def start_transaction(self):
+        self.log.append('begin')
+
+    def cursor(self, dictionary=False):
+        return FakeCursor(self.log)
+
+    def commit(self):
+        self.log.append('commit')
+
+    def rollback(self):
+        self.log.append('rollback')
+
+    def close(self):
+        self.log.append('close')
+
+
+class FakeCursor:
+    with_rows = False
+    rowcount = 1
+    lastrowid = 42
+
+    def __init__(self, log):
+        self.log = log
+
+    def execute(self, sql, params=None):
+        time.sleep(0.05)
+        self.log.append(sql)
+
+    def close(self):
+        pass
+
+
+class FakePool:
+    max_size = 3
+
+    def __init__(self):
+        self.log = []
+
+    def connection(self):
+        return FakeConnection(self.log)
+
+
+class TestAsyncRepository(unittest.TestCase):
+    """Test class for the concurrency limit and cancellation safety."""
+
+    def test_concurrency_is_bounded(self):
+        """Test that no more than max_concurrency blocking calls overlap."""
+        repository = SlowRepository()
+
+        async def scenario():
+            async with AsyncSubscriberRepository(repository, max_concurrency=3) as repo:
+                return await asyncio.gather(*(repo.get_by_id(i) for i in range(10)))
+
+        results = asyncio.run(scenario())
+        self.assertEqual([r['id'] for r in results], list(range(10)))
+        self.assertEqual(repository.peak, 3)
+
+    def test_cancelled_call_finishes_and_keeps_its_slot(self):
+        """Test that cancelling a caller lets the blocking call finish before its slot is reused."""
+        repository = SlowRepository(delay=0.1)
+
+        async def scenario():
+            async with AsyncSubscriberRepository(repository, max_concurrency=1) as repo:
+                task = asyncio.ensure_future(repo.get_by_id(1))
+                await asyncio.sleep(0.02)
+                task.cancel()
+                with self.assertRaises(asyncio.CancelledError):
+                    await task
+                await repo.get_by_id(2)
+
+        asyncio.run(scenario())
+        self.assertEqual(repository.finished, [1, 2])
+        self.assertEqual(repository.peak, 1)
+
+    def test_transaction_commits(self):
+        """Test that a transaction block commits and returns its connection."""
+        repository = SlowRepository()
+
+        async def scenario():
+            async with AsyncSubscriberRepository(repository) as repo:
+                async with repo.transaction() as tx:
+                    await tx.execute("INSERT 1")
+                    return tx.lastrowid
+
+        self.assertEqual(asyncio.run(scenario()), 42)
+        self.assertEqual(repository.pool.log, ['begin', 'INSERT 1', 'commit', 'close'])
+
+    def test_cancelled_transaction_rolls_back_after_running_statement(self):
+        """Test that cancellation mid-statement waits for it, then rolls back."""
+        repository = SlowRepository()
+
+        async def scenario():
+            async with AsyncSubscriberRepository(repository) as repo:
+                async def work():
+                    async with repo.transaction() as tx:
+                        await tx.execute("INSERT 1")
+                        await tx.execute("INSERT 2")
+
+                task = asyncio.ensure_future(work())
+                await asyncio.sleep(0.07)
+                task.cancel()
+                with self.assertRaises(asyncio.CancelledError):
+                    await task
+
+        asyncio.run(scenario())
+        self.assertEqual(repository.pool.log, ['begin', 'INSERT 1', 'INSERT 2', 'rollback', 'close'])
+
+
+    def test_finish_waits_for_the_in_flight_statement(self):
+        """Test that the rollback is only submitted after a cancelled caller's statement has ended."""
+        repository = SlowRepository()
+
+        async def scenario():
+            async with AsyncSubscriberRepository(repository) as repo:
+                tx = repo.transaction()
+                await tx.__aenter__()
+                gate = asyncio.get_running_loop().create_future()
+                tx._pending = gate
+                exiting = asyncio.ensure_future(tx.__aexit__(asyncio.CancelledError, None, None))
+                await asyncio.sleep(0.1)
+                self.assertNotIn('rollback', repository.pool.log)
+                with self.assertRaises(errors.OperationalError):
+                    await tx.execute("INSERT late")
+                gate.set_result(None)
+                await exiting
+
+        asyncio.run(scenario())
+        self.assertEqual(repository.pool.log, ['begin', 'rollback', 'close'])
+
+    def test_statement_after_finish_never_reaches_the_connection(self):
+        """Test that a statement picked up after the rollback raises instead of running."""
+        repository = SlowRepository()
+
+        async def scenario():
+            async with AsyncSubscriberRepository(repository) as repo:
+                tx = repo.transaction()
+                await tx.__aenter__()
+                await tx.__aexit__(None, None, None)
+                return tx
+
+        tx = asyncio.run(scenario())
+        with self.assertRaises(errors.OperationalError):
+            tx._execute("INSERT late", None)
+        self.assertEqual(repository.pool.log, ['begin', 'commit', 'close'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Unit tests for history archival and the merged timeline reader.
+"""
+
+import gzip
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from contextlib import contextmanager
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from subscriber_db.archive import ArchiveReader, ArchiveVerificationError, FileSink, archive_batch
+
+
+def history_row(row_id, subscriber_id, day, action='updated'):
+    return {'id': row_id, 'subscriber_id': subscriber_id, 'action': action,
+            'action_date': datetime(2023, 1, day, 12, 0), 'notes': None}
+
+
+class FakeCursor:
+    def __init__(self, rows, deleted):
+        self.rows = rows
+        self.deleted = deleted
+        self.rowcount = 0
+        self.statements = []
+
+    def execute(self, sql, params=()):
+        self.statements.append(sql.strip().split()[0])
+        if sql.strip().startswith('DELETE'):
+            self.rowcount = self.deleted
+
+    def fetchall(self):
+        return self.rows
+
+    def fetchone(self):
+        return {'present': 0}
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self.committed = self.rolled_back = False
+
+    def cursor(self, dictionary=False):
+        return self._cursor
+
+    def start_transaction(self):
+        pass
+
+    def commit(self):
+        self.committed = True
+
+    def rollback(self):
+        self.rolled_back = True
+
+
+class FakePool:
+    def __init__(self, live):
+        self.live = live
+
+    @contextmanager
+    def cursor(self, **cursor_args):
+        cursor = FakeCursor(self.live, 0)
+        yield cursor
+
+
+class TestArchive(unittest.TestCase):
+    """Test class for batch verification, file output and timeline merging."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def test_file_sink_writes_gzip_and_manifest(self):
+        """Test that a batch lands in a gzipped NDJSON file listed in the manifest."""
+        sink = FileSink(self.directory)
+        rows = [history_row(1, 7, 1), history_row(2, 5, 2), history_row(3, 7, 3)]
+        self.assertEqual(sink.write(None, rows), 3)
+
+        with open(os.path.join(self.directory, 'manifest.jsonl')) as handle:
+            entry = json.loads(handle.readline())
+        self.assertEqual((entry['first_id'], entry['last_id'], entry['rows']), (1, 3, 3))
+        with gzip.open(os.path.join(self.directory, entry['file']), 'rt') as handle:
+            written = [json.loads(line) for line in handle]
+        self.assertEqual([r['subscriber_id'] for r in written], [5, 7, 7])
+
+    def test_count_mismatch_rolls_back(self):
+        """Test that the batch is rolled back when fewer rows are deleted than archived."""
+        rows = [history_row(1, 7, 1), history_row(2, 7, 2)]
+        conn = FakeConnection(FakeCursor(rows, deleted=1))
+        with self.assertRaises(ArchiveVerificationError):
+            archive_batch(conn, FileSink(self.directory), 0, datetime(2024, 1, 1), 100)
+        self.assertTrue(conn.rolled_back)
+        self.assertFalse(conn.committed)
+
+    def test_successful_batch_commits(self):
+        """Test that a verified batch deletes and commits."""
+        rows = [history_row(1, 7, 1), history_row(2, 7, 2)]
+        cursor = FakeCursor(rows, deleted=2)
+        conn = FakeConnection(cursor)
+        self.assertEqual(archive_batch(conn, FileSink(self.directory), 0, datetime(2024, 1, 1), 100), rows)
+        self.assertTrue(conn.committed)
+        self.assertEqual(cursor.statements, ['SELECT', 'DELETE'])
+
+    def test_timeline_merges_archive_and_live(self):
+        """Test that archived and live rows merge in date order with live rows winning."""
+        FileSink(self.directory).write(None, [history_row(1, 7, 1, 'subscribed'), history_row(2, 7, 5),
+                                              history_row(3, 8, 6)])
+        live = [history_row(2, 7, 5), history_row(9, 7, 20, 'unsubscribed')]
+        timeline = ArchiveReader(pool=FakePool(live), directory=self.directory).timeline(7)
+
+        self.assertEqual([row['id'] for row in timeline], [1, 2, 9])
+        self.assertEqual([row['source'] for row in timeline], ['file', 'live', 'live'])
+
+    def test_timeline_skips_files_without_the_subscriber(self):
+        """Test that files whose id range spans the subscriber but do not hold it are never opened."""
+        sink = FileSink(self.directory)
+        sink.write(None, [history_row(1, 1, 1), history_row(2, 9, 2)])
+        sink.write(None, [history_row(3, 1, 3), history_row(4, 5, 4), history_row(5, 9, 5)])
+        os.remove(os.path.join(self.directory, 'history-0000000001-0000000002.ndjson.gz'))
+        timeline = ArchiveReader(pool=FakePool([]), directory=self.directory).timeline(5)
+
+        self.assertEqual([row['id'] for row in timeline], [4])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the bitmap audience index.
+"""
+
+import os
+import sys
+import unittest
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from subscriber_db.audience import AudienceIndex, SegmentSyntaxError, iter_bits, parse_segment, popcount
+
+
+def make_row(subscriber_id, is_active=1, newsletter=1, marketing=0, frequency='weekly', updated_at=None):
+    return {'id': subscriber_id, 'is_active': is_active, 'newsletter_enabled': newsletter,
+            'marketing_enabled': marketing, 'frequency': frequency,
+            'updated_at': updated_at or datetime(2024, 1, 1)}
+
+
+class FakeCursor:
+    """Answers the index's queries from a {id: profile row} table."""
+
+    def __init__(self, pool):
+        self.pool = pool
+        self.result = []
+
+    def execute(self, sql, params=()):
+        rows = [self.pool.rows[i] for i in sorted(self.pool.rows)]
+        if sql.startswith("SELECT NOW()"):
+            self.result = [(self.pool.now,)]
+        elif 'UNION' in sql:
+            self.result = [{'id': r['id']} for r in rows if r['updated_at'] >= params[0]]
+        elif 's.id IN' in sql:
+            self.result = [self.pool.rows[i] for i in params if i in self.pool.rows]
+        elif 'information_schema' in sql:
+            self.result = [(0,)]
+        elif sql.startswith("SELECT id FROM subscribers"):
+            self.result = [(r['id'],) for r in rows if r['id'] > params[0]][:params[1]]
+        else:
+            self.result = [r for r in rows if r['id'] > params[0]][:params[1]]
+
+    def fetchall(self):
+        return self.result
+
+    def fetchone(self):
+        return self.result[0]
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+class FakePool:
+    def __init__(self, rows):
+        self.rows = {row['id']: row for row in rows}
+        self.now = datetime(2024, 1, 1, 12)
+
+    def connection(self):
+        return self
+
+    def cursor(self, **kwargs):
+        return FakeCursor(self)
+
+    def close(self):
+        pass
+
+
+class TestAudienceIndex(unittest.TestCase):
+    """Test class for segment parsing, bitmap evaluation and incremental refresh."""
+
+    def setUp(self):
+        self.pool = FakePool([
+            make_row(1),
+            make_row(2, marketing=1, frequency='daily'),
+            make_row(3, is_active=0),
+            make_row(9, newsletter=None, marketing=None, frequency=None),
+            make_row(20, newsletter=0, frequency='monthly'),
+        ])
+        self.index = AudienceIndex(self.pool)
+        self.assertEqual(self.index.build(page_size=2), 5)
+
+    def ids(self, expression, chunk_size=1000):
+        return [i for chunk in self.index.select(expression, chunk_size) for i in chunk]
+
+    def test_bit_helpers(self):
+        """Test popcount and set-bit iteration on plain integers."""
+        value = (1 << 3) | (1 << 64) | 1
+        self.assertEqual(popcount(value), 3)
+        self.assertEqual(list(iter_bits(value)), [0, 3, 64])
+        self.assertEqual(list(iter_bits(0)), [])
+
+    def test_parse_errors(self):
+        """Test that unknown attributes, frequencies and stray tokens are rejected."""
+        for expression in ("is_premium", "frequency = 'hourly'", "is_active AND", "(is_active",
+                           "is_active = weekly", "newsletter_enabled = AND"):
+            with self.assertRaises(SegmentSyntaxError, msg=expression):
+                parse_segment(expression)
+
+    def test_segments_match_sql_semantics(self):
+        """Test boolean algebra, precedence and the treatment of missing preference rows."""
+        self.assertEqual(self.ids("is_active AND newsletter_enabled AND frequency = 'weekly' "
+                                  "AND NOT marketing_enabled"), [1])
+        self.assertEqual(self.ids("NOT marketing_enabled"), [1, 3, 9, 20])
+        self.assertEqual(self.ids("marketing_enabled = false"), [1, 3, 20])
+        self.assertEqual(self.ids("frequency != 'weekly'"), [2, 20])
+        self.assertEqual(self.ids("frequency IN ('daily', 'monthly') OR is_active = FALSE"), [2, 3, 20])
+        self.assertEqual(self.ids("is_active AND (frequency = 'daily' OR newsletter_enabled != true)"), [2, 20])
+        self.assertEqual(self.index.count("is_active"), 4)
+        self.assertEqual(list(self.index.select("is_active", chunk_size=3)), [[1, 2, 9], [20]])
+
+    def test_refresh_applies_changes_and_deletes(self):
+        """Test that refresh re-reads recently updated rows and drops deleted subscribers."""
+        later = self.pool.now + timedelta(minutes=5)
+        self.pool.rows[1] = make_row(1, marketing=1, updated_at=later)
+        self.pool.rows[100] = make_row(100, frequency='daily', updated_at=later)
+        del self.pool.rows[2]
+        del self.pool.rows[20]
+        self.pool.now = later + timedelta(minutes=5)
+
+        result = self.index.refresh()
+
+        self.assertEqual(result, {'changed': 2, 'removed': 2})
+        self.assertEqual(self.ids("marketing_enabled"), [1])
+        self.assertEqual(self.ids("frequency = 'daily'"), [100])
+        self.assertEqual(self.index.size(), 4)
+        self.assertEqual(self.index.watermark, self.pool.now)
+
+
+if __name__ == '__main__':
+    unittest.main()
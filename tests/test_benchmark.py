@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the CRUD workload benchmark.
+"""
+
+import os
+import sys
+import threading
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from subscriber_db.benchmark import parse_mix, run_benchmark, summarize
+
+
+class FakeWorkload:
+    """Workload that records the operations it was asked to run."""
+
+    def __init__(self, fail=()):
+        self.fail = set(fail)
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def execute(self, op, state):
+        with self.lock:
+            self.calls.append(op)
+        if op in self.fail:
+            raise RuntimeError(f"{op} failed")
+        return op
+
+
+class TestBenchmark(unittest.TestCase):
+    """Test class for the mix parser, op budget and report shape."""
+
+    def test_parse_mix(self):
+        """Test that weights are parsed and unknown operations are rejected."""
+        self.assertEqual(parse_mix('insert=2, lookup=8'), {'insert': 2.0, 'lookup': 8.0})
+        with self.assertRaises(ValueError):
+            parse_mix('upsert=1')
+        with self.assertRaises(ValueError):
+            parse_mix('insert=0')
+
+    def test_op_budget_is_shared_across_workers(self):
+        """Test that an operation count stops all workers at exactly that many ops."""
+        workload = FakeWorkload()
+        report = run_benchmark(workload, {'insert': 1, 'lookup': 3}, workers=4, ops=200, seed=7)
+
+        self.assertEqual(report['total_ops'], 200)
+        self.assertEqual(len(workload.calls), 200)
+        self.assertEqual(set(report['operations']), {'insert', 'lookup'})
+        for stats in report['operations'].values():
+            self.assertLessEqual(stats['ms_p50'], stats['ms_p95'])
+            self.assertLessEqual(stats['ms_p95'], stats['ms_p99'])
+
+    def test_errors_are_counted_not_timed(self):
+        """Test that failing operations count as errors with the first message kept."""
+        report = run_benchmark(FakeWorkload(fail={'delete'}), {'insert': 1, 'delete': 1},
+                               workers=2, ops=100, seed=1)
+
+        self.assertEqual(report['operations']['delete']['count'], 0)
+        self.assertEqual(report['operations']['delete']['errors'] + report['total_ops'], 100)
+        self.assertIn('delete failed', report['first_errors']['delete'])
+
+    def test_stop_event_and_op_callback(self):
+        """Test that an external stop event ends the run and every op is reported."""
+        stop = threading.Event()
+        seen = []
+
+        def on_op(op, started, seconds, error):
+            seen.append(op)
+            if len(seen) >= 50:
+                stop.set()
+
+        report = run_benchmark(FakeWorkload(), {'lookup': 1}, workers=1, stop=stop, on_op=on_op)
+        self.assertEqual(report['total_ops'], len(seen))
+        self.assertGreaterEqual(len(seen), 50)
+
+    def test_summarize_percentiles(self):
+        """Test that latencies are reported in milliseconds per operation."""
+        report = summarize({'lookup': [0.001 * i for i in range(1, 101)]}, {}, elapsed=2.0)
+        stats = report['operations']['lookup']
+        self.assertAlmostEqual(stats['ms_p50'], 50.0)
+        self.assertAlmostEqual(stats['ms_p99'], 99.0)
+        self.assertEqual(report['ops_per_sec'], 50.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Unit tests for bulk import parsing and batching helpers.
+"""
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from subscriber_db.batching import batched, values_clause
+from subscriber_db.bulk_import import insert_batch, normalize_record, read_records
+
+
+class RecordingConnection:
+    """Connection and cursor in one: existing emails are found up front, and one more raced in during the insert."""
+
+    def __init__(self, existing=()):
+        self.existing = list(existing)
+        self.statements = []
+        self.params = []
+        self.result = []
+        self.rowcount = 0
+        self.lastrowid = 0
+
+    def cursor(self):
+        return self
+
+    def execute(self, sql, params=()):
+        self.statements.append(sql)
+        self.params.append(params)
+        if sql.startswith("SELECT email FROM"):
+            self.result = [(email,) for email in self.existing]
+        elif sql.startswith("SELECT id, email FROM"):
+            # a@example.com (id 1) raced in before the insert, which gave b@example.com id 2
+            rows = [(1, 'a@example.com'), (2, 'b@example.com')]
+            self.result = [row for row in rows if row[0] >= params[-1]] if 'id >=' in sql else rows
+        elif sql.startswith("INSERT INTO subscribers"):
+            self.rowcount, self.lastrowid = 1, 2
+
+    def fetchall(self):
+        return self.result
+
+    def start_transaction(self):
+        pass
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class TestBulkImportParsing(unittest.TestCase):
+    """Test class for record parsing and multi-row statement building."""
+
+    def write_temp(self, suffix, content):
+        handle = tempfile.NamedTemporaryFile('w', suffix=suffix, delete=False)
+        handle.write(content)
+        handle.close()
+        self.addCleanup(os.unlink, handle.name)
+        return handle.name
+
+    def test_read_csv_records(self):
+        """Test streaming records from a CSV file."""
+        path = self.write_temp('.csv', "email,first_name,frequency\na@example.com,Ann,daily\nb@example.com,Ben,\n")
+        records = list(read_records(path))
+        self.assertEqual([r['email'] for r in records], ['a@example.com', 'b@example.com'])
+
+    def test_read_ndjson_records(self):
+        """Test streaming records from an NDJSON file, skipping blank lines."""
+        lines = [json.dumps({'email': 'a@example.com'}), '', json.dumps({'email': 'b@example.com'})]
+        path = self.write_temp('.ndjson', "\n".join(lines))
+        self.assertEqual(len(list(read_records(path))), 2)
+
+    def test_normalize_applies_defaults(self):
+        """Test that missing preference fields take the V2 defaults."""
+        record = normalize_record({'email': ' Ann@Example.com ', 'is_active': '0'})
+        self.assertEqual(record['email'], 'ann@example.com')
+        self.assertFalse(record['is_active'])
+        self.assertTrue(record['newsletter_enabled'])
+        self.assertFalse(record['marketing_enabled'])
+        self.assertEqual(record['frequency'], 'weekly')
+
+    def test_normalize_rejects_bad_values(self):
+        """Test that invalid emails and frequencies are rejected."""
+        with self.assertRaises(ValueError):
+            normalize_record({'email': 'not-an-email'})
+        with self.assertRaises(ValueError):
+            normalize_record({'email': 'a@example.com', 'frequency': 'hourly'})
+
+    def test_batched_and_values_clause(self):
+        """Test batching and multi-row placeholder generation."""
+        self.assertEqual(list(batched(range(5), 2)), [[0, 1], [2, 3], [4]])
+        placeholders, params = values_clause([(1, 'a'), (2, 'b')])
+        self.assertEqual(placeholders, "(%s, %s), (%s, %s)")
+        self.assertEqual(params, [1, 'a', 2, 'b'])
+
+
+    def test_insert_batch_only_tolerates_duplicate_keys(self):
+        """Test that races are absorbed by a no-op upsert rather than INSERT IGNORE, which hides bad values."""
+        conn = RecordingConnection()
+        records = [normalize_record({'email': 'a@example.com'}), normalize_record({'email': 'b@example.com'})]
+        self.assertEqual(insert_batch(conn, records), (1, 1))
+        inserts = [sql for sql in conn.statements if sql.startswith("INSERT")]
+        self.assertFalse([sql for sql in inserts if 'IGNORE' in sql])
+        self.assertTrue(inserts[0].endswith("ON DUPLICATE KEY UPDATE id = id"))
+        self.assertTrue(inserts[1].endswith("ON DUPLICATE KEY UPDATE subscriber_id = subscriber_id"))
+
+    def test_insert_batch_writes_nothing_for_a_raced_in_row(self):
+        """Test that a row another writer inserted first gets no preferences, history or events."""
+        conn = RecordingConnection()
+        records = [normalize_record({'email': 'a@example.com'}), normalize_record({'email': 'b@example.com'})]
+        insert_batch(conn, records)
+
+        children = {sql.split()[2]: params for sql, params in zip(conn.statements, conn.params)
+                    if sql.startswith("INSERT") and not sql.startswith("INSERT INTO subscribers")}
+        self.assertEqual(children['subscription_preferences'][0::4], [2])
+        self.assertEqual(children['subscription_history'][0::3], [2])
+        self.assertEqual(set(children['subscriber_outbox'][0::3]), {2})
+
+    def test_insert_batch_matches_stored_emails_case_insensitively(self):
+        """Test that an existing mixed-case email is dropped from the batch and counted once."""
+        conn = RecordingConnection(existing=['C@Example.com'])
+        records = [normalize_record({'email': email}) for email in ('a@example.com', 'b@example.com', 'c@example.com')]
+        self.assertEqual(insert_batch(conn, records), (1, 2))
+        subscriber_insert = [sql for sql in conn.statements if sql.startswith("INSERT INTO subscribers")][0]
+        self.assertEqual(subscriber_insert.count('(%s, %s, %s, %s)'), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Unit tests for bulk preference upserts.
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from subscriber_db.bulk_preferences import apply_batch, normalize_change, parse_assignments
+
+
+class FakeCursor:
+    """Answers the resolve and current-preferences queries from in-memory tables."""
+
+    def __init__(self, subscribers, preferences):
+        self.subscribers = subscribers
+        self.preferences = preferences
+        self.writes = []
+        self.result = []
+
+    def execute(self, sql, params=()):
+        if sql.startswith("SELECT id FROM subscribers"):
+            self.result = [(i,) for i in params if i in self.subscribers]
+        elif sql.startswith("SELECT id, email FROM subscribers"):
+            self.result = [(i, e) for i, e in self.subscribers.items() if e.lower() in params]
+        elif sql.startswith("SELECT subscriber_id"):
+            self.result = [(i,) + self.preferences[i] for i in params if i in self.preferences]
+        else:
+            self.writes.append((sql, list(params)))
+
+    def fetchall(self):
+        return self.result
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self.committed = False
+
+    def cursor(self):
+        return self._cursor
+
+    def start_transaction(self):
+        pass
+
+    def commit(self):
+        self.committed = True
+
+    def rollback(self):
+        pass
+
+
+class TestBulkPreferences(unittest.TestCase):
+    """Test class for change parsing, grouping and history rows."""
+
+    def test_normalize_change(self):
+        """Test that ids, emails, booleans and defaults are normalized."""
+        self.assertEqual(normalize_change({'subscriber_id': '7', 'marketing_enabled': 'yes'}),
+                         (('id', 7), {'marketing_enabled': True}))
+        self.assertEqual(normalize_change({'email': ' Ann@Example.com '}, parse_assignments(['frequency=Daily'])),
+                         (('email', 'ann@example.com'), {'frequency': 'daily'}))
+        with self.assertRaises(ValueError):
+            normalize_change({'email': 'ann@example.com'})
+        with self.assertRaises(ValueError):
+            normalize_change({'subscriber_id': 1, 'frequency': 'hourly'})
+
+    def test_batch_groups_by_changed_columns(self):
+        """Test that rows are upserted per column set and unchanged rows are skipped."""
+        cursor = FakeCursor({1: 'a@example.com', 2: 'B@example.com', 3: 'c@example.com'},
+                            {1: (1, 0, 'weekly'), 2: (1, 0, 'weekly')})
+        changes = [
+            (('id', 1), {'frequency': 'daily'}),
+            (('email', 'b@example.com'), {'frequency': 'weekly', 'marketing_enabled': True}),
+            (('id', 3), {'frequency': 'daily'}),
+            (('id', 9), {'frequency': 'daily'}),
+            (('id', 1), {'newsletter_enabled': True}),
+        ]
+        conn = FakeConnection(cursor)
+        counts = apply_batch(conn, changes, history_note='Spring campaign')
+
+        self.assertTrue(conn.committed)
+        self.assertEqual(counts, {'inserted': 1, 'updated': 2, 'unchanged': 0, 'missing': 1, 'history': 3})
+        upserts = [(sql, params) for sql, params in cursor.writes if 'subscription_preferences' in sql]
+        self.assertEqual(len(upserts), 2)
+        frequency_sql, frequency_params = next(u for u in upserts if '(subscriber_id, frequency)' in u[0])
+        self.assertIn("ON DUPLICATE KEY UPDATE frequency = VALUES(frequency)", frequency_sql)
+        self.assertEqual(frequency_params, [1, 'daily', 3, 'daily'])
+        marketing_sql, marketing_params = next(u for u in upserts if 'marketing' in u[0])
+        self.assertEqual(marketing_params, [2, True])
+        history_sql, history_params = next(w for w in cursor.writes if 'subscription_history' in w[0])
+        self.assertIn('Spring campaign: marketing_enabled=1', history_params)
+        outbox_sql, outbox_params = cursor.writes[-1]
+        self.assertIn('subscriber_outbox', outbox_sql)
+        self.assertEqual(outbox_params[1::3], ['preferences.updated', 'history.appended'] * 3)
+
+    def test_no_op_changes_write_nothing(self):
+        """Test that a batch matching the stored preferences issues no writes."""
+        cursor = FakeCursor({1: 'a@example.com'}, {1: (1, 0, 'weekly')})
+        counts = apply_batch(FakeConnection(cursor), [(('id', 1), {'frequency': 'weekly'})], history_note='x')
+
+        self.assertEqual(counts['unchanged'], 1)
+        self.assertEqual(cursor.writes, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the dependency-aware check runner.
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+from io import StringIO
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from subscriber_db.checks import Check, human_output, print_summary, run_checks, validate_graph, write_json
+from subscriber_db.config import db_config
+import test_system
+
+
+class TestRunChecks(unittest.TestCase):
+    """Test class for scheduling, skipping and the critical path."""
+
+    def test_dependencies_run_first_and_independent_checks_overlap(self):
+        """Test that a check waits for its dependencies while others run alongside."""
+        order = []
+        barrier = threading.Barrier(2, timeout=5)
+
+        def step(name, wait=False):
+            def func():
+                if wait:
+                    barrier.wait()
+                order.append(name)
+                return True
+            return func
+
+        checks = [
+            Check('setup', step('setup', wait=True)),
+            Check('migrate', step('migrate'), ['setup']),
+            Check('schema', step('schema'), ['migrate']),
+            Check('docs', step('docs', wait=True)),
+        ]
+        report = run_checks(checks, max_workers=4)
+
+        self.assertEqual(report['passed'], 4)
+        self.assertLess(order.index('setup'), order.index('migrate'))
+        self.assertLess(order.index('migrate'), order.index('schema'))
+        self.assertEqual([r['name'] for r in report['checks']], ['setup', 'migrate', 'schema', 'docs'])
+
+    def test_failed_dependency_skips_dependents(self):
+        """Test that dependents of a failed or raising check are skipped, not run."""
+        ran = []
+
+        def boom():
+            raise RuntimeError('no database')
+
+        checks = [
+            Check('setup', boom),
+            Check('migrate', lambda: ran.append('migrate') or True, ['setup']),
+            Check('schema', lambda: ran.append('schema') or True, ['migrate']),
+            Check('files', lambda: False),
+        ]
+        report = run_checks(checks)
+        statuses = {r['name']: r['status'] for r in report['checks']}
+
+        self.assertEqual(statuses, {'setup': 'error', 'migrate': 'skipped',
+                                    'schema': 'skipped', 'files': 'failed'})
+        self.assertEqual(ran, [])
+        self.assertIn('RuntimeError', report['checks'][0]['error'])
+        self.assertEqual(report['passed'], 0)
+
+    def test_critical_path_follows_longest_chain(self):
+        """Test that the critical path is the slowest dependency chain."""
+        def sleeper(seconds):
+            return lambda: time.sleep(seconds) or True
+
+        checks = [
+            Check('a', sleeper(0.05)),
+            Check('b', sleeper(0.05), ['a']),
+            Check('c', sleeper(0.01)),
+            Check('d', sleeper(0.01), ['c']),
+        ]
+        report = run_checks(checks, max_workers=4)
+
+        self.assertEqual(report['critical_path'], ['a', 'b'])
+        self.assertGreaterEqual(report['critical_path_seconds'], 0.1)
+        self.assertLess(report['wall_seconds'], report['serial_seconds'] + 0.05)
+
+    def test_invalid_graphs_are_rejected(self):
+        """Test that unknown dependencies and cycles raise ValueError."""
+        with self.assertRaises(ValueError):
+            validate_graph([Check('a', bool, ['missing'])])
+        with self.assertRaises(ValueError):
+            validate_graph([Check('a', bool, ['b']), Check('b', bool, ['a'])])
+
+    def test_json_on_stdout_moves_human_output_to_stderr(self):
+        """Test that stdout carries only the JSON report when it is written to '-'."""
+        stdout, stderr = StringIO(), StringIO()
+        with redirect_stdout(stdout), redirect_stderr(stderr):
+            with human_output('-'):
+                report = run_checks([Check('a', lambda: print("🔍 checking a") or True)])
+                print_summary(report)
+            write_json(report, '-')
+
+        self.assertEqual(json.loads(stdout.getvalue())['passed'], 1)
+        self.assertIn("🔍 checking a", stderr.getvalue())
+        self.assertIn("Critical path", stderr.getvalue())
+
+
+class TestSystemChecks(unittest.TestCase):
+    """Test class for the test_system.py check graph."""
+
+    def test_fresh_stack_without_app_user_runs_the_database_chain(self):
+        """Test that the readiness probe does not need the user that a later check creates."""
+        app_user = db_config()['user']
+
+        def wait_for_db(config=None, **kwargs):
+            # Only root exists on a fresh stack
+            ready = (config or db_config())['user'] != app_user
+            return {'ready': ready, 'time_to_ready': 0.0, 'attempts': 1,
+                    'last_error': None if ready else f"auth: access denied for {app_user}"}
+
+        names = ['test_docker_environment', 'test_database_connection', 'test_subscriber_database_setup',
+                 'test_flyway_migrations', 'test_database_schema', 'test_python_dependencies',
+                 'test_crud_operations', 'test_github_actions_workflow', 'test_documentation']
+        with mock.patch.multiple(test_system, wait_for_db=wait_for_db, **{name: lambda: True for name in names}):
+            with redirect_stdout(StringIO()):
+                report = run_checks(test_system.system_checks())
+
+        self.assertEqual({r['status'] for r in report['checks']}, {'passed'})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the subscriber_db connection pool.
+Uses fake connections so no MySQL server is required.
+"""
+
+import os
+import sys
+import threading
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from mysql.connector import errors
+
+from subscriber_db.pool import ConnectionPool, PoolTimeoutError
+
+
+class FakeCursor:
+    def __init__(self, conn, prepared=False):
+        self.conn = conn
+        self.prepared = prepared
+        self.executed = []
+        self.closed = False
+
+    def execute(self, sql, params=None):
+        self.conn.statements.append((sql, params))
+        self.executed.append(sql)
+
+    def close(self):
+        self.closed = True
+
+
+class FakeConnection:
+    def __init__(self, **kwargs):
+        self.kwargs = kwargs
+        self.statements = []
+        self.in_transaction = False
+        self.alive = True
+        self.closed = False
+        self.rollbacks = 0
+        self.cursors = []
+
+    def cursor(self, prepared=False, **kwargs):
+        cursor = FakeCursor(self, prepared)
+        self.cursors.append(cursor)
+        return cursor
+
+    def ping(self, reconnect=False):
+        if not self.alive:
+            raise OSError("server has gone away")
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.in_transaction = False
+
+    def close(self):
+        self.closed = True
+
+
+class TestConnectionPool(unittest.TestCase):
+    """Test class for pool sizing, health checks and metrics."""
+
+    def make_pool(self, **kwargs):
+        self.opened = []
+
+        def connect(**connect_args):
+            conn = FakeConnection(**connect_args)
+            self.opened.append(conn)
+            return conn
+
+        return ConnectionPool(connect=connect, **kwargs)
+
+    def test_connections_are_reused(self):
+        """Test that a released connection is handed out again."""
+        pool = self.make_pool(min_size=1, max_size=2)
+        first = pool.connection()
+        raw = first.raw
+        first.close()
+        second = pool.connection()
+        self.assertIs(second.raw, raw)
+        self.assertEqual(len(self.opened), 1)
+
+    def test_closing_twice_does_not_hand_out_one_connection_twice(self):
+        """Test that a second close is a no-op and a released proxy cannot be used again."""
+        pool = self.make_pool(min_size=0, max_size=2)
+        first = pool.connection()
+        first.close()
+        first.close()
+        a = pool.connection()
+        b = pool.connection()
+        self.assertIsNot(a.raw, b.raw)
+        self.assertIsNot(a, first)
+        with self.assertRaises(errors.OperationalError):
+            first.cursor()
+        with self.assertRaises(errors.OperationalError):
+            first.execute_prepared("SELECT 1")
+
+    def test_max_size_is_enforced(self):
+        """Test that checkout times out once max_size connections are in use."""
+        pool = self.make_pool(min_size=0, max_size=1)
+        conn = pool.connection()
+        with self.assertRaises(PoolTimeoutError):
+            pool.connection(timeout=0.05)
+        conn.close()
+        self.assertEqual(pool.metrics()['timeouts'], 1)
+
+    def test_waiter_gets_released_connection(self):
+        """Test that a blocked checkout resumes when a connection is released."""
+        pool = self.make_pool(min_size=0, max_size=1)
+        conn = pool.connection()
+        threading.Timer(0.05, conn.close).start()
+        other = pool.connection(timeout=2)
+        self.assertIsNotNone(other.raw)
+        self.assertGreater(pool.metrics()['wait_time_max'], 0)
+
+    def test_stale_connection_is_replaced(self):
+        """Test that a connection failing its health check is discarded."""
+        pool = self.make_pool(min_size=1, max_size=1, health_check_interval=0)
+        conn = pool.connection()
+        conn.raw.alive = False
+        conn.close()
+        fresh = pool.connection()
+        self.assertTrue(fresh.raw.alive)
+        self.assertEqual(pool.metrics()['discarded'], 1)
+
+    def test_idle_connections_are_reaped(self):
+        """Test that idle connections above min_size are closed."""
+        pool = self.make_pool(min_size=1, max_size=3, idle_timeout=0.01)
+        conns = [pool.connection() for _ in range(3)]
+        for conn in conns:
+            conn.close()
+        time.sleep(0.02)
+        pool.reap_idle()
+        metrics = pool.metrics()
+        self.assertEqual(metrics['size'], 1)
+        self.assertEqual(metrics['reaped'], 2)
+
+    def test_open_transaction_is_rolled_back(self):
+        """Test that releasing a connection rolls back uncommitted work."""
+        pool = self.make_pool(min_size=1, max_size=1)
+        conn = pool.connection()
+        conn.raw.in_transaction = True
+        raw = conn.raw
+        conn.close()
+        self.assertEqual(raw.rollbacks, 1)
+
+    def test_session_settings_applied(self):
+        """Test that session settings run on every new connection."""
+        pool = self.make_pool(min_size=1, max_size=1, session_settings={'time_zone': '+00:00'})
+        conn = pool.connection()
+        self.assertIn(("SET SESSION time_zone = %s", ('+00:00',)), conn.raw.statements)
+
+    def test_metrics_report_in_use(self):
+        """Test checkout counters and in-use gauge."""
+        pool = self.make_pool(min_size=0, max_size=2)
+        a = pool.connection()
+        b = pool.connection()
+        metrics = pool.metrics()
+        self.assertEqual(metrics['in_use'], 2)
+        self.assertEqual(metrics['checkouts'], 2)
+        self.assertEqual(metrics['peak_in_use'], 2)
+        a.close()
+        b.close()
+        self.assertEqual(pool.metrics()['in_use'], 0)
+
+    def test_prepared_statements_are_cached_per_connection(self):
+        """Test that equal SQL text reuses one prepared cursor and the same string object."""
+        pool = self.make_pool(min_size=1, max_size=1, statement_cache_size=2)
+        conn = pool.connection()
+        first = conn.execute_prepared("SELECT * FROM subscribers WHERE id = %s", (1,))
+        text = "".join(["SELECT * FROM subscribers ", "WHERE id = %s"])
+        again = conn.execute_prepared(text, (2,))
+        self.assertIs(again, first)
+        self.assertTrue(first.prepared)
+        self.assertIs(first.executed[1], first.executed[0])
+        self.assertEqual((conn.statements_prepared, conn.statement_hits), (1, 1))
+
+    def test_statement_cache_evicts_least_recently_used(self):
+        """Test that statements beyond the cache size are closed, oldest use first."""
+        pool = self.make_pool(min_size=1, max_size=1, statement_cache_size=2)
+        conn = pool.connection()
+        a = conn.execute_prepared("SELECT 1")
+        b = conn.execute_prepared("SELECT 2")
+        conn.execute_prepared("SELECT 1")
+        conn.execute_prepared("SELECT 3")
+        self.assertTrue(b.closed)
+        self.assertFalse(a.closed)
+        self.assertIs(conn.execute_prepared("SELECT 1"), a)
+
+    def test_statement_cache_survives_checkouts(self):
+        """Test that the cache belongs to the connection, not to one checkout's proxy."""
+        pool = self.make_pool(min_size=1, max_size=1)
+        with pool.connection() as conn:
+            first = conn.execute_prepared("SELECT 1")
+        with pool.connection() as conn:
+            self.assertIs(conn.execute_prepared("SELECT 1"), first)
+            self.assertEqual(conn.statement_hits, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the updated_at-watermark delta sync.
+"""
+
+import gzip
+import json
+import os
+import sys
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from subscriber_db.delta_sync import read_state, run_sync
+from subscriber_db.migrations import discover_migrations
+
+T0 = datetime(2024, 3, 1, 9, 0, 0)
+
+
+def make_subscriber(row_id, seconds):
+    stamp = T0 + timedelta(seconds=seconds)
+    return {'id': row_id, 'email': f'user{row_id}@example.com', 'first_name': 'User', 'last_name': str(row_id),
+            'is_active': 1, 'created_at': T0, 'updated_at': stamp}
+
+
+class FakeCursor:
+    """Evaluates the keyset delta query over an in-memory table."""
+
+    def __init__(self, db):
+        self.db = db
+        self.result = []
+
+    def execute(self, sql, params=()):
+        if sql.startswith("SELECT NOW()"):
+            self.result = [{'cutoff': self.db.now - timedelta(seconds=params[0])}]
+            return
+        self.db.queries.append(params)
+        table = 'subscription_preferences' if 'FROM subscription_preferences' in sql else 'subscribers'
+        cutoff, after, _, after_id, limit = params
+        rows = sorted(self.db.tables[table].values(), key=lambda r: (r['updated_at'], r['id']))
+        self.result = [r for r in rows if r['updated_at'] < cutoff and
+                       (r['updated_at'] > after or (r['updated_at'] == after and r['id'] > after_id))][:limit]
+
+    def fetchall(self):
+        return self.result
+
+    def fetchone(self):
+        return self.result[0]
+
+    def close(self):
+        pass
+
+
+class FakePool:
+    def __init__(self, subscribers):
+        self.tables = {'subscribers': {r['id']: r for r in subscribers}, 'subscription_preferences': {}}
+        self.now = T0 + timedelta(hours=1)
+        self.queries = []
+
+    def connection(self):
+        return self
+
+    def cursor(self, **kwargs):
+        return FakeCursor(self)
+
+    def commit(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def read_delta(directory, name):
+    with gzip.open(os.path.join(directory, name), 'rt') as handle:
+        return [json.loads(line) for line in handle]
+
+
+class TestDeltaSync(unittest.TestCase):
+    """Test class for keyset resumption across same-second ties and watermark persistence."""
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        # Four rows share one second, so a page boundary falls inside the tie
+        self.pool = FakePool([make_subscriber(i, 0) for i in (3, 1, 4, 2)] + [make_subscriber(5, 10)])
+
+    def sync(self, **kwargs):
+        return run_sync(self.directory, pool=self.pool, tables=['subscribers'], page_size=3,
+                        log=lambda message: None, **kwargs)
+
+    def test_pages_resume_inside_same_second_ties(self):
+        """Test that every row is exported exactly once when a page ends mid-second."""
+        report = self.sync()
+        rows = read_delta(self.directory, report['tables']['subscribers']['file'])
+        self.assertEqual([r['id'] for r in rows], [1, 2, 3, 4, 5])
+        self.assertEqual(self.pool.queries[1][1:4], (T0, T0, 3))
+        self.assertEqual(read_state(os.path.join(self.directory, 'sync.state'))['subscribers'],
+                         (T0 + timedelta(seconds=10), 5))
+
+    def test_next_run_reads_only_changes_before_the_cutoff(self):
+        """Test that a second run exports only rows changed since the watermark and settled."""
+        self.sync()
+        self.pool.tables['subscribers'][2]['updated_at'] = self.pool.now - timedelta(minutes=30)
+        self.pool.tables['subscribers'][6] = make_subscriber(6, 3600 - 60)
+        report = self.sync(settle_seconds=300)
+        rows = read_delta(self.directory, report['tables']['subscribers']['file'])
+        self.assertEqual([r['id'] for r in rows], [2])
+
+        report = self.sync(settle_seconds=0)
+        self.assertEqual(report['tables']['subscribers']['rows'], 1)
+        report = self.sync(settle_seconds=0)
+        self.assertEqual(report['tables']['subscribers']['rows'], 0)
+        self.assertIsNone(report['tables']['subscribers']['file'])
+        with open(os.path.join(self.directory, 'manifest.jsonl')) as handle:
+            self.assertEqual(len(handle.readlines()), 3)
+
+    def test_v8_indexes_both_tables_online(self):
+        """Test that V8 adds the (updated_at, id) index to both synced tables without locking writes."""
+        migration = next(m for m in discover_migrations() if m.version == '8')
+        statements = migration.statements()
+        self.assertEqual(len(statements), 2)
+        for table, statement in zip(('subscribers', 'subscription_preferences'), statements):
+            self.assertIn(f'ALTER TABLE {table}', statement)
+            self.assertIn('ADD INDEX idx_updated_at (updated_at, id)', statement)
+            self.assertIn('ALGORITHM=INPLACE, LOCK=NONE', statement)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the driver, protocol and row-format benchmark.
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from subscriber_db.driver_bench import (MODES, STEP_SQL, STEPS, PreparedExecutor, TextExecutor, mode_label,
+                                        parse_modes, run_cycle)
+
+
+class FakeCursor:
+    def __init__(self, log, **kwargs):
+        self.log = log
+        self.kwargs = kwargs
+        self.with_rows = False
+        self.lastrowid = None
+
+    def execute(self, sql, params=None):
+        self.log.append((sql, params))
+        self.with_rows = sql.startswith("SELECT")
+        self.lastrowid = 42 if sql.startswith("INSERT INTO subscribers") else 0
+
+    def fetchall(self):
+        return [('row',)]
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    """Text cursors and execute_prepared on one statement log."""
+
+    def __init__(self):
+        self.log = []
+        self.cursor_args = []
+
+    def cursor(self, **kwargs):
+        self.cursor_args.append(kwargs)
+        return FakeCursor(self.log, **kwargs)
+
+    def execute_prepared(self, sql, params=()):
+        cursor = FakeCursor(self.log)
+        cursor.execute(sql, params)
+        return cursor
+
+
+class TestDriverBench(unittest.TestCase):
+    """Test class for mode parsing and the CRUD cycle."""
+
+    def test_parse_modes(self):
+        """Test that labels map back to modes in the given order and unknown ones are rejected."""
+        self.assertEqual(parse_modes("cext-prepared-tuple, pure-text-dict"),
+                         [('cext', 'prepared', 'tuple'), ('pure', 'text', 'dict')])
+        self.assertEqual(len({mode_label(mode) for mode in MODES}), len(MODES))
+        with self.assertRaises(ValueError):
+            parse_modes("cext-prepared-dict")
+
+    def test_cycle_runs_every_step_with_the_new_id(self):
+        """Test that one cycle times every CRUD step and threads the inserted id through."""
+        conn = FakeConnection()
+        timings = {}
+        run_cycle(PreparedExecutor(conn), 'bench@example.com', timings)
+        self.assertEqual(set(timings), set(STEPS))
+        self.assertEqual(len(timings['append_history']), 2)
+        sql, params = conn.log[3]
+        self.assertEqual(sql, STEP_SQL['add_preferences'])
+        self.assertEqual(params[0], 42)
+        self.assertEqual(conn.log[-1], (STEP_SQL['delete'], ('bench@example.com',)))
+
+    def test_text_executor_uses_requested_row_format(self):
+        """Test that text modes open one cursor of the right kind and fetch only result sets."""
+        conn = FakeConnection()
+        execute = TextExecutor(conn, 'namedtuple')
+        self.assertEqual(conn.cursor_args, [{'named_tuple': True}])
+        self.assertEqual(execute(STEP_SQL['read'], ('a@example.com',)), ([('row',)], 0))
+        self.assertEqual(execute(STEP_SQL['delete'], ('a@example.com',)), ([], 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the keyset-paginated profile export.
+"""
+
+import io
+import json
+import os
+import sys
+import tempfile
+import unittest
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from subscriber_db.export import export_profiles, iter_profiles, read_checkpoint
+
+
+def make_row(subscriber_id):
+    return {
+        'id': subscriber_id, 'email': f'user{subscriber_id}@example.com',
+        'first_name': 'User', 'last_name': str(subscriber_id), 'is_active': 1,
+        'created_at': datetime(2024, 1, 1), 'updated_at': datetime(2024, 1, 2),
+        'newsletter_enabled': 1, 'marketing_enabled': 0, 'frequency': 'weekly',
+    }
+
+
+class FakeCursor:
+    def __init__(self, rows, log):
+        self.rows = rows
+        self.log = log
+        self.result = []
+
+    def execute(self, sql, params):
+        after_id, limit = params
+        self.log.append(after_id)
+        self.result = [r for r in self.rows if r['id'] > after_id][:limit]
+
+    def fetchall(self):
+        return self.result
+
+    def close(self):
+        pass
+
+
+class FakePool:
+    def __init__(self, rows):
+        self.rows = rows
+        self.log = []
+
+    def connection(self):
+        return self
+
+    def cursor(self, **kwargs):
+        return FakeCursor(self.rows, self.log)
+
+    def close(self):
+        pass
+
+
+class TestProfileExport(unittest.TestCase):
+    """Test class for keyset paging, writers and checkpoints."""
+
+    def test_keyset_pages_follow_last_id(self):
+        """Test that each page starts after the last id of the previous one."""
+        pool = FakePool([make_row(i) for i in (1, 2, 5, 8, 9)])
+        ids = [row['id'] for row in iter_profiles(pool, page_size=2)]
+        self.assertEqual(ids, [1, 2, 5, 8, 9])
+        self.assertEqual(pool.log, [0, 2, 8])
+
+    def test_ndjson_export_with_checkpoint(self):
+        """Test NDJSON output and resumable checkpointing."""
+        pool = FakePool([make_row(i) for i in range(1, 6)])
+        out = io.StringIO()
+        checkpoint = os.path.join(tempfile.mkdtemp(), 'export.state')
+        report = export_profiles(out, 'ndjson', pool=pool, after_id=2, page_size=2,
+                                 checkpoint=checkpoint)
+        lines = [json.loads(line) for line in out.getvalue().splitlines()]
+        self.assertEqual([line['id'] for line in lines], [3, 4, 5])
+        self.assertEqual(lines[0]['created_at'], '2024-01-01T00:00:00')
+        self.assertEqual(report['rows'], 3)
+        self.assertEqual(read_checkpoint(checkpoint), 5)
+
+    def test_csv_export_header(self):
+        """Test that CSV output starts with the column header."""
+        out = io.StringIO()
+        export_profiles(out, 'csv', pool=FakePool([make_row(1)]))
+        self.assertTrue(out.getvalue().startswith('id,email,first_name'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the index trade-off benchmark and the V6 index migration.
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from subscriber_db.benchmark import WorkerState, run_benchmark
+from subscriber_db.index_bench import READ_MIX, SampledReads
+from subscriber_db.migrations import discover_migrations
+
+
+class RecordingConnection:
+    def __init__(self, log):
+        self.log = log
+
+    def cursor(self):
+        return self
+
+    def execute(self, sql, params=()):
+        self.log.append((sql.split()[0], params))
+
+    def fetchall(self):
+        return []
+
+    def close(self):
+        pass
+
+    def rollback(self):
+        pass
+
+
+class RecordingPool:
+    def __init__(self):
+        self.log = []
+
+    def connection(self):
+        return RecordingConnection(self.log)
+
+
+class TestIndexBench(unittest.TestCase):
+    """Test class for sampled reads and the index migration's statements."""
+
+    def test_sampled_reads_never_insert(self):
+        """Test that read runs use the seeded sample instead of falling back to inserts."""
+        pool = RecordingPool()
+        sample = [(10, 'a@example.com'), (11, 'b@example.com')]
+        report = run_benchmark(SampledReads(pool, sample), READ_MIX, workers=2, ops=50, seed=3)
+
+        self.assertEqual(set(report['operations']), {'lookup', 'read_history'})
+        self.assertEqual({verb for verb, _ in pool.log}, {'SELECT'})
+        self.assertTrue(all(params[0] in (10, 11, 'a@example.com', 'b@example.com') for _, params in pool.log))
+
+    def test_sample_is_copied_per_worker(self):
+        """Test that a worker's state gets its own copy of the sample."""
+        sample = [(10, 'a@example.com')]
+        state = WorkerState(0, seed=1)
+        SampledReads(RecordingPool(), sample).execute('read_history', state)
+        self.assertIsNot(state.owned, sample)
+        self.assertEqual(state.owned, sample)
+
+    def test_v6_keeps_unique_email_and_stays_online(self):
+        """Test that V6 only drops the redundant indexes and never copies a table."""
+        migration = next(m for m in discover_migrations() if m.version == '6')
+        sql = '\n'.join(migration.statements())
+
+        self.assertIn('DROP INDEX idx_email', sql)
+        self.assertNotIn('DROP INDEX email', sql)
+        self.assertIn('idx_subscriber_date_action (subscriber_id, action_date, action)', sql)
+        for statement in migration.statements():
+            self.assertIn('ALGORITHM=INPLACE, LOCK=NONE', statement)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Unit tests for chunked bulk deactivation and purge.
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stderr
+from io import StringIO
+from unittest import mock
+
+import mysql.connector
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from subscriber_db.lifecycle import LifecycleError, Throttle, build_criterion, main, run_lifecycle
+
+
+class FakeCursor:
+    """Applies the lifecycle statements to an in-memory {id: is_active} table."""
+
+    def __init__(self, db):
+        self.db = db
+        self.result = []
+
+    def execute(self, sql, params=()):
+        self.db.statements.append(sql.split()[0])
+        if self.db.failures and sql.startswith("UPDATE subscribers"):
+            self.db.failures -= 1
+            raise mysql.connector.Error(msg="Lock wait timeout exceeded", errno=1205)
+        if sql.startswith("SELECT id FROM subscribers s WHERE s.id > %s"):
+            after_id, limit = params[0], params[-1]
+            self.result = [(i,) for i in sorted(self.db.subscribers) if i > after_id][:limit]
+        elif sql.startswith("SELECT id FROM subscribers s WHERE s.id IN"):
+            ids = params[:-len(self.db.criterion_params) or None]
+            active_only = 'is_active' in sql
+            self.result = [(i,) for i in ids if i in self.db.subscribers
+                           and (self.db.subscribers[i] or not active_only)]
+        elif sql.startswith("UPDATE subscribers"):
+            for i in params:
+                self.db.subscribers[i] = False
+        elif sql.startswith("DELETE FROM subscribers"):
+            for i in params:
+                del self.db.subscribers[i]
+        elif sql.startswith("INSERT INTO subscription_history"):
+            self.db.history += len(params) // 3
+        elif sql.startswith("INSERT INTO subscriber_outbox"):
+            self.db.events += len(params) // 3
+
+    def fetchall(self):
+        return self.result
+
+    def close(self):
+        pass
+
+
+class FakePool:
+    def __init__(self, subscribers, criterion_params=()):
+        self.subscribers = dict(subscribers)
+        self.criterion_params = list(criterion_params)
+        self.statements = []
+        self.history = self.events = self.failures = 0
+
+    def connection(self):
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+    def cursor(self, **kwargs):
+        return FakeCursor(self)
+
+    def start_transaction(self):
+        pass
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        self.statements.append('ROLLBACK')
+
+
+class TestLifecycle(unittest.TestCase):
+    """Test class for criteria, chunked deactivation, purge, retries and throttling."""
+
+    def test_criterion_requires_a_filter(self):
+        """Test that filters combine into one predicate and an empty criterion is refused."""
+        sql, params = build_criterion("s.created_at < '2020-01-01'", '%test%', 30)
+        self.assertEqual(sql, "(s.created_at < '2020-01-01') AND s.email LIKE %s AND "
+                              "NOT s.is_active AND s.updated_at < NOW() - INTERVAL %s DAY")
+        self.assertEqual(params, ['%test%', 30])
+        with self.assertRaises(LifecycleError):
+            build_criterion()
+
+    def test_deactivate_rejects_inactive_days(self):
+        """Test that deactivate refuses --inactive-days, which only matches already inactive subscribers."""
+        argv = ['lifecycle', 'deactivate', '--inactive-days', '30', '--dry-run']
+        with mock.patch.object(sys, 'argv', argv), mock.patch('subscriber_db.lifecycle.get_pool') as get_pool:
+            with redirect_stderr(StringIO()) as stderr, self.assertRaises(SystemExit):
+                main()
+        self.assertIn('--inactive-days', stderr.getvalue())
+        get_pool.assert_not_called()
+
+    def test_deactivate_in_chunks_with_retry_and_checkpoint(self):
+        """Test chunked deactivation: skips inactive rows, retries lock timeouts, clears the checkpoint."""
+        pool = FakePool({i: i != 3 for i in range(1, 8)}, ['%test%'])
+        pool.failures = 1
+        checkpoint = os.path.join(tempfile.mkdtemp(), 'lifecycle.state')
+        chunks = []
+        report = run_lifecycle('deactivate', "s.email LIKE %s", ['%test%'], pool, chunk_size=3,
+                               checkpoint=checkpoint, on_chunk=lambda changed, last_id: chunks.append(last_id))
+
+        self.assertEqual(report['changed'], 6)
+        self.assertEqual(report['retries'], 1)
+        self.assertEqual(chunks, [3, 6, 7])
+        self.assertFalse(any(pool.subscribers.values()))
+        self.assertEqual(pool.history, 6)
+        self.assertEqual(pool.events, 12)
+        self.assertIn('ROLLBACK', pool.statements)
+        self.assertFalse(os.path.exists(checkpoint))
+
+    def test_purge_resumes_after_checkpoint_and_deletes_children_first(self):
+        """Test that purge starts after the checkpointed id and deletes history and preferences first."""
+        pool = FakePool({i: True for i in range(1, 6)})
+        checkpoint = os.path.join(tempfile.mkdtemp(), 'lifecycle.state')
+        with open(checkpoint, 'w') as handle:
+            handle.write('2')
+        report = run_lifecycle('purge', "1 = 1", [], pool, chunk_size=10, checkpoint=checkpoint)
+
+        self.assertEqual(report['changed'], 3)
+        self.assertEqual(sorted(pool.subscribers), [1, 2])
+        deletes = [s for s in pool.statements if s == 'DELETE']
+        self.assertEqual(len(deletes), 3)
+        self.assertEqual(pool.events, 3)
+
+    def test_throttle_waits_for_lock_waits_and_lagging_replicas(self):
+        """Test that the throttle sleeps until every check passes, treating unknown lag as lagging."""
+        readings = {'locks': [30, 2], 'lag': [None, 1]}
+        replica = type('Replica', (), {'connect_args': {'host': 'db2'}})()
+        slept, waits = [], []
+        throttle = Throttle(None, replica_pools=[replica], max_replica_lag=5, max_lock_waits=10,
+                            interval=0.5, sleep=slept.append)
+        throttle.lock_waits = lambda: readings['locks'].pop(0)
+        throttle.replica_lag = lambda replica_pool: readings['lag'].pop(0)
+
+        throttle.wait(waits.append)
+
+        self.assertEqual(waits, [['30 row lock waits', 'replica db2 lag unknown']])
+        self.assertEqual(slept, [0.5])
+        self.assertEqual(throttle.waited, 0.5)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the migration apply-time benchmark helpers.
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from subscriber_db.migration_bench import LoadRecorder, LockMonitor, statement_label
+
+
+class TestMigrationBenchWindows(unittest.TestCase):
+    """Test class for attributing load and lock samples to statements."""
+
+    def test_load_window_counts_overlapping_operations(self):
+        """Test that only operations overlapping the statement window are attributed to it."""
+        recorder = LoadRecorder()
+        recorder.record('lookup', 0.0, 0.5, None)      # ends before the window
+        recorder.record('lookup', 0.9, 2.0, None)      # stalled across the window
+        recorder.record('insert', 1.5, 0.1, None)      # inside the window
+        recorder.record('delete', 1.8, 0.05, RuntimeError('lock wait timeout'))
+        recorder.record('lookup', 3.5, 0.1, None)      # starts after the window
+
+        window = recorder.window(1.0, 3.0)
+        self.assertEqual(window['ops'], 3)
+        self.assertEqual(window['errors'], 1)
+        self.assertAlmostEqual(window['ms_max'], 2000.0)
+
+    def test_lock_window(self):
+        """Test that lock waiter samples are summarised per window."""
+        monitor = LockMonitor(pool=None, schema='scratch', interval=0.1)
+        monitor.samples = [(0.5, 0), (1.0, 2), (1.1, 3), (1.2, 0), (5.0, 4)]
+        self.assertEqual(monitor.window(1.0, 2.0), {'max_waiting': 3, 'waiting_session_seconds': 0.5})
+
+    def test_statement_label(self):
+        """Test that statements are collapsed to one short line."""
+        label = statement_label("ALTER TABLE subscribers\n    ADD COLUMN locale VARCHAR(10)", width=30)
+        self.assertEqual(label, "ALTER TABLE subscribers ADD...")
+
+
+if __name__ == '__main__':
+    unittest.main()
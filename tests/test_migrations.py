@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the Flyway-compatible migration runner.
+"""
+
+import os
+import sys
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from subscriber_db.migrations import (MigrationRunner, connection_settings, discover_migrations, flyway_checksum,
+                                      split_statements)
+
+
+def history_row(rank, version, checksum, success=True, kind='SQL'):
+    return {'installed_rank': rank, 'version': version, 'description': 'x', 'type': kind,
+            'script': f'V{version}__x.sql', 'checksum': checksum, 'installed_by': 'test',
+            'installed_on': None, 'execution_time': 1, 'success': success}
+
+
+class TestMigrationRunner(unittest.TestCase):
+    """Test class for discovery, checksums and history reconciliation."""
+
+    def setUp(self):
+        self.migrations = discover_migrations()
+        self.runner = MigrationRunner(pool=object(), migrations=self.migrations, settings={})
+
+    def test_discovers_configured_locations_in_order(self):
+        """Test that V1-V3 are found across initial/ and incremental/."""
+        self.assertEqual([m.version for m in self.migrations][:3], ['1', '2', '3'])
+        self.assertEqual(self.migrations[0].description, 'Create subscribers table')
+        self.assertEqual(self.migrations[0].script, 'V1__Create_subscribers_table.sql')
+
+    def test_checksum_ignores_line_endings_and_bom(self):
+        """Test that the checksum matches Flyway's line-based CRC32."""
+        self.assertEqual(flyway_checksum("a\r\nb\r\n"), flyway_checksum("a\nb"))
+        self.assertEqual(flyway_checksum("﻿a\rb"), flyway_checksum("a\nb"))
+        self.assertLess(flyway_checksum("a\nb"), 0)
+        self.assertGreaterEqual(flyway_checksum("a"), -2 ** 31)
+
+    def test_split_statements(self):
+        """Test splitting around quotes, comments and DELIMITER blocks."""
+        sql = ("-- header;\nSELECT 'a;b';\nDELIMITER $$\n"
+               "CREATE TRIGGER t AFTER INSERT ON x FOR EACH ROW BEGIN SET @a = 1; END$$\n"
+               "DELIMITER ;\n/* c; */ SELECT 2;")
+        statements = split_statements(sql)
+        self.assertEqual(len(statements), 3)
+        self.assertTrue(statements[1].endswith('END'))
+
+    def test_states_and_validation(self):
+        """Test pending, success and checksum-mismatch detection."""
+        first, second = self.migrations[0], self.migrations[1]
+        history = [history_row(1, first.version, first.checksum),
+                   history_row(2, second.version, 12345)]
+        entries = self.runner.states(history)
+        states = {entry['version']: entry['state'] for entry in entries}
+        self.assertEqual(states['1'], 'Success')
+        self.assertEqual(states['3'], 'Pending')
+        errors = self.runner.validation_errors(entries, allow_pending=True)
+        self.assertEqual(len(errors), 1)
+        self.assertIn('checksum mismatch', errors[0])
+
+    def test_failed_migration_blocks(self):
+        """Test that a failed history row is reported."""
+        history = [history_row(1, '1', self.migrations[0].checksum, success=False)]
+        errors = self.runner.validation_errors(self.runner.states(history), allow_pending=True)
+        self.assertIn('failed migration', errors[0])
+
+    def test_baseline_marks_lower_versions(self):
+        """Test that versions at or below a baseline are not pending."""
+        history = [history_row(1, '1', None, kind='BASELINE')]
+        states = {e['version']: e['state'] for e in self.runner.states(history)}
+        self.assertEqual(states['1'], 'Below Baseline')
+        self.assertEqual(states['2'], 'Pending')
+
+    def test_db_environment_overrides_flyway_conf(self):
+        """Test that DB_* reaches the same server as config.db_config, and FLYWAY_* still wins."""
+        settings = {'flyway.url': 'jdbc:mysql://localhost:3306/subscriber_db',
+                    'flyway.user': 'subscriber_user', 'flyway.password': 'SubscriberPass123'}
+        env = {'DB_HOST': 'db', 'DB_PORT': '3307', 'DB_USER': 'app', 'DB_PASSWORD': 'secret'}
+        with mock.patch.dict(os.environ, env, clear=True):
+            self.assertEqual(connection_settings(settings), {
+                'host': 'db', 'port': 3307, 'user': 'app', 'password': 'secret', 'database': 'subscriber_db'})
+        env.update({'FLYWAY_URL': 'jdbc:mysql://flyway:3310/other', 'FLYWAY_USER': 'flyway'})
+        with mock.patch.dict(os.environ, env, clear=True):
+            self.assertEqual(connection_settings(settings), {
+                'host': 'flyway', 'port': 3310, 'user': 'flyway', 'password': 'secret', 'database': 'other'})
+
+
+if __name__ == '__main__':
+    unittest.main()
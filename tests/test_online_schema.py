@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the online schema change helpers.
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from subscriber_db.online_schema import (OnlineSchemaChange, OnlineSchemaError, keyset_predicate, parse_alter,
+                                         parse_marker, shadow_definition, strip_definer, toggle_name,
+                                         trigger_statements)
+
+HISTORY_DDL = """CREATE TABLE `subscription_history` (
+  `id` int NOT NULL AUTO_INCREMENT,
+  `subscriber_id` int NOT NULL,
+  PRIMARY KEY (`id`),
+  CONSTRAINT `subscription_history_ibfk_1` FOREIGN KEY (`subscriber_id`) REFERENCES `subscribers` (`id`) ON DELETE CASCADE
+) ENGINE=InnoDB"""
+
+
+class ChunkCursor:
+    """Cursor over a table of primary key tuples that answers the copy loop's two queries."""
+
+    def __init__(self, keys):
+        self.keys = sorted(keys)
+        self.copied = []
+        self.result = []
+        self.rowcount = 0
+
+    def _split(self, params, width):
+        """Rebuild the key tuple from keyset_predicate's prefix-expanded parameters"""
+        expanded = list(params[:width * (width + 1) // 2])
+        return tuple(expanded[-width:]), params[len(expanded):]
+
+    def execute(self, sql, params=()):
+        width = len(self.keys[0])
+        if sql.startswith("SHOW GLOBAL STATUS"):
+            self.result = [('Threads_running', '3')]
+        elif sql.startswith("SELECT"):
+            after = self._split(params, width)[0] if params else None
+            limit = int(sql.split('LIMIT ')[1].split(')')[0])
+            chunk = [k for k in self.keys if after is None or k > after][:limit]
+            self.result = [chunk[-1]] if chunk else []
+        elif sql.startswith("INSERT IGNORE"):
+            lower = None
+            if "WHERE TRUE" not in sql:
+                lower, params = self._split(params, width)
+            upper = self._split(params, width)[0]
+            rows = [k for k in self.keys if (lower is None or k > lower) and k <= upper]
+            self.copied.extend(rows)
+            self.rowcount = len(rows)
+
+    def fetchone(self):
+        return self.result[0]
+
+    def fetchall(self):
+        return self.result
+
+
+class SwapCursor:
+    """Records the swap's statements and fails the first time one starting with fail_on runs."""
+
+    def __init__(self, fail_on=None):
+        self.fail_on = fail_on
+        self.statements = []
+
+    def execute(self, sql, params=()):
+        self.statements.append(sql)
+        if self.fail_on and sql.startswith(self.fail_on):
+            self.fail_on = None
+            raise RuntimeError("access denied")
+
+
+class TestOnlineSchemaHelpers(unittest.TestCase):
+    """Test class for marker parsing, shadow DDL and trigger generation."""
+
+    def test_parse_marker(self):
+        """Test that the marker is found and its options converted."""
+        sql = "-- online-schema-change chunk-time=0.25 keep-old=true\nALTER TABLE subscribers ADD COLUMN x INT;"
+        self.assertEqual(parse_marker(sql), {'chunk_time': 0.25, 'drop_old': False})
+        self.assertIsNone(parse_marker("ALTER TABLE subscribers ADD COLUMN x INT;"))
+        with self.assertRaises(OnlineSchemaError):
+            parse_marker("-- online-schema-change turbo=1")
+
+    def test_parse_alter(self):
+        """Test that only ALTER TABLE statements are picked up."""
+        self.assertEqual(parse_alter("ALTER TABLE `subscribers`\n  ADD COLUMN locale VARCHAR(10)"),
+                         ('subscribers', 'ADD COLUMN locale VARCHAR(10)'))
+        self.assertIsNone(parse_alter("UPDATE subscribers SET is_active = 1"))
+
+    def test_shadow_definition_toggles_constraint_names(self):
+        """Test that the shadow table gets its own name and non-clashing constraint names."""
+        sql = shadow_definition(HISTORY_DDL, 'subscription_history', '_subscription_history_new')
+        self.assertTrue(sql.startswith("CREATE TABLE `_subscription_history_new` ("))
+        self.assertIn("CONSTRAINT `_subscription_history_ibfk_1`", sql)
+        self.assertEqual(toggle_name('_subscription_history_ibfk_1'), 'subscription_history_ibfk_1')
+
+    def test_triggers_never_delete_on_update(self):
+        """Test that the update trigger upserts instead of REPLACE, which would cascade."""
+        triggers = dict(trigger_statements('subscribers', '_subscribers_new', ['id', 'email'], ['id']))
+        self.assertEqual(set(triggers), {'osc_subscribers_ins', 'osc_subscribers_upd', 'osc_subscribers_del'})
+        self.assertNotIn('REPLACE', triggers['osc_subscribers_upd'])
+        self.assertIn('ON DUPLICATE KEY UPDATE `email` = VALUES(`email`)', triggers['osc_subscribers_upd'])
+
+    def test_rename_is_rejected(self):
+        """Test that column renames are refused rather than silently losing data."""
+        with self.assertRaises(OnlineSchemaError):
+            OnlineSchemaChange(None, 'subscribers', 'CHANGE first_name given_name VARCHAR(100)')
+
+    def test_copy_walks_every_primary_key_chunk(self):
+        """Test that chunked copying covers sparse ids exactly once."""
+        ids = [(i,) for i in range(1, 5000, 3)]
+        cursor = ChunkCursor(ids)
+        change = OnlineSchemaChange(cursor, 'subscribers', 'ADD COLUMN x INT', chunk_size=200)
+        copied, chunks = change._copy(['id', 'email'], ['id'])
+
+        self.assertEqual(copied, len(ids))
+        self.assertEqual(cursor.copied, ids)
+        self.assertGreater(chunks, 1)
+
+    def test_copy_walks_a_composite_primary_key(self):
+        """Test keyset copying on V4's (id, action_date) history key, including chunks that split an id."""
+        keys = [(i, day) for i in range(1, 400, 7) for day in (3, 1, 2)]
+        cursor = ChunkCursor(keys)
+        change = OnlineSchemaChange(cursor, 'subscription_history', 'ADD COLUMN x INT', chunk_size=100)
+        copied, chunks = change._copy(['id', 'action_date', 'action'], ['id', 'action_date'])
+
+        self.assertEqual(cursor.copied, sorted(keys))
+        self.assertEqual(copied, len(keys))
+        self.assertGreater(chunks, 1)
+
+    def test_keyset_predicate_and_composite_triggers(self):
+        """Test the expanded keyset comparison and key matching in the sync triggers."""
+        sql, params = keyset_predicate(['id', 'action_date'], '>', (5, 'd'))
+        self.assertEqual(sql, "((`id` > %s) OR (`id` = %s AND `action_date` > %s))")
+        self.assertEqual(params, [5, 5, 'd'])
+        self.assertEqual(keyset_predicate(['id'], '<=', (9,)), ("`id` <= %s", [9]))
+
+        triggers = dict(trigger_statements('subscription_history', '_subscription_history_new',
+                                           ['id', 'action_date', 'action'], ['id', 'action_date']))
+        self.assertIn("WHERE `id` = OLD.`id` AND `action_date` = OLD.`action_date`",
+                      triggers['osc_subscription_history_del'])
+        self.assertIn("ON DUPLICATE KEY UPDATE `action` = VALUES(`action`)",
+                      triggers['osc_subscription_history_upd'])
+
+
+    def test_swap_moves_triggers_under_the_write_lock(self):
+        """Test that the rename and trigger moves happen between LOCK TABLES and UNLOCK TABLES."""
+        cursor = SwapCursor()
+        change = OnlineSchemaChange(cursor, 'subscription_history', 'ADD COLUMN x INT')
+        change._swap([('history_count_insert', 'CREATE TRIGGER `history_count_insert` ...')])
+
+        self.assertEqual(cursor.statements, [
+            "LOCK TABLES `subscription_history` WRITE, `_subscription_history_new` WRITE",
+            "RENAME TABLE `subscription_history` TO `_subscription_history_old`, "
+            "`_subscription_history_new` TO `subscription_history`",
+            "DROP TRIGGER `history_count_insert`",
+            "CREATE TRIGGER `history_count_insert` ...",
+            "UNLOCK TABLES",
+        ])
+
+    def test_failed_trigger_create_restores_the_original_table(self):
+        """Test that a failing CREATE TRIGGER renames back and recreates the dropped triggers."""
+        cursor = SwapCursor(fail_on="CREATE TRIGGER `b`")
+        change = OnlineSchemaChange(cursor, 'subscribers', 'ADD COLUMN x INT')
+        with self.assertRaises(RuntimeError):
+            change._swap([('a', 'CREATE TRIGGER `a` ...'), ('b', 'CREATE TRIGGER `b` ...')])
+
+        self.assertEqual(cursor.statements[-6:], [
+            "DROP TRIGGER IF EXISTS `a`",
+            "DROP TRIGGER IF EXISTS `b`",
+            "RENAME TABLE `subscribers` TO `_subscribers_new`, `_subscribers_old` TO `subscribers`",
+            "CREATE TRIGGER `a` ...",
+            "CREATE TRIGGER `b` ...",
+            "UNLOCK TABLES",
+        ])
+
+    def test_strip_definer(self):
+        """Test that recreated triggers do not need the privilege to set another definer."""
+        self.assertEqual(strip_definer("CREATE DEFINER=`root`@`%` TRIGGER `t` AFTER INSERT ON `s` FOR EACH ROW DO 0"),
+                         "CREATE TRIGGER `t` AFTER INSERT ON `s` FOR EACH ROW DO 0")
+        self.assertEqual(strip_definer("CREATE TRIGGER `t` BEFORE DELETE ON `s` FOR EACH ROW DO 0"),
+                         "CREATE TRIGGER `t` BEFORE DELETE ON `s` FOR EACH ROW DO 0")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the change outbox writer and consumer.
+"""
+
+import json
+import os
+import sys
+import unittest
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from subscriber_db.outbox import CallbackSink, OutboxConsumer, OutboxError, deliverable, record_events
+
+NOW = datetime(2024, 5, 1, 12, 0, 0)
+
+
+def make_row(outbox_id, age_seconds=60):
+    return {'id': outbox_id, 'subscriber_id': 7, 'event_type': 'subscriber.updated',
+            'payload': json.dumps({'first_name': 'Ann'}), 'created_at': NOW - timedelta(seconds=age_seconds),
+            'read_at': NOW}
+
+
+class FakeCursor:
+    """Serves outbox rows and the consumer watermark from in-memory state."""
+
+    def __init__(self, db):
+        self.db = db
+        self.result = []
+        self.rowcount = 0
+        self.executed = []
+
+    def execute(self, sql, params=()):
+        self.executed.append((sql, params))
+        if 'FROM subscriber_outbox' in sql and 'WHERE id > %s' in sql:
+            after_id, limit = params
+            self.result = [r for r in self.db.rows if r['id'] > after_id][:limit]
+        elif sql.startswith("SELECT COALESCE(MIN(id)"):
+            self.result = [(min((r['id'] for r in self.db.rows), default=1) - 1,)]
+        elif sql.startswith("INSERT IGNORE INTO outbox_consumers"):
+            self.db.watermarks.setdefault(params[0], params[1])
+        elif sql.startswith("SELECT last_id"):
+            self.result = [(self.db.watermarks[params[0]],)]
+        elif sql.startswith("SELECT @@auto_increment_increment"):
+            self.result = [(1,)]
+        elif sql.startswith("UPDATE outbox_consumers"):
+            last_id, _, name, expected = params
+            self.rowcount = 0
+            if self.db.watermarks.get(name) == expected:
+                self.db.watermarks[name] = last_id
+                self.rowcount = 1
+
+    def fetchall(self):
+        return self.result
+
+    def fetchone(self):
+        return self.result[0]
+
+    def close(self):
+        pass
+
+
+class FakePool:
+    """Pool and connection in one; pool.cursor(commit=True) is the context-manager form."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.watermarks = {}
+
+    def connection(self):
+        return self
+
+    def cursor(self, commit=False, **kwargs):
+        return self._committing_cursor() if commit else FakeCursor(self)
+
+    @contextmanager
+    def _committing_cursor(self):
+        yield FakeCursor(self)
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class TestOutbox(unittest.TestCase):
+    """Test class for event rows, gap handling and watermark delivery."""
+
+    def test_record_events_writes_one_multi_row_insert(self):
+        """Test that events become one INSERT with JSON payloads and unknown types are rejected."""
+        cursor = FakeCursor(FakePool([]))
+        written = record_events(cursor, [(1, 'subscriber.created', {'email': 'a@example.com', 'when': NOW}),
+                                         (1, 'history.appended', {'action': 'subscribed'})])
+        self.assertEqual(written, 2)
+        sql, params = cursor.executed[0]
+        self.assertTrue(sql.startswith("INSERT INTO subscriber_outbox"))
+        self.assertEqual(json.loads(params[2])['when'], NOW.isoformat())
+        self.assertEqual(record_events(cursor, []), 0)
+        with self.assertRaises(ValueError):
+            record_events(cursor, [(1, 'subscriber.renamed', {})])
+
+    def test_gaps_hold_delivery_until_grace_expires(self):
+        """Test that a hole in the ids stops delivery only while the row after it is recent."""
+        rows = [make_row(11), make_row(12), make_row(14, age_seconds=5), make_row(15, age_seconds=5)]
+        self.assertEqual([r['id'] for r in deliverable(rows, 10, grace_seconds=30)], [11, 12])
+        self.assertEqual([r['id'] for r in deliverable(rows, 10, grace_seconds=2)], [11, 12, 14, 15])
+        self.assertEqual(deliverable(rows[2:], 12, grace_seconds=30), [])
+        self.assertEqual([r['id'] for r in deliverable([make_row(13), make_row(15)], 11, 30, increment=2)],
+                         [13, 15])
+
+    def test_watermark_moves_only_after_delivery(self):
+        """Test at-least-once delivery: a failing sink leaves the batch to be delivered again."""
+        pool = FakePool([make_row(i) for i in range(5, 10)])
+        batches, failures = [], [True]
+
+        def deliver(events):
+            if failures:
+                failures.pop()
+                raise RuntimeError("sink down")
+            batches.append([event['id'] for event in events])
+
+        consumer = OutboxConsumer('search', CallbackSink(deliver), pool=pool, batch_size=3)
+        self.assertEqual(consumer.register(), 4)
+        with self.assertRaises(RuntimeError):
+            consumer.poll()
+        self.assertEqual(pool.watermarks['search'], 4)
+
+        self.assertEqual(consumer.poll(), 3)
+        self.assertEqual(consumer.poll(), 2)
+        self.assertEqual(consumer.poll(), 0)
+        self.assertEqual(batches, [[5, 6, 7], [8, 9]])
+        self.assertEqual(pool.watermarks['search'], 9)
+        self.assertEqual(consumer.tracker.rows, 5)
+
+    def test_concurrent_consumer_with_same_name_is_detected(self):
+        """Test that a watermark moved by another process raises instead of going backwards."""
+        pool = FakePool([make_row(i) for i in range(1, 4)])
+        consumer = OutboxConsumer('search', CallbackSink(lambda events: None), pool=pool)
+        consumer.register()
+        pool.watermarks['search'] = 3
+        with self.assertRaises(OutboxError):
+            consumer.poll()
+
+
+if __name__ == '__main__':
+    unittest.main()
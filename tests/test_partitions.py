@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Unit tests for subscription_history partition maintenance planning.
+"""
+
+import os
+import sys
+import unittest
+from contextlib import contextmanager
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from subscriber_db.partitions import add_months, epoch, plan_rollover, rollover
+
+V4_LAYOUT = [
+    {'name': 'p_history', 'bound': epoch(datetime(2025, 1, 1)), 'rows': 3},
+    {'name': 'p_future', 'bound': None, 'rows': 0},
+]
+
+
+def monthly_layout(first, count):
+    partitions = []
+    for i in range(count):
+        month = add_months(first, i)
+        partitions.append({'name': f"p{month:%Y%m}", 'bound': epoch(add_months(month, 1)), 'rows': 10})
+    return partitions + [{'name': 'p_future', 'bound': None, 'rows': 0}]
+
+
+class FakeCursor:
+    """Partition metadata, per-partition history rows and counter adjustments in memory."""
+
+    def __init__(self, db):
+        self.db = db
+        self.result = []
+
+    def execute(self, sql, params=()):
+        self.db.executed.append(sql)
+        if 'information_schema.partitions' in sql:
+            self.result = [(p['name'], 'MAXVALUE' if p['bound'] is None else str(p['bound']), 0)
+                           for p in self.db.layout]
+        elif 'information_schema.tables' in sql:
+            self.result = [(1,)]
+        elif sql.startswith("SELECT action, COUNT(*) FROM subscription_history PARTITION"):
+            name = sql.split('PARTITION (')[1].split(')')[0]
+            self.result = list(self.db.rows.get(name, {}).items())
+        elif 'EXCHANGE PARTITION' in sql:
+            self.db.rows.pop(sql.split('EXCHANGE PARTITION ')[1].split()[0], None)
+        elif 'DROP PARTITION' in sql:
+            for name in sql.split('DROP PARTITION ')[1].split(', '):
+                self.db.rows.pop(name, None)
+
+    def executemany(self, sql, rows):
+        for name, delta in rows:
+            self.db.counters[name] = self.db.counters.get(name, 0) + delta
+
+    def fetchall(self):
+        return self.result
+
+    def fetchone(self):
+        return self.result[0]
+
+
+class FakePool:
+    def __init__(self, layout, rows, counters):
+        self.layout = layout
+        self.rows = rows
+        self.counters = counters
+        self.executed = []
+
+    @contextmanager
+    def cursor(self, commit=False, **kwargs):
+        yield FakeCursor(self)
+
+
+class TestPlanRollover(unittest.TestCase):
+    """Test class for pre-creating and retiring monthly partitions."""
+
+    def test_splits_future_up_to_the_horizon(self):
+        """Test that months from the last bound to now + ahead are split out of p_future."""
+        statements = plan_rollover(V4_LAYOUT, datetime(2025, 3, 15), months_ahead=2)
+
+        self.assertEqual(len(statements), 1)
+        sql = statements[0]
+        self.assertIn("REORGANIZE PARTITION p_future INTO", sql)
+        for name in ('p202501', 'p202502', 'p202503', 'p202504', 'p202505'):
+            self.assertIn(f"PARTITION {name} VALUES LESS THAN", sql)
+        self.assertNotIn('p202506', sql)
+        self.assertIn(f"p202505 VALUES LESS THAN ({epoch(datetime(2025, 6, 1))})", sql)
+        self.assertTrue(sql.rstrip().endswith("PARTITION p_future VALUES LESS THAN MAXVALUE\n)"))
+
+    def test_nothing_to_do_when_current(self):
+        """Test that an up-to-date layout produces no statements."""
+        layout = monthly_layout(datetime(2025, 1, 1), 6)
+        self.assertEqual(plan_rollover(layout, datetime(2025, 3, 1), months_ahead=2), [])
+
+    def test_drop_and_archive_expired_months(self):
+        """Test that partitions older than the retention window are exchanged out and dropped."""
+        layout = monthly_layout(datetime(2024, 1, 1), 18)
+        statements = plan_rollover(layout, datetime(2025, 5, 10), months_ahead=0,
+                                   retain_months=12, archive=True)
+
+        self.assertIn("ALTER TABLE subscription_history EXCHANGE PARTITION p202401 "
+                      "WITH TABLE subscription_history_p202401 WITHOUT VALIDATION", statements)
+        self.assertEqual(statements[-1], "ALTER TABLE subscription_history DROP PARTITION "
+                                         "p202401, p202402, p202403, p202404")
+
+    def test_retention_anchor_is_the_newest_partition_after_the_split(self):
+        """Test that an old last partition can expire once the split adds newer months, but not before."""
+        stale = [{'name': 'p202401', 'bound': epoch(datetime(2024, 2, 1)), 'rows': 5},
+                 {'name': 'p_future', 'bound': None, 'rows': 0}]
+        statements = plan_rollover(stale, datetime(2025, 6, 1), months_ahead=1, retain_months=3)
+        self.assertIn("PARTITION p202402 VALUES LESS THAN", statements[0])
+        self.assertEqual(statements[-1], "ALTER TABLE subscription_history DROP PARTITION p202401")
+
+    def test_first_rollover_after_v4_only_adds_months_ahead(self):
+        """Test that V4's months through the current one leave only new, empty months to split out."""
+        layout = V4_LAYOUT[:1] + monthly_layout(datetime(2025, 1, 1), 6)
+        statements = plan_rollover(layout, datetime(2025, 6, 10), months_ahead=2)
+        self.assertEqual(len(statements), 1)
+        self.assertNotIn('p202506', statements[0])
+        self.assertIn('PARTITION p202507 VALUES LESS THAN', statements[0])
+        self.assertIn('PARTITION p202508 VALUES LESS THAN', statements[0])
+
+    def test_archive_rollover_takes_exchanged_rows_out_of_the_counters(self):
+        """Test that counter deltas are read before the EXCHANGE empties each expiring partition."""
+        layout = monthly_layout(datetime(2024, 1, 1), 18)
+        rows = {'p202401': {'subscribed': 4, 'updated': 1}, 'p202402': {'subscribed': 2}, 'p202405': {'updated': 7}}
+        pool = FakePool(layout, rows, {'subscription_history': 15, 'subscription_history.action.subscribed': 6,
+                                       'subscription_history.action.updated': 8})
+
+        rollover(pool, datetime(2025, 5, 10), months_ahead=0, retain_months=12, archive=True)
+
+        self.assertEqual(pool.counters, {'subscription_history': 8, 'subscription_history.action.subscribed': 0,
+                                         'subscription_history.action.updated': 7})
+        first_exchange = next(i for i, sql in enumerate(pool.executed) if 'EXCHANGE PARTITION' in sql)
+        counted = [i for i, sql in enumerate(pool.executed) if sql.startswith("SELECT action, COUNT(*)")]
+        self.assertTrue(counted and max(counted) < first_exchange)
+
+    def test_requires_partitioned_table(self):
+        """Test that an unpartitioned table is reported instead of altered."""
+        with self.assertRaises(ValueError):
+            plan_rollover([], datetime(2025, 1, 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the query plan regression harness.
+"""
+
+import copy
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from subscriber_db.query_plans import check_plans, summarize_plan
+
+# Trimmed MySQL 8.0 EXPLAIN FORMAT=JSON output for preferences_by_email
+JOIN_EXPLAIN = {
+    "query_block": {
+        "select_id": 1,
+        "cost_info": {"query_cost": "0.70"},
+        "nested_loop": [
+            {"table": {"table_name": "s", "access_type": "const", "possible_keys": ["PRIMARY", "email"],
+                       "key": "email", "rows_examined_per_scan": 1, "rows_produced_per_join": 1}},
+            {"table": {"table_name": "sp", "access_type": "ref", "possible_keys": ["unique_subscriber_pref"],
+                       "key": "unique_subscriber_pref", "rows_examined_per_scan": 1,
+                       "rows_produced_per_join": 1}},
+        ],
+    }
+}
+
+HISTORY_EXPLAIN = {
+    "query_block": {
+        "select_id": 1,
+        "cost_info": {"query_cost": "1.65"},
+        "ordering_operation": {
+            "using_filesort": False,
+            "table": {"table_name": "subscription_history", "partitions": ["p_history", "p_future"],
+                      "access_type": "ref", "key": "idx_subscriber_date", "rows_examined_per_scan": 4},
+        },
+    }
+}
+
+
+class TestQueryPlans(unittest.TestCase):
+    """Test class for plan summaries and regression detection."""
+
+    def test_summarize_nested_loop(self):
+        """Test that every table access in a join is captured with its index and rows."""
+        plan = summarize_plan(JOIN_EXPLAIN)
+
+        self.assertEqual(plan['cost'], 0.70)
+        self.assertEqual([(t['table'], t['access_type'], t['key']) for t in plan['tables']],
+                         [('s', 'const', 'email'), ('sp', 'ref', 'unique_subscriber_pref')])
+        self.assertEqual(plan['rows_examined'], 2)
+        self.assertFalse(plan['filesort'])
+
+    def test_unchanged_plan_passes(self):
+        """Test that a plan identical to its baseline has no regressions."""
+        plans = {'history_by_subscriber': summarize_plan(HISTORY_EXPLAIN)}
+        self.assertEqual(check_plans(plans, copy.deepcopy(plans)), ([], []))
+
+    def test_scan_and_filesort_are_regressions(self):
+        """Test that losing the index shows up as a worse access type and a new filesort."""
+        baseline = {'history_by_subscriber': summarize_plan(HISTORY_EXPLAIN)}
+        degraded = copy.deepcopy(HISTORY_EXPLAIN)
+        table = degraded['query_block']['ordering_operation']
+        table['using_filesort'] = True
+        table['table'].update(access_type='ALL', key=None, rows_examined_per_scan=500000)
+
+        regressions, notes = check_plans({'history_by_subscriber': summarize_plan(degraded)}, baseline)
+        self.assertIn("history_by_subscriber: subscription_history access ref -> ALL", regressions)
+        self.assertIn("history_by_subscriber: filesort appeared", regressions)
+        self.assertTrue(any('rows examined' in r for r in regressions))
+        self.assertEqual(notes, ["history_by_subscriber: subscription_history index idx_subscriber_date -> None"])
+
+    def test_index_backed_queries_checked_without_baseline(self):
+        """Test that a full scan of an index-backed query fails even without a baseline."""
+        scan = copy.deepcopy(JOIN_EXPLAIN)
+        scan['query_block']['nested_loop'][0]['table'].update(access_type='ALL', key=None)
+        regressions, _ = check_plans({'preferences_by_email': summarize_plan(scan),
+                                      'test_cleanup_subscribers': summarize_plan(scan)})
+        self.assertEqual(regressions, ["preferences_by_email: full scan of s"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the database readiness probe.
+"""
+
+import os
+import sys
+import unittest
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from subscriber_db.readiness import NotReady, wait_for_db
+
+CONFIG = {'host': '127.0.0.1', 'port': 3307}
+
+
+class TestWaitForDb(unittest.TestCase):
+    """Test class for backoff, deadline and phase reporting."""
+
+    def test_ready_after_retries(self):
+        """Test that failing phases are retried until the probe succeeds."""
+        outcomes = [NotReady('tcp', 'refused'), NotReady('auth', 'denied'), '3']
+        sleeps = []
+
+        def fake_probe(config, expected_version, timeout):
+            outcome = outcomes.pop(0)
+            if isinstance(outcome, Exception):
+                raise outcome
+            return outcome
+
+        with mock.patch('subscriber_db.readiness.probe', fake_probe):
+            report = wait_for_db(CONFIG, deadline=10, expected_version='3', sleep=sleeps.append)
+        self.assertTrue(report['ready'])
+        self.assertEqual(report['attempts'], 3)
+        self.assertEqual(report['schema_version'], '3')
+        self.assertEqual(len(sleeps), 2)
+        self.assertIn('schema', report['phases'])
+
+    def test_deadline_reports_last_error(self):
+        """Test that the probe gives up at the deadline with the last failure."""
+        def fake_probe(config, expected_version, timeout):
+            raise NotReady('query', 'server shutting down')
+
+        with mock.patch('subscriber_db.readiness.probe', fake_probe):
+            report = wait_for_db(CONFIG, deadline=0.05, initial_delay=0.01)
+        self.assertFalse(report['ready'])
+        self.assertIsNone(report['time_to_ready'])
+        self.assertIn('query', report['last_error'])
+        self.assertIn('auth', report['phases'])
+        self.assertNotIn('query', report['phases'])
+
+    def test_backoff_is_bounded(self):
+        """Test that jittered delays never exceed max_delay."""
+        sleeps = []
+        attempts = iter(range(8))
+
+        def fake_probe(config, expected_version, timeout):
+            if next(attempts) < 7:
+                raise NotReady('tcp', 'refused')
+
+        with mock.patch('subscriber_db.readiness.probe', fake_probe):
+            wait_for_db(CONFIG, deadline=100, max_delay=0.5, sleep=sleeps.append)
+        self.assertTrue(all(0 <= delay <= 0.5 for delay in sleeps))
+
+
+if __name__ == '__main__':
+    unittest.main()
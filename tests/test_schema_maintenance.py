@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+End-to-end tests for partition maintenance and online schema changes.
+They migrate their own scratch schema (next to the worker's schema)
+and drop it afterwards; they are skipped when no MySQL server is reachable.
+"""
+
+import os
+import sys
+import unittest
+from datetime import datetime, timezone
+
+import mysql.connector
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from subscriber_db import stats
+from subscriber_db.config import db_config
+from subscriber_db.online_schema import OnlineSchemaChange
+from subscriber_db.partitions import list_partitions, rollover
+from subscriber_db.pool import ConnectionPool
+from subscriber_db.testing import drop_schema, provision_schema, worker_schema_name
+
+
+@pytest.mark.usefixtures('worker_schema')
+class TestSchemaMaintenance(unittest.TestCase):
+    """Test class for rollover(archive=True) and an online ALTER on a migrated schema."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Migrate a scratch schema and connect to it as the application user."""
+        cls.schema = worker_schema_name(os.getenv('DB_NAME', 'subscriber_db'), 'maintenance')
+        try:
+            provision_schema(cls.schema)
+        except mysql.connector.Error as e:
+            raise unittest.SkipTest(f"MySQL not available: {e}")
+        cls.pool = ConnectionPool(min_size=0, max_size=1, **db_config(database=cls.schema, autocommit=True))
+
+    @classmethod
+    def tearDownClass(cls):
+        """Drop the scratch schema."""
+        cls.pool.close()
+        drop_schema(cls.schema)
+
+    def setUp(self):
+        """Add one subscriber with history in January 2025, February 2025 and now."""
+        self.now = datetime.now(timezone.utc).replace(tzinfo=None)
+        with self.pool.cursor() as cursor:
+            cursor.execute("INSERT INTO subscribers (email, first_name) VALUES (%s, %s)",
+                           (f"maintenance-{self._testMethodName}@example.com", 'Maintenance'))
+            self.subscriber_id = cursor.lastrowid
+            cursor.executemany(
+                "INSERT INTO subscription_history (subscriber_id, action, action_date) VALUES (%s, %s, %s)",
+                [(self.subscriber_id, 'subscribed', datetime(2025, 1, 15, 12)),
+                 (self.subscriber_id, 'updated', datetime(2025, 1, 20, 12)),
+                 (self.subscriber_id, 'unsubscribed', datetime(2025, 2, 15, 12)),
+                 (self.subscriber_id, 'reactivated', self.now.replace(microsecond=0))])
+
+    def _query(self, sql, params=()):
+        with self.pool.cursor() as cursor:
+            cursor.execute(sql, params)
+            return cursor.fetchall()
+
+    def _history_triggers(self):
+        return {row[0] for row in self._query(
+            "SELECT trigger_name FROM information_schema.triggers "
+            "WHERE event_object_schema = DATABASE() AND event_object_table = 'subscription_history'")}
+
+    def test_rollover_archives_expired_months_and_keeps_counters_exact(self):
+        """Test that expired months are exchanged out, dropped and taken out of the V5 counters."""
+        # Keep everything from February 2025 on, so p_history and p202501 expire
+        retain = (self.now.year * 12 + self.now.month) - (2025 * 12 + 2)
+        rollover(self.pool, now=self.now, months_ahead=1, retain_months=retain, archive=True)
+
+        with self.pool.cursor() as cursor:
+            names = [partition['name'] for partition in list_partitions(cursor)]
+        self.assertNotIn('p202501', names)
+        self.assertEqual(names[0], 'p202502')
+        self.assertEqual(names[-1], 'p_future')
+        self.assertEqual(self._query("SELECT COUNT(*) FROM subscription_history_p202501 WHERE subscriber_id = %s",
+                                     (self.subscriber_id,)), [(2,)])
+        self.assertEqual(self._query("SELECT COUNT(*) FROM subscription_history WHERE subscriber_id = %s",
+                                     (self.subscriber_id,)), [(2,)])
+        self.assertEqual(stats.verify(self.pool), {})
+
+    def test_online_alter_keeps_rows_triggers_and_counters(self):
+        """Test that an online ALTER of the partitioned history table keeps every row and trigger."""
+        triggers = self._history_triggers()
+        rows = self._query("SELECT COUNT(*) FROM subscription_history")
+        with self.pool.cursor() as cursor:
+            report = OnlineSchemaChange(cursor, 'subscription_history', 'ADD COLUMN channel VARCHAR(20) NULL',
+                                        chunk_size=100).run()
+
+        self.assertEqual(report['rows_copied'], rows[0][0])
+        self.assertEqual(self._query("SELECT COUNT(*) FROM subscription_history"), rows)
+        self.assertEqual(self._history_triggers(), triggers)
+        self.assertEqual(self._query(
+            "SELECT COUNT(*) FROM information_schema.columns WHERE table_schema = DATABASE() "
+            "AND table_name = 'subscription_history' AND column_name = 'channel'"), [(1,)])
+        with self.pool.cursor() as cursor:
+            cursor.execute("INSERT INTO subscription_history (subscriber_id, action, channel) VALUES (%s, %s, %s)",
+                           (self.subscriber_id, 'updated', 'email'))
+            # The V4 reference check moved over with the table
+            with self.assertRaises(mysql.connector.Error):
+                cursor.execute("INSERT INTO subscription_history (subscriber_id, action) VALUES (%s, %s)",
+                               (0, 'updated'))
+        self.assertEqual(stats.verify(self.pool), {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the synthetic data generator.
+"""
+
+import os
+import sys
+import threading
+import unittest
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from subscriber_db.seed import REFERENCE_END, generate_chunk, seed_database
+
+
+class FakeConnection:
+    """Connection that records which table each committed INSERT targeted."""
+
+    def __init__(self, log, lock):
+        self.log = log
+        self.lock = lock
+        self.pending = None
+
+    def cursor(self):
+        return self
+
+    def execute(self, sql, params):
+        table = sql.split()[2]
+        self.pending = (table, params)
+
+    def commit(self):
+        with self.lock:
+            self.log.append(self.pending)
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class FakePool:
+    def __init__(self):
+        self.log = []
+        self.lock = threading.Lock()
+
+    def connection(self):
+        return FakeConnection(self.log, self.lock)
+
+
+class TestGenerateChunk(unittest.TestCase):
+    """Test class for reproducibility and data shape."""
+
+    def test_same_seed_same_rows(self):
+        """Test that a seed and id range always produce identical rows."""
+        self.assertEqual(generate_chunk(42, 1, 200), generate_chunk(42, 1, 200))
+        self.assertNotEqual(generate_chunk(42, 1, 200)[0], generate_chunk(43, 1, 200)[0])
+
+    def test_chunk_size_does_not_change_rows(self):
+        """Test that splitting an id range into different chunks yields the same rows."""
+        whole = generate_chunk(42, 1, 300)
+        parts = [generate_chunk(42, first_id, size) for first_id, size in ((1, 128), (129, 100), (229, 72))]
+        self.assertEqual(whole, tuple(sum(tables, []) for tables in zip(*parts)))
+
+    def test_rows_are_consistent(self):
+        """Test unique emails, one preference row each and history matching is_active."""
+        subscribers, preferences, history = generate_chunk(7, 1000, 2000)
+
+        self.assertEqual([row[0] for row in subscribers], list(range(1000, 3000)))
+        self.assertEqual(len({row[1] for row in subscribers}), 2000)
+        self.assertEqual([row[0] for row in preferences], list(range(1000, 3000)))
+        self.assertGreaterEqual(len(history), 2000)
+
+        last_action = {}
+        for subscriber_id, action, action_date, _ in history:
+            last_action[subscriber_id] = action
+        for subscriber_id, _, _, _, is_active, _, _ in subscribers:
+            self.assertEqual(last_action[subscriber_id] != 'unsubscribed', is_active)
+
+        frequencies = [row[3] for row in preferences]
+        self.assertGreater(frequencies.count('weekly'), frequencies.count('daily'))
+
+    def test_history_spans_the_partitioned_months_up_to_the_reference_end(self):
+        """Test that history reaches V4's monthly partitions and stops at a configurable reference end."""
+        history = generate_chunk(7, 1, 2000)[2]
+        dates = [row[2] for row in history]
+        self.assertLessEqual(max(dates), REFERENCE_END)
+        self.assertGreater(sum(1 for date in dates if date >= datetime(2025, 1, 1)), len(dates) // 4)
+
+        earlier = generate_chunk(7, 1, 200, {'reference_end': datetime(2024, 1, 1)})[2]
+        self.assertLessEqual(max(row[2] for row in earlier), datetime(2024, 1, 1))
+        self.assertEqual(earlier, generate_chunk(7, 1, 200, {'reference_end': datetime(2024, 1, 1)})[2])
+
+
+class TestSeedDatabase(unittest.TestCase):
+    """Test class for the parallel loader pipeline."""
+
+    def test_children_load_after_their_subscribers(self):
+        """Test that child rows of a chunk are only inserted after its subscribers commit."""
+        pool = FakePool()
+        report = seed_database(pool, 2500, start_id=1, seed=3, chunk_size=1000, workers=2)
+
+        self.assertEqual(report['tables']['subscribers']['rows'], 2500)
+        self.assertEqual(report['reference_end'], str(REFERENCE_END))
+        self.assertEqual(report['tables']['subscription_preferences']['rows'], 2500)
+        committed = set()
+        for table, params in pool.log:
+            if table == 'subscribers':
+                committed.update(params[0::7])
+            else:
+                self.assertIn(params[0], committed)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the trigger-maintained table statistics.
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from subscriber_db.migrations import discover_migrations
+from subscriber_db.stats import history_partition_deltas, summarize, table_counts
+
+
+class GroupedCursor:
+    def __init__(self, rows):
+        self.rows = rows
+        self.sql = None
+
+    def execute(self, sql, params=()):
+        self.sql = sql
+
+    def fetchall(self):
+        return self.rows
+
+
+class TestTableStats(unittest.TestCase):
+    """Test class for counter shaping and the V5 trigger set."""
+
+    def test_summarize_fills_missing_counters(self):
+        """Test that absent counters read as zero and inactive is derived."""
+        stats = summarize({'subscribers': 10, 'subscribers.active': 7,
+                           'subscription_preferences': 4, 'subscription_preferences.frequency.daily': 4,
+                           'subscription_history.action.subscribed': 2, 'subscription_history': 2})
+
+        self.assertEqual(stats['subscribers'], {'total': 10, 'active': 7, 'inactive': 3})
+        self.assertEqual(stats['subscription_preferences']['frequency'],
+                         {'daily': 4, 'weekly': 0, 'monthly': 0})
+        self.assertEqual(stats['subscription_history']['action']['unsubscribed'], 0)
+        self.assertEqual(table_counts(stats), {'subscribers': 10, 'subscription_preferences': 4,
+                                               'subscription_history': 2})
+
+    def test_partition_drop_deltas(self):
+        """Test that dropped partitions subtract their rows per action and in total."""
+        cursor = GroupedCursor([('subscribed', 5), ('updated', 3)])
+        deltas = history_partition_deltas(cursor, ['p202401', 'p202402'])
+
+        self.assertIn("PARTITION (p202401, p202402)", cursor.sql)
+        self.assertEqual(deltas, {'subscription_history': -8, 'subscription_history.action.subscribed': -5,
+                                  'subscription_history.action.updated': -3})
+
+    def test_migration_covers_every_write_path(self):
+        """Test that V5 has a trigger per table and event, and counts out cascaded preferences."""
+        migration = next(m for m in discover_migrations() if m.version == '5')
+        triggers = [s for s in migration.statements() if s.startswith('CREATE TRIGGER')]
+        events = {tuple(s.split('\n')[1].split()[1::2]) for s in triggers}
+
+        for table in ('subscribers', 'subscription_preferences', 'subscription_history'):
+            for event in ('INSERT', 'UPDATE', 'DELETE'):
+                self.assertIn((event, table), events)
+        cascade = next(s for s in triggers if 'BEFORE DELETE ON subscribers' in s)
+        self.assertIn('FROM subscription_preferences WHERE subscriber_id = OLD.id', cascade)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the TTL/LRU cache and repository cache invalidation.
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from subscriber_db.cache import MISSING, NEGATIVE, TTLCache
+from subscriber_db.repository import PROFILE_FIELDS, SubscriberRepository
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class FakeCursor:
+    def __init__(self, db, as_tuples=False):
+        self.db = db
+        self.as_tuples = as_tuples
+        self.row = None
+        self.rowcount = 0
+        self.lastrowid = None
+
+    def execute(self, sql, params=None):
+        self.db.statements.append(sql)
+        if sql.lstrip().startswith('SELECT'):
+            key = str(params[0]).lower()
+            self.row = next((r for r in self.db.rows
+                             if key in (str(r['id']), r['email'])), None)
+        elif sql.startswith('UPDATE subscribers'):
+            self.db.rows[0]['first_name'] = params[0]
+            self.rowcount = 1
+
+    def fetchone(self):
+        return self.row
+
+    def fetchall(self):
+        if self.row is None:
+            return []
+        return [tuple(self.row[key] for key in PROFILE_FIELDS) if self.as_tuples else self.row]
+
+    def close(self):
+        pass
+
+
+class FakeDatabase:
+    def __init__(self):
+        self.statements = []
+        self.prepared = []
+        self.rows = [{
+            'id': 7, 'email': 'ann@example.com', 'first_name': 'Ann', 'last_name': 'Lee',
+            'is_active': 1, 'created_at': None, 'updated_at': None,
+            'newsletter_enabled': 1, 'marketing_enabled': 0, 'frequency': 'weekly',
+        }]
+
+    def connection(self):
+        return self
+
+    def cursor(self, **kwargs):
+        return FakeCursor(self)
+
+    def execute_prepared(self, sql, params=()):
+        """Like PooledConnection.execute_prepared: tuple rows in select-list order"""
+        self.prepared.append(sql)
+        cursor = FakeCursor(self, as_tuples=True)
+        cursor.execute(sql, params)
+        return cursor
+
+    def start_transaction(self):
+        pass
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+    def selects(self):
+        return sum(1 for sql in self.statements if sql.lstrip().startswith('SELECT'))
+
+
+class TestTTLCache(unittest.TestCase):
+    """Test class for LRU, TTL and size limits."""
+
+    def test_lru_eviction_by_entries(self):
+        """Test that the least recently used entry is evicted first."""
+        cache = TTLCache(max_entries=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+        self.assertIs(cache.get('b'), MISSING)
+        self.assertEqual(cache.get('a'), 1)
+        self.assertEqual(cache.stats()['evictions'], 1)
+
+    def test_eviction_by_bytes(self):
+        """Test that the byte limit bounds total cache size."""
+        cache = TTLCache(max_entries=100, max_bytes=400)
+        for i in range(10):
+            cache.set(i, 'x' * 50)
+        self.assertLessEqual(cache.stats()['bytes'], 400)
+        self.assertLess(len(cache), 10)
+
+    def test_ttl_expiry(self):
+        """Test that entries expire after their TTL."""
+        clock = FakeClock()
+        cache = TTLCache(ttl=10, clock=clock)
+        cache.set('a', 1)
+        clock.now = 11
+        self.assertIs(cache.get('a'), MISSING)
+        self.assertEqual(cache.stats()['expirations'], 1)
+
+    def test_negative_entries(self):
+        """Test negative caching only when a negative TTL is configured."""
+        cache = TTLCache()
+        cache.set_negative('x')
+        self.assertIs(cache.get('x'), MISSING)
+        cache = TTLCache(negative_ttl=5)
+        cache.set_negative('x')
+        self.assertIs(cache.get('x'), NEGATIVE)
+        self.assertEqual(cache.stats()['negative_hits'], 1)
+
+
+class TestRepositoryCache(unittest.TestCase):
+    """Test class for read-through caching in SubscriberRepository."""
+
+    def test_repeated_lookup_hits_cache(self):
+        """Test that the second lookup by email or id is served from cache."""
+        db = FakeDatabase()
+        repo = SubscriberRepository(pool=db)
+        profile = repo.get_by_email('Ann@example.com')
+        self.assertEqual(profile['preferences']['frequency'], 'weekly')
+        repo.get_by_email('ann@example.com')
+        repo.get_by_id(7)
+        self.assertEqual(db.selects(), 1)
+        self.assertEqual(repo.cache_stats()['hits'], 3)
+
+    def test_update_invalidates(self):
+        """Test that writes through the repository invalidate cached profiles."""
+        db = FakeDatabase()
+        repo = SubscriberRepository(pool=db)
+        repo.get_by_email('ann@example.com')
+        repo.update(7, first_name='Anna')
+        self.assertEqual(repo.get_by_email('ann@example.com')['first_name'], 'Anna')
+        self.assertEqual(db.selects(), 2)
+
+    def test_unknown_email_negative_cache(self):
+        """Test that unknown emails are cached as misses when enabled."""
+        db = FakeDatabase()
+        repo = SubscriberRepository(pool=db, cache=TTLCache(negative_ttl=30))
+        self.assertIsNone(repo.get_by_email('probe@example.com'))
+        self.assertIsNone(repo.get_by_email('probe@example.com'))
+        self.assertEqual(db.selects(), 1)
+
+    def test_prepared_and_text_reads_agree(self):
+        """Test that reads use the statement cache by default and map tuple rows like dict rows."""
+        prepared_db, text_db = FakeDatabase(), FakeDatabase()
+        prepared = SubscriberRepository(pool=prepared_db).get_by_email('ann@example.com')
+        text = SubscriberRepository(pool=text_db, prepared=False).get_by_email('ann@example.com')
+        self.assertEqual(prepared, text)
+        self.assertEqual(len(prepared_db.prepared), 1)
+        self.assertEqual(text_db.prepared, [])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,30 +2,43 @@
 """
 Unit tests for subscriber database CRUD operations.
 Each test manages its own data to ensure independence.
+
+By default every test runs inside a transaction that is rolled back in
+tearDown, so nothing is committed and no cleanup scans are needed.
+Set DB_TEST_ISOLATION=cleanup to commit test rows and delete them with the
+legacy LIKE '%test%' queries instead.
 """
 
 import unittest
 import mysql.connector
+import pytest
 import os
 import sys
 import time
 from datetime import datetime
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from subscriber_db import db_config, get_pool
+
+CLEANUP_STATEMENTS = [
+    "DELETE FROM subscription_history WHERE subscriber_id IN (SELECT id FROM subscribers WHERE email LIKE '%test%')",
+    "DELETE FROM subscription_preferences WHERE subscriber_id IN (SELECT id FROM subscribers WHERE email LIKE '%test%')",
+    "DELETE FROM subscribers WHERE email LIKE '%test%'",
+]
+
+@pytest.mark.usefixtures('worker_schema')
 class TestSubscriberCRUD(unittest.TestCase):
     """Test class for subscriber database CRUD operations."""
     
+    isolation = os.getenv('DB_TEST_ISOLATION', 'transaction')
+    
     @classmethod
     def setUpClass(cls):
         """Set up database connection for all tests."""
-        cls.db_config = {
-            'host': os.getenv('DB_HOST', '127.0.0.1'),
-            'port': int(os.getenv('DB_PORT', '3307')),
-            'user': os.getenv('DB_USER', 'subscriber_user'),
-            'password': os.getenv('DB_PASSWORD', 'SubscriberPass123'),
-            'database': os.getenv('DB_NAME', 'subscriber_db'),
-            'autocommit': True
-        }
-        cls.connection = mysql.connector.connect(**cls.db_config)
+        cls.db_config = db_config(autocommit=True)
+        cls.pool = get_pool('tests', **cls.db_config)
+        cls.connection = cls.pool.connection()
         cls.cursor = cls.connection.cursor(dictionary=True)
     
     @classmethod
@@ -38,18 +51,24 @@ class TestSubscriberCRUD(unittest.TestCase):
     
     def setUp(self):
         """Set up test data before each test."""
-        # Clean up any existing test data
-        self.cursor.execute("DELETE FROM subscription_history WHERE subscriber_id IN (SELECT id FROM subscribers WHERE email LIKE '%test%')")
-        self.cursor.execute("DELETE FROM subscription_preferences WHERE subscriber_id IN (SELECT id FROM subscribers WHERE email LIKE '%test%')")
-        self.cursor.execute("DELETE FROM subscribers WHERE email LIKE '%test%'")
-        self.connection.commit()
+        if self.isolation == 'transaction':
+            # Everything the test writes stays in this transaction
+            self.connection.start_transaction()
+        else:
+            # Clean up any existing test data
+            self._cleanup()
     
     def tearDown(self):
         """Clean up test data after each test."""
-        # Clean up test data
-        self.cursor.execute("DELETE FROM subscription_history WHERE subscriber_id IN (SELECT id FROM subscribers WHERE email LIKE '%test%')")
-        self.cursor.execute("DELETE FROM subscription_preferences WHERE subscriber_id IN (SELECT id FROM subscribers WHERE email LIKE '%test%')")
-        self.cursor.execute("DELETE FROM subscribers WHERE email LIKE '%test%'")
+        if self.isolation == 'transaction':
+            self.connection.rollback()
+        else:
+            self._cleanup()
+    
+    def _cleanup(self):
+        """Delete committed test rows (full scans: LIKE '%test%' cannot use the email index)."""
+        for statement in CLEANUP_STATEMENTS:
+            self.cursor.execute(statement)
         self.connection.commit()
     
     def test_create_subscriber(self):